@@ -0,0 +1,118 @@
+import json
+
+import ttg_archive_gui_tabbed as archiver
+
+BASE = archiver.BASE_URL
+
+
+def topic(n):
+    return f"{BASE}Forums/t={n}/topic-{n}.html"
+
+
+def drain(crawler):
+    items = []
+    while (item := crawler.pop()) is not None:
+        items.append(item)
+    return items
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = archiver.BloomFilter(bits=8 * 1024, hashes=4)
+    keys = [f"Forums/t={n}" for n in range(300)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+
+
+def test_bloom_filter_false_positives_stay_rare():
+    bloom = archiver.BloomFilter(bits=64 * 1024, hashes=4)
+    for n in range(1000):
+        bloom.add(f"Forums/p={n}")
+    false_hits = sum(f"Archives/p={n}" in bloom for n in range(10000))
+    assert false_hits < 100
+
+
+def test_pages_are_queued_once_by_page_key(tmp_path):
+    crawler = archiver.ForumCrawler(str(tmp_path))
+    assert crawler.add(topic(1), "topic")
+    assert not crawler.add(f"{BASE}Forums/t=1/renamed.html", "topic")
+    assert crawler.pending() == 1
+    crawler.close()
+
+
+def test_pop_order_follows_priority_then_arrival(tmp_path, monkeypatch):
+    monkeypatch.setattr(archiver, "CRAWL_FRONTIER_MEMORY", 2)
+    crawler = archiver.ForumCrawler(str(tmp_path))
+    crawler.add(topic(1), "topic")
+    crawler.add(f"{BASE}Forums/t=1/start=20/x.html", "topic_page")
+    crawler.add(topic(2), "topic")
+    crawler.add(f"{BASE}Forums/f=3/x.html", "forum")
+    crawler.add(f"{BASE}Forums/f=4/x.html", "forum")
+    assert crawler.spilled == 3
+    assert [kind for url, kind in drain(crawler)] == ["forum", "forum", "topic", "topic", "topic_page"]
+    crawler.close()
+
+
+def test_failed_pages_go_behind_fresh_work(tmp_path):
+    crawler = archiver.ForumCrawler(str(tmp_path))
+    crawler.add(topic(1), "topic")
+    crawler.add(topic(2), "topic")
+    url, kind = crawler.pop()
+    attempts = crawler.finish(url, ok=False)
+    assert attempts == 1
+    crawler.retry(url, kind, attempts)
+    crawler.add(f"{BASE}Forums/t=3/start=20/x.html", "topic_page")
+    assert [u for u, k in drain(crawler)][-1] == topic(1)
+    assert crawler.stats()["failed"] == 0
+    crawler.close()
+
+
+def test_closed_crawl_resumes_its_frontier(tmp_path, monkeypatch):
+    monkeypatch.setattr(archiver, "CRAWL_FRONTIER_MEMORY", 2)
+    crawler = archiver.ForumCrawler(str(tmp_path))
+    for n in range(5):
+        crawler.add(topic(n), "topic")
+    url, kind = crawler.pop()
+    crawler.finish(url, ok=True)
+    crawler.close()
+    resumed = archiver.ForumCrawler(str(tmp_path))
+    assert resumed.stats() == {"done": 1, "failed": 0, "queued": 4}
+    assert not resumed.add(topic(0), "topic")
+    assert [u for u, k in drain(resumed)] == [topic(n) for n in range(1, 5)]
+    resumed.close()
+
+
+def test_killed_crawl_requeues_pages_held_in_memory(tmp_path):
+    crawler = archiver.ForumCrawler(str(tmp_path))
+    for n in range(3):
+        crawler.add(topic(n), "topic")
+    crawler.commit()
+    # Killed: the in-memory heap is never spilled to the frontier table
+    crawler.db.close()
+    resumed = archiver.ForumCrawler(str(tmp_path))
+    assert sorted(u for u, k in drain(resumed)) == sorted(topic(n) for n in range(3))
+    resumed.close()
+
+
+def test_verify_requeued_pages_go_back_to_the_frontier(tmp_path):
+    meta = tmp_path / "meta"
+    crawler = archiver.ForumCrawler(str(meta))
+    crawler.add(topic(1), "topic")
+    crawler.add(topic(2), "topic")
+    for url, kind in drain(crawler):
+        crawler.finish(url, ok=True)
+    user_entry = {"group": "posts_live", "kind": "posts", "url": f"{BASE}Forums/p=5/x.html", "reason": "truncated"}
+    (meta / "requeue.json").write_text(json.dumps([
+        {"group": "crawl", "kind": "topics_0000", "url": topic(1), "reason": "truncated"},
+        {"group": "crawl", "kind": "topics_0000", "url": topic(3), "reason": "missing"},
+        user_entry,
+    ]))
+
+    archiver.requeue_crawl_pages(str(meta), crawler)
+    assert crawler.stats() == {"done": 1, "failed": 0, "queued": 2}
+    assert sorted(u for u, k in drain(crawler)) == [topic(1), topic(3)]
+    # The user archiver's entries stay for it; the crawl's are now in crawl.sqlite
+    assert archiver.load_requeued(str(meta)) == [user_entry]
+    assert archiver.load_requeued(str(meta), crawl=True) == []
+    assert crawler.requeue(topic(2)) and not crawler.requeue(topic(2))
+    crawler.close()
@@ -0,0 +1,110 @@
+import asyncio
+import json
+
+import ttg_archive_gui_tabbed as archiver
+
+
+def test_one_large_group_cannot_starve_the_others(monkeypatch):
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(archiver.time, "time", lambda: clock["now"])
+    found = []
+
+    async def collect_search_pages(page, root_url, content, until=None):
+        # The first group has endless results: it always runs to its limit
+        found.append(root_url)
+        clock["now"] = until if root_url == "topics" else clock["now"] + 1
+        content["posts"].add(f"{archiver.BASE_URL}Forums/p={len(found)}/x.html")
+
+    scheduled = {}
+
+    async def archive_scheduled(page, done, out_dir, scheduler, posts_only=False):
+        scheduled.update({item["url"]: item["group"] for item in scheduler.items})
+
+    monkeypatch.setattr(archiver, "collect_search_pages", collect_search_pages)
+    monkeypatch.setattr(archiver, "archive_scheduled", archive_scheduled)
+    groups = [("topics_live", "topics"), ("posts_live", "posts"), ("posts_arch", "archives")]
+    asyncio.run(archiver.run_scheduled_user_archival(None, set(), "out", 1000.0 + 3600, False,
+                                                     "user", groups, False))
+    assert found == ["topics", "posts", "archives"]
+    assert len(scheduled) == 3
+
+
+async def no_sleep(seconds):
+    pass
+
+
+def html_only_archive(tmp_path):
+    """Output folder holding one page a deadline run saved HTML-only"""
+    meta = tmp_path / "meta"
+    meta.mkdir()
+    url = f"{archiver.BASE_URL}Forums/p=5/x.html"
+    rec = {"url": url, "title": "t", "png": None, "html": str(tmp_path / "html" / "00007__t.html")}
+    archiver.write_results(str(meta), "posts_live", "posts", [rec])
+    archiver.write_html_only(str(meta), {url: {"group": "posts_live", "kind": "posts", "rec": rec}})
+    return url, rec
+
+
+def test_html_only_pages_get_their_screenshot_in_the_same_record(tmp_path, monkeypatch):
+    url, rec = html_only_archive(tmp_path)
+    saved = []
+
+    async def safe_goto(page, url, **kwargs):
+        return True
+
+    async def expand_click_to_view_content(page):
+        pass
+
+    async def save_page(page, out_dir, group, kind, idx, with_screenshot=True, with_html=True, post_id=None):
+        saved.append((idx, with_html))
+        return {"url": url, "png": f"{out_dir}/screenshots/{idx:05d}__t.png", "html": None}
+
+    for name, fn in [("safe_goto", safe_goto), ("save_page", save_page),
+                     ("expand_click_to_view_content", expand_click_to_view_content)]:
+        monkeypatch.setattr(archiver, name, fn)
+    monkeypatch.setattr(archiver.asyncio, "sleep", no_sleep)
+    done = set()
+    asyncio.run(archiver.archive_html_only(None, done, str(tmp_path)))
+
+    assert saved == [(7, False)]
+    [updated] = archiver.load_results(str(tmp_path / "meta"), "posts_live", "posts")
+    assert updated["html"] == rec["html"] and updated["png"].endswith("00007__t.png")
+    assert archiver.load_html_only(str(tmp_path / "meta")) == {}
+    assert archiver.done_key(url) in done
+
+
+def test_normal_runs_leave_html_only_pages_to_the_screenshot_pass(tmp_path, monkeypatch):
+    url, rec = html_only_archive(tmp_path)
+    captured = []
+
+    async def capture_url(page, done, out_dir, group, kind, url, results, posts_only=False, idx=None):
+        captured.append(url)
+
+    monkeypatch.setattr(archiver, "capture_url", capture_url)
+    other = f"{archiver.BASE_URL}Forums/p=6/y.html"
+    asyncio.run(archiver.archive_url_list(None, set(), str(tmp_path), "posts_live", "posts",
+                                          [f"{archiver.BASE_URL}Forums/p=5/renamed.html", other]))
+    assert captured == [other]
+
+
+def test_requeued_pages_go_through_the_deadline_scheduler(tmp_path, monkeypatch):
+    (tmp_path / "meta").mkdir()
+    requeued = f"{archiver.BASE_URL}Forums/t=9/broken.html"
+    (tmp_path / "meta" / "requeue.json").write_text(
+        json.dumps([{"group": "topics_live", "kind": "topics", "url": requeued, "reason": "truncated"}]))
+    found = f"{archiver.BASE_URL}Forums/t=9/other-slug.html"
+
+    async def collect_search_pages(page, root_url, content, until=None):
+        content["topics"].add(found)
+
+    scheduled = []
+
+    async def archive_scheduled(page, done, out_dir, scheduler, posts_only=False):
+        scheduled.extend(item["url"] for item in scheduler.items)
+        done.add(archiver.done_key(requeued))
+
+    monkeypatch.setattr(archiver, "collect_search_pages", collect_search_pages)
+    monkeypatch.setattr(archiver, "archive_scheduled", archive_scheduled)
+    asyncio.run(archiver.run_scheduled_user_archival(None, set(), str(tmp_path), archiver.time.time() + 3600,
+                                                     False, "user", [("topics_live", "topics")], False))
+    assert scheduled == [requeued]
+    assert not (tmp_path / "meta" / "requeue.json").exists()
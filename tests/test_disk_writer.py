@@ -0,0 +1,43 @@
+import asyncio
+import time
+
+import ttg_archive_gui_tabbed as archiver
+
+
+def test_close_fsyncs_everything_written(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(archiver, "fsync_file", synced.append)
+    writer = archiver.DiskWriter(workers=4, max_pending=8)
+    paths = [str(tmp_path / f"{n:03d}.png") for n in range(50)]
+
+    async def write_all():
+        for path in paths:
+            await writer.write(path, b"data")
+        writer.checkpoint(str(tmp_path / "done.json"), "{}")
+
+    asyncio.run(write_all())
+    writer.close()
+    assert sorted(synced) == sorted(paths + [str(tmp_path / "done.json")])
+    assert all((tmp_path / f"{n:03d}.png").read_bytes() == b"data" for n in range(50))
+
+
+def test_outputs_are_recorded_before_the_job_counts_as_finished(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(archiver, "fsync_file", synced.append)
+    writer = archiver.DiskWriter(workers=1)
+    finished = writer._finished
+
+    def slow_finished(future):
+        # Widen the gap between the job leaving self.jobs and its thread moving on
+        finished(future)
+        time.sleep(0.2)
+
+    monkeypatch.setattr(writer, "_finished", slow_finished)
+    path = str(tmp_path / "page.png")
+
+    async def queue():
+        await writer.run(archiver.write_file, path, b"data", outputs=[path])
+
+    asyncio.run(queue())
+    writer.close()
+    assert synced == [path]
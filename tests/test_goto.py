@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+import ttg_archive_gui_tabbed as archiver
+
+
+class FakeResponse:
+    def __init__(self, status):
+        self.status = status
+
+
+class FakePage:
+    url = archiver.BASE_URL + "Forums/t=1/x.html"
+
+    def __init__(self, status):
+        self.status = status
+
+    def is_closed(self):
+        return False
+
+    async def goto(self, url, wait_until=None, timeout=None):
+        return FakeResponse(self.status)
+
+    async def wait_for_timeout(self, ms):
+        pass
+
+    async def evaluate(self, script):
+        return 0
+
+    async def content(self):
+        return "<html><title>Forbidden</title></html>"
+
+    async def title(self):
+        return "Forbidden"
+
+
+@pytest.fixture(autouse=True)
+def no_waits(monkeypatch):
+    async def sleep(seconds):
+        pass
+    monkeypatch.setattr(archiver.asyncio, "sleep", sleep)
+
+
+@pytest.mark.parametrize("status", [403, 429, 500, 503])
+def test_blocks_rate_limits_and_server_errors_fail(status):
+    assert archiver.is_failed_status(status)
+
+
+@pytest.mark.parametrize("status", [200, 301, 400, 401, 404, 410])
+def test_other_statuses_are_saved_as_is(status):
+    assert not archiver.is_failed_status(status)
+
+
+def test_forbidden_page_is_a_retryable_failure(tmp_path):
+    # goto_failure is a context variable, so read it inside the same task
+    async def run():
+        ok = await archiver.goto_with_retries(FakePage(403), FakePage.url, 2, 1000)
+        return ok, archiver.goto_failure.get()
+    ok, failure = asyncio.run(run())
+    assert not ok
+    assert failure == {"kind": "http_403", "message": "HTTP 403"}
+    queue = archiver.RetryQueue(str(tmp_path))
+    assert queue.failed(FakePage.url, "topics_live", "topics", failure)
+
+
+def test_missing_page_is_saved():
+    async def run():
+        return await archiver.goto_with_retries(FakePage(404), FakePage.url, 2, 1000)
+    assert asyncio.run(run())
@@ -0,0 +1,125 @@
+import json
+import os
+
+import ttg_archive_gui_tabbed as archiver
+
+B = archiver.BASE_URL
+PAGE = f"{B}Forums/t=100/topic.html"
+HTML = f"""<html><head>
+<link rel="stylesheet" href="/css/site.css?v=3"><link rel="canonical" href="{PAGE}">
+<link rel="icon" href="/favicon.ico"></head><body style="background: url('/img/bg.png')">
+<a href="/Forums/t=200/other-topic.html">other</a> <a href="/Forums/t=300/missing.html">missing</a>
+<a href="/about.html">about</a> <img src="/avatars/1.png"> <img src="https://cdn.example.com/x.png">
+</body></html>"""
+
+
+def test_asset_paths_stay_inside_assets():
+    assert archiver.asset_relpath(f"{B}img/../../etc/passwd") == "assets/img/etc/passwd"
+    assert archiver.asset_relpath(f"{B}css/site.css").endswith("css/site.css")
+    versioned = archiver.asset_relpath(f"{B}css/site.css?v=3")
+    assert versioned.startswith("assets/css/site__") and versioned.endswith(".css")
+
+
+def test_page_asset_urls_only_same_site_assets():
+    assert archiver.page_asset_urls(HTML, PAGE) == sorted([
+        f"{B}css/site.css?v=3", f"{B}favicon.ico", f"{B}img/bg.png", f"{B}avatars/1.png"])
+
+
+def test_rewrite_points_at_archived_pages_and_saved_assets():
+    url_map = {archiver.mirror_url_key(f"{B}Forums/t=200/x.html"): "custom/pages/00002__other.html"}
+    assets = {"assets/avatars/1.png", archiver.asset_relpath(f"{B}css/site.css?v=3")}
+    html, unresolved = archiver.rewrite_page_links(HTML, PAGE, "custom/pages/00001__topic.html", url_map, assets)
+    assert 'href="00002__other.html"' in html
+    assert 'src="../../assets/avatars/1.png"' in html
+    assert '"../../assets/css/site__' in html
+    assert f'href="{B}about.html"' in html       # not an asset tag, left absolute
+    assert f'url(&quot;{B}img/bg.png&quot;)' in html  # asset not saved yet
+    assert "Forums/t=300" in unresolved and "assets/img/bg.png" in unresolved
+    assert "assets/about.html" not in unresolved
+
+
+def test_update_mirror_copies_assets_and_redoes_pages_when_they_arrive(tmp_path):
+    out = tmp_path / "out"
+    page = out / "html" / "custom" / "pages" / "00001__topic.html"
+    page.parent.mkdir(parents=True)
+    page.write_text(HTML, encoding="utf-8")
+    (out / "meta").mkdir()
+    (out / "meta" / "custom__pages__results.json").write_text(json.dumps([{"url": PAGE, "html": str(page)}]))
+    
+    assert archiver.update_mirror(str(out)) == 1
+    assert archiver.update_mirror(str(out)) == 0
+    
+    asset = out / "assets" / "img" / "bg.png"
+    asset.parent.mkdir(parents=True)
+    asset.write_bytes(b"png")
+    assert archiver.update_mirror(str(out)) == 1
+    mirrored = (out / "mirror" / "custom" / "pages" / "00001__topic.html").read_text(encoding="utf-8")
+    assert 'url(&quot;../../assets/img/bg.png&quot;)' in mirrored
+    assert (out / "mirror" / "assets" / "img" / "bg.png").read_bytes() == b"png"
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.ok, self._body = True, body
+
+    async def body(self):
+        return self._body
+
+
+class FakePage:
+    url = PAGE
+
+    def __init__(self, bodies):
+        self.bodies, self.requests = bodies, []
+        self.context = self
+        self.request = self
+
+    async def get(self, url, timeout=None):
+        self.requests.append(url)
+        return FakeResponse(self.bodies.get(url, b"data"))
+
+
+def test_asset_fetches_are_paced_and_listed(tmp_path, monkeypatch):
+    css_url = f"{B}css/site.css?v=3"
+    page = FakePage({css_url: b"body { background: url(/img/tile.png) }"})
+    sleeps = []
+
+    async def sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(archiver.asyncio, "sleep", sleep)
+    archiver.start_asset_capture()
+    try:
+        fetched = []
+        archiver.asyncio.run(archiver.save_page_assets(page, str(tmp_path), HTML, fetched=fetched))
+        archiver.asyncio.run(archiver.save_page_assets(page, str(tmp_path), HTML))
+    finally:
+        archiver.stop_asset_capture()
+    assert len(page.requests) == 5 and f"{B}img/tile.png" in page.requests
+    assert sleeps == [archiver.tuned("delay_sec")] * 5
+    assert sorted(fetched) == sorted(str(tmp_path / archiver.asset_relpath(url)) for url in page.requests)
+    assert archiver.record_files({"html": "a.html", "assets": fetched})[1:] == fetched
+
+
+def test_verify_checks_assets_and_drops_broken_ones(tmp_path):
+    out = tmp_path / "out"
+    icon = out / "assets" / "favicon.png"
+    broken = out / "assets" / "css" / "site.css"
+    broken.parent.mkdir(parents=True)
+    raw = archiver.zlib.compress(b"\x00" * 5)
+    icon.write_bytes(b"\x89PNG\r\n\x1a\n" + b"".join(
+        archiver.struct.pack(">I", len(data)) + ctype + data + archiver.struct.pack(">I", archiver.zlib.crc32(ctype + data))
+        for ctype, data in [(b"IHDR", archiver.struct.pack(">IIBBBBB", 1, 1, 8, 6, 0, 0, 0)),
+                            (b"IDAT", raw), (b"IEND", b"")]))
+    broken.write_bytes(b"")
+    page = out / "html" / "custom" / "pages" / "00001__topic.html"
+    page.parent.mkdir(parents=True)
+    page.write_text(HTML.replace("</body>", "<p>" + "text " * 200 + "</p></body>"), encoding="utf-8")
+    (out / "meta").mkdir()
+    (out / "meta" / "custom__pages__results.json").write_text(json.dumps(
+        [{"url": PAGE, "html": str(page), "png": None, "assets": [str(icon), str(broken)]}]))
+
+    report = archiver.verify_archive(str(out), workers=2)
+    assert report["broken_files"] == {"assets/css/site.css": "empty file"}
+    assert [entry["url"] for entry in report["requeued"]] == [PAGE]
+    assert icon.exists() and not broken.exists()
@@ -0,0 +1,87 @@
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+import ttg_archive_gui_tabbed as archiver
+
+
+def make_files(tmp_path, count=5):
+    src = tmp_path / "out"
+    files = {}
+    for n in range(count):
+        path = src / "html" / f"{n:05d}__page.html"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = (f"<html>page {n}</html>" * (n * 40 + 1)).encode()
+        path.write_bytes(data)
+        files[f"html/{path.name}"] = (str(path), data)
+    return files
+
+
+def shards(shard_dir):
+    return sorted(p for p in os.listdir(shard_dir) if not p.endswith(".index.jsonl"))
+
+
+@pytest.mark.parametrize("fmt", ["tar", "tar.gz", "zip"])
+def test_every_file_reads_back_from_its_index_entry(tmp_path, fmt):
+    files = make_files(tmp_path)
+    shard_dir = str(tmp_path / "shards")
+    writer = archiver.ShardWriter(shard_dir, "live", fmt)
+    for arcname, (path, _) in files.items():
+        writer.add(path, arcname, {"url": arcname})
+    writer.close()
+    
+    [shard] = shards(shard_dir)
+    shard_path = os.path.join(shard_dir, shard)
+    index = archiver.load_shard_index(shard_path)
+    assert [e["name"] for e in index] == list(files)
+    for entry in index:
+        assert archiver.read_packed_file(shard_path, entry) == files[entry["name"]][1]
+        assert entry["url"] == entry["name"]
+
+
+@pytest.mark.parametrize("fmt", ["tar", "tar.gz"])
+def test_tar_shards_stay_normal_tarballs(tmp_path, fmt):
+    files = make_files(tmp_path)
+    shard_dir = str(tmp_path / "shards")
+    writer = archiver.ShardWriter(shard_dir, "live", fmt)
+    for arcname, (path, _) in files.items():
+        writer.add(path, arcname)
+    writer.close()
+    with tarfile.open(os.path.join(shard_dir, shards(shard_dir)[0])) as tar:
+        assert {m.name: tar.extractfile(m).read() for m in tar} == {k: v[1] for k, v in files.items()}
+
+
+def test_zip_shard_is_a_normal_zip(tmp_path):
+    files = make_files(tmp_path)
+    shard_dir = str(tmp_path / "shards")
+    writer = archiver.ShardWriter(shard_dir, "live", "zip")
+    for arcname, (path, _) in files.items():
+        writer.add(path, arcname)
+    writer.close()
+    with zipfile.ZipFile(os.path.join(shard_dir, shards(shard_dir)[0])) as z:
+        assert {n: z.read(n) for n in z.namelist()} == {k: v[1] for k, v in files.items()}
+
+
+def test_shards_roll_over_and_numbering_continues(tmp_path):
+    files = make_files(tmp_path)
+    shard_dir = str(tmp_path / "shards")
+    writer = archiver.ShardWriter(shard_dir, "live", "tar", max_bytes=2048)
+    for arcname, (path, _) in files.items():
+        writer.add(path, arcname)
+    writer.close()
+    first_run = shards(shard_dir)
+    assert len(first_run) > 1
+    
+    writer = archiver.ShardWriter(shard_dir, "live", "tar")
+    path, _ = next(iter(files.values()))
+    writer.add(path, "again.html")
+    writer.close()
+    [new] = set(shards(shard_dir)) - set(first_run)
+    assert new == f"live-{len(first_run) + 1:04d}.tar"
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        archiver.ShardWriter(str(tmp_path), "live", "rar")
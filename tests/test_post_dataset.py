@@ -0,0 +1,58 @@
+import gzip
+import json
+
+import pytest
+
+import ttg_archive_gui_tabbed as archiver
+
+
+def make_archive(tmp_path, pages):
+    out = tmp_path / "out"
+    html_dir = out / "html" / "custom" / "pages"
+    html_dir.mkdir(parents=True)
+    (out / "meta").mkdir()
+    results = []
+    for n, url in enumerate(pages, 1):
+        path = html_dir / f"{n:05d}__page.html"
+        path.write_text(f"<html><body><p>page text {n}</p></body></html>", encoding="utf-8")
+        results.append({"url": url, "html": str(path)})
+    (out / "meta" / "custom__pages__results.json").write_text(json.dumps(results))
+    return out
+
+
+def test_columnar_output_is_written_in_batches(tmp_path, monkeypatch):
+    pytest.importorskip("bs4")
+    monkeypatch.setattr(archiver, "COLUMNAR_BATCH_ROWS", 2)
+    B = archiver.BASE_URL
+    pages = [f"{B}Forums/t={n}/topic.html" for n in range(5)] + [f"{B}Forums/t=0/topic-again.html"]
+    out = make_archive(tmp_path, pages)
+    
+    count = archiver.extract_posts_dataset(str(out), workers=1)
+    
+    lines = (out / "dataset" / "posts.jsonl").read_text(encoding="utf-8").splitlines()
+    assert count == len(lines)
+    columnar = out / "dataset" / ("posts.parquet" if archiver_has_pyarrow() else "posts.columns.jsonl.gz")
+    assert columnar.exists()
+    if not archiver_has_pyarrow():
+        with gzip.open(columnar, "rt", encoding="utf-8") as f:
+            batches = [json.loads(line) for line in f]
+        assert all(len(b["url"]) <= 2 for b in batches)
+        assert sum(len(b["url"]) for b in batches) == count
+        assert set(batches[0]) == set(archiver.POST_FIELDS)
+
+
+def archiver_has_pyarrow():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def test_parquet_schema_accepts_missing_values(tmp_path):
+    pytest.importorskip("pyarrow")
+    writer = archiver.ColumnarWriter(str(tmp_path / "posts"))
+    row = {field: None for field in archiver.POST_FIELDS}
+    writer.write([row, dict(row, post_id="1", quote_post_ids=["2"], page_start=10)])
+    import pyarrow.parquet
+    assert pyarrow.parquet.read_table(writer.close()).num_rows == 2
@@ -0,0 +1,49 @@
+import asyncio
+
+import ttg_archive_gui_tabbed as archiver
+
+URL = archiver.BASE_URL + "Forums/t=1/topic.html"
+TABLE_PAGE = """<html><head><title>Topic</title></head><body><h1>Topic</h1><table>
+<tr><td class="post"><a href="/Forums/p=10/x.html">#</a> first</td></tr>
+<tr><td class="post"><a href="/Forums/p=11/x.html">#</a> second</td></tr>
+</table></body></html>"""
+
+
+class FakeLocator:
+    def __init__(self, selector):
+        self.selector = selector
+        self.first = self
+
+
+class FakePage:
+    def __init__(self, found):
+        self.found, self.evaluated = found, []
+
+    def locator(self, selector):
+        return FakeLocator(selector)
+
+    async def evaluate(self, script, arg):
+        self.evaluated.append(arg)
+        return self.found
+
+
+def test_posts_with_an_id_are_located_by_it():
+    html = TABLE_PAGE.replace('<td class="post"><a href="/Forums/p=11', '<td id="p11" class="post"><a href="/Forums/p=11')
+    fragment = archiver.post_fragment(html, URL, "11")
+    assert fragment["selector"] == '[id="p11"]'
+    assert "second" in fragment["html"] and "first" not in fragment["html"]
+
+
+def test_posts_without_an_id_are_found_in_the_rendered_page():
+    fragment = archiver.post_fragment(TABLE_PAGE, URL, "11")
+    # No path through html.parser's tree: Chromium adds a <tbody> it doesn't have
+    assert fragment["selector"] is None
+    page = FakePage(found=True)
+    post = asyncio.run(archiver.locate_post(page, fragment, "11"))
+    assert page.evaluated == ["11"]
+    assert post.selector == '[data-archiver-post="11"]'
+
+
+def test_post_missing_from_the_rendered_page_falls_back_at_once():
+    fragment = archiver.post_fragment(TABLE_PAGE, URL, "10")
+    assert asyncio.run(archiver.locate_post(FakePage(found=False), fragment, "10")) is None
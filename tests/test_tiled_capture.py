@@ -0,0 +1,100 @@
+import struct
+import zlib
+
+import pytest
+
+import ttg_archive_gui_tabbed as archiver
+
+
+def paeth(a, b, c):
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    if pa <= pb and pa <= pc:
+        return a
+    return b if pb <= pc else c
+
+
+def filter_row(ftype, row, prev, bpp):
+    out = bytearray()
+    for i, x in enumerate(row):
+        a = row[i - bpp] if i >= bpp else 0
+        b = prev[i]
+        c = prev[i - bpp] if i >= bpp else 0
+        pred = (0, a, b, (a + b) // 2, paeth(a, b, c))[ftype]
+        out.append((x - pred) & 0xFF)
+    return bytes([ftype]) + bytes(out)
+
+
+def write_png(path, rows, channels=3, filters=(0,)):
+    """Encode RGB rows, cycling through `filters` so the first row uses filters[0]"""
+    width = len(rows[0]) // channels
+    prev = bytes(len(rows[0]))
+    raw = b""
+    for n, row in enumerate(rows):
+        raw += filter_row(filters[n % len(filters)], row, prev, channels)
+        prev = row
+    color = {1: 0, 2: 4, 3: 2, 4: 6}[channels]
+    with open(path, "wb") as f:
+        f.write(archiver.PNG_SIGNATURE)
+        f.write(archiver.png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, len(rows), 8, color, 0, 0, 0)))
+        f.write(archiver.png_chunk(b"IDAT", zlib.compress(raw)))
+        f.write(archiver.png_chunk(b"IEND", b""))
+
+
+def read_rows(path, channels=3):
+    width, height, _, _, _ = archiver.read_png_header(path)
+    raw = zlib.decompress(b"".join(d for t, d in archiver.read_png_chunks(path) if t == b"IDAT"))
+    stride = width * channels + 1
+    rows, prev = [], bytes(stride - 1)
+    for y in range(height):
+        ftype, data = raw[y * stride], bytearray(raw[y * stride + 1:(y + 1) * stride])
+        for i in range(len(data)):
+            a = data[i - channels] if i >= channels else 0
+            b = prev[i]
+            c = prev[i - channels] if i >= channels else 0
+            data[i] = (data[i] + (0, a, b, (a + b) // 2, paeth(a, b, c))[ftype]) & 0xFF
+        rows.append(bytes(data))
+        prev = bytes(data)
+    return rows
+
+
+def gradient(width, height, seed):
+    return [bytes((x * 7 + y * 13 + seed * 31 + c * 50) & 0xFF for x in range(width) for c in range(3))
+            for y in range(height)]
+
+
+@pytest.mark.parametrize("ftype", [0, 1, 2, 3, 4])
+def test_unfilter_first_row_matches_decoded_pixels(ftype):
+    row = bytes(range(10, 40))
+    filtered = filter_row(ftype, row, bytes(len(row)), 3)
+    assert archiver.unfilter_first_row(filtered, 3) == b"\x00" + row
+
+
+def test_stitch_keeps_every_pixel(tmp_path):
+    tiles, expected = [], []
+    for n, filters in enumerate([(1, 2), (3, 4), (4, 0, 2)]):
+        rows = gradient(9, 5 + n, n)
+        path = str(tmp_path / f"tile_{n}.png")
+        write_png(path, rows, filters=filters)
+        tiles.append(path)
+        expected += rows
+    out = str(tmp_path / "out.png")
+    archiver.stitch_png_tiles(tiles, out)
+    assert archiver.read_png_header(out)[:2] == (9, len(expected))
+    assert read_rows(out) == expected
+
+
+def test_stitch_rejects_mismatched_widths(tmp_path):
+    a, b = str(tmp_path / "a.png"), str(tmp_path / "b.png")
+    write_png(a, gradient(4, 2, 0))
+    write_png(b, gradient(5, 2, 0))
+    with pytest.raises(ValueError):
+        archiver.stitch_png_tiles([a, b], str(tmp_path / "out.png"))
+
+
+def test_truncated_png_is_rejected(tmp_path):
+    path = tmp_path / "t.png"
+    write_png(str(path), gradient(4, 2, 0))
+    path.write_bytes(path.read_bytes()[:-6])
+    with pytest.raises(ValueError):
+        list(archiver.read_png_chunks(str(path)))
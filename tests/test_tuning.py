@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+import ttg_archive_gui_tabbed as archiver
+
+
+@pytest.fixture
+def tuner(tmp_path):
+    return archiver.ThroughputTuner(str(tmp_path))
+
+
+def clean_pages(tuner, streaks):
+    for _ in range(streaks * archiver.TUNING_STREAK):
+        tuner.record("ok")
+
+
+def test_starts_from_the_defaults(tuner):
+    assert tuner.settings == {name: knob[0] for name, knob in archiver.TUNING_KNOBS.items()}
+
+
+def test_clean_pages_speed_up_in_steps(tuner):
+    clean_pages(tuner, 1)
+    assert tuner.settings["load_wait_ms"] < archiver.PAGE_LOAD_WAIT_MS
+    assert tuner.settings["settle_ms"] < 1000
+
+
+def test_speed_up_stays_within_safe_bounds(tuner):
+    clean_pages(tuner, 100)
+    for name, (start, fastest, slowest) in archiver.TUNING_KNOBS.items():
+        assert tuner.settings[name] == fastest
+    assert tuner.settings["delay_sec"] >= archiver.DELAY_SEC
+    assert tuner.settings["concurrency"] == 1
+
+
+def test_parallel_pages_are_opt_in(tmp_path, monkeypatch):
+    knobs = dict(archiver.TUNING_KNOBS, concurrency=(1, 3, 1))
+    monkeypatch.setattr(archiver, "TUNING_KNOBS", knobs)
+    tuner = archiver.ThroughputTuner(str(tmp_path))
+    clean_pages(tuner, 100)
+    assert tuner.settings["concurrency"] == 3
+    tuner.record("error")
+    assert tuner.settings["concurrency"] == 1
+
+
+def test_challenge_backs_off_multiplicatively(tuner):
+    clean_pages(tuner, 3)
+    before = dict(tuner.settings)
+    tuner.record("challenge")
+    assert tuner.settings["delay_sec"] == pytest.approx(min(15.0, before["delay_sec"] * 2), abs=0.01)
+    assert tuner.settings["load_wait_ms"] == min(8000, before["load_wait_ms"] * 2)
+
+
+def test_incomplete_pages_only_lengthen_load_waits(tuner):
+    tuner.record("incomplete")
+    assert tuner.settings["load_wait_ms"] > archiver.PAGE_LOAD_WAIT_MS
+    assert tuner.settings["delay_sec"] == archiver.DELAY_SEC
+
+
+def test_back_off_is_capped_at_slowest(tuner):
+    for _ in range(20):
+        tuner.record("challenge")
+    assert tuner.settings["delay_sec"] == archiver.TUNING_KNOBS["delay_sec"][2]
+    assert tuner.settings["load_wait_ms"] == archiver.TUNING_KNOBS["load_wait_ms"][2]
+
+
+def test_error_resets_the_streak(tuner):
+    for _ in range(archiver.TUNING_STREAK - 1):
+        tuner.record("ok")
+    tuner.record("error")
+    slowed = dict(tuner.settings)
+    tuner.record("ok")
+    assert tuner.settings == slowed
+
+
+def test_learned_pace_persists_and_is_clamped(tmp_path):
+    tuner = archiver.ThroughputTuner(str(tmp_path))
+    tuner.record("challenge")
+    assert archiver.ThroughputTuner(str(tmp_path)).settings == tuner.settings
+    # Values saved by older, more aggressive versions are pulled back into range
+    (tmp_path / "tuning.json").write_text(json.dumps({"settings": {"delay_sec": 0.5, "concurrency": 3}}),
+                                          encoding="utf-8")
+    settings = archiver.ThroughputTuner(str(tmp_path)).settings
+    assert settings["delay_sec"] == archiver.DELAY_SEC
+    assert settings["concurrency"] == 1
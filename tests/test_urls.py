@@ -0,0 +1,72 @@
+import json
+
+import ttg_archive_gui_tabbed as archiver
+
+BASE = archiver.BASE_URL
+
+
+def test_canonical_url_drops_fragment_and_tracking_params():
+    url = "HTTP://WWW.TheTechGame.com/Forums/t=1/x.html?utm_source=mail&page=2&fbclid=abc#post5"
+    assert archiver.canonical_url(url) == "https://www.thetechgame.com/Forums/t=1/x.html?page=2"
+
+
+def test_canonical_url_keeps_other_hosts_scheme():
+    assert archiver.canonical_url("HTTP://Example.com") == "http://example.com/"
+
+
+def test_done_key_ignores_slug_and_section_case():
+    assert archiver.done_key(BASE + "Forums/p=123/old-title.html") == "Forums/p=123"
+    assert archiver.done_key(BASE + "forums/p=123/new-title.html?sid=9") == "Forums/p=123"
+    assert archiver.done_key(BASE + "Archives/t=7/x.html") == "Archives/t=7"
+
+
+def test_done_key_keeps_page_offset_for_topics_and_forums():
+    assert archiver.done_key(BASE + "Forums/t=5/start=20/x.html") == "Forums/t=5/start=20"
+    assert archiver.done_key(BASE + "Forums/t=5/start=0/x.html") == "Forums/t=5"
+    assert archiver.done_key(BASE + "Forums/f=9/start=40/x.html") == "Forums/f=9/start=40"
+
+
+def test_done_key_keeps_profile_tabs_apart():
+    profile = BASE + "Profile/someone.html"
+    assert archiver.done_key(profile + "#wall") != archiver.done_key(profile + "#friends")
+    assert archiver.done_key(profile + "#top") == archiver.done_key(profile)
+
+
+def test_dedupe_urls_keeps_first_of_each_page():
+    urls = [BASE + "Forums/p=1/a.html", BASE + "Forums/p=2/b.html", BASE + "Forums/p=1/c.html"]
+    assert archiver.dedupe_urls(urls) == urls[:2]
+
+
+def failure(kind="timeout"):
+    return {"kind": kind, "message": "load failed"}
+
+
+def test_retry_queue_keys_slug_variants_as_one_page(tmp_path):
+    queue = archiver.RetryQueue(str(tmp_path))
+    assert queue.failed(BASE + "Forums/p=1/a.html", "posts_live", "posts", failure())
+    queue.failed(BASE + "Forums/p=1/b.html", "posts_live", "posts", failure())
+    assert list(queue.entries) == ["Forums/p=1"]
+    assert len(queue.entries["Forums/p=1"]["attempts"]) == 2
+    assert queue.pending() == [BASE + "Forums/p=1/b.html"]
+    queue.succeeded(BASE + "Forums/p=1/c.html")
+    assert queue.pending() == []
+
+
+def test_retry_queue_converts_url_keyed_state(tmp_path):
+    old = {
+        BASE + "Forums/p=1/a.html": {"group": "g", "kind": "posts", "status": "failed", "due": None,
+                                     "attempts": [{"time": 2, "kind": "closed", "message": ""}]},
+        BASE + "Forums/p=1/b.html": {"group": "g", "kind": "posts", "status": "pending", "due": 50,
+                                     "attempts": [{"time": 1, "kind": "timeout", "message": ""}]},
+        BASE + "Forums/p=2/c.html": {"group": "g", "kind": "posts", "status": "done", "due": None,
+                                     "attempts": []},
+    }
+    (tmp_path / "retry_state.json").write_text(json.dumps(old), encoding="utf-8")
+    queue = archiver.RetryQueue(str(tmp_path))
+    assert set(queue.entries) == {"Forums/p=1", "Forums/p=2"}
+    merged = queue.entries["Forums/p=1"]
+    assert merged["status"] == "pending" and merged["due"] == 0
+    assert [a["time"] for a in merged["attempts"]] == [1, 2]
+    assert [url for url, entry in queue.take_due()] == [BASE + "Forums/p=1/a.html"]
+    saved = json.loads((tmp_path / "retry_state.json").read_text(encoding="utf-8"))
+    assert saved["version"] == 2 and set(saved["entries"]) == set(queue.entries)
@@ -0,0 +1,33 @@
+import ttg_archive_gui_tabbed as archiver
+
+FILLER = "<p>" + "post text " * 100 + "</p>"
+
+
+def write(tmp_path, html):
+    path = tmp_path / "page.html"
+    path.write_text(html, encoding="utf-8")
+    return archiver.check_html(str(path), path.stat().st_size)
+
+
+def test_normal_page_with_cloudflare_scripts_is_fine(tmp_path):
+    html = ("<html><head><title>Firmware help - TheTechGame</title></head><body>" + FILLER +
+            '<script src="/cdn-cgi/challenge-platform/scripts/jsd/main.js"></script></body></html>')
+    assert write(tmp_path, html) is None
+
+
+def test_challenge_interstitials_are_flagged(tmp_path):
+    pages = [
+        "<html><head><title>Just a moment...</title></head><body>" + FILLER + "</body></html>",
+        "<html><head><title>Attention Required! | Cloudflare</title></head><body>" + FILLER + "</body></html>",
+        "<html><head><title>x</title></head><body class='no-js'><div id='cf-browser-verification'></div>"
+        + FILLER + "</body></html>",
+        '<html><head><title>x</title></head><body><form id="challenge-form" action="/">' + FILLER
+        + "</form></body></html>",
+    ]
+    for html in pages:
+        assert write(tmp_path, html) == "Cloudflare challenge page"
+
+
+def test_truncated_and_tiny_pages_are_flagged(tmp_path):
+    assert write(tmp_path, "<html><body>" + FILLER).startswith("truncated")
+    assert write(tmp_path, "<html></html>").startswith("too small")
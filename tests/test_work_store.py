@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+import ttg_archive_gui_tabbed as archiver
+
+BASE = archiver.BASE_URL
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = archiver.WorkStore(str(tmp_path / "work.sqlite"))
+    yield store
+    store.close()
+
+
+def queue(store, count):
+    return store.add([("posts_live", "posts", f"{BASE}Forums/p={n}/x.html", False) for n in range(count)])
+
+
+def test_add_skips_pages_already_queued(store):
+    assert queue(store, 3) == 3
+    assert store.add([("posts_arch", "posts", f"{BASE}Forums/p=1/renamed.html", False)]) == 0
+    assert store.stats()["pending"] == 3
+
+
+def test_claims_never_overlap(store):
+    queue(store, 5)
+    first = store.claim("a", 3, 60)
+    second = store.claim("b", 3, 60)
+    assert len(first) == 3 and len(second) == 2
+    assert not {item["id"] for item in first} & {item["id"] for item in second}
+    assert store.claim("c", 3, 60) == []
+
+
+def test_only_the_lease_holder_can_complete(store):
+    queue(store, 1)
+    [item] = store.claim("a", 1, 60)
+    assert not store.complete("b", item["id"], {"url": item["url"]}, [])
+    assert store.complete("a", item["id"], {"url": item["url"]}, [])
+    assert not store.complete("a", item["id"], {"url": item["url"]}, [])
+    stats = store.stats()
+    assert stats["done"] == 1 and stats["workers"] == {"a": 1}
+
+
+def test_renew_reports_the_leases_still_held(store):
+    queue(store, 2)
+    ids = [item["id"] for item in store.claim("a", 2, 60)]
+    store.complete("a", ids[0], {}, [])
+    assert store.renew("a", ids, 60) == [ids[1]]
+    assert store.renew("b", ids, 60) == []
+
+
+def test_expired_lease_goes_back_to_the_pool(store):
+    queue(store, 1)
+    [item] = store.claim("a", 1, -1)
+    [again] = store.claim("b", 1, 60)
+    assert again["id"] == item["id"]
+    assert not store.complete("a", item["id"], {}, [])
+    assert store.complete("b", item["id"], {}, [])
+
+
+def test_fail_retries_until_the_attempt_limit(store, monkeypatch):
+    monkeypatch.setattr(archiver, "RETRY_MAX_ATTEMPTS", 2)
+    queue(store, 1)
+    [item] = store.claim("a", 1, 60)
+    assert store.fail("a", item["id"], {"kind": "timeout", "message": ""})
+    [item] = store.claim("a", 1, 60)
+    assert not store.fail("a", item["id"], {"kind": "timeout", "message": ""})
+    assert store.stats()["failed"] == 1
+
+
+def test_closed_browser_failures_are_not_retried(store):
+    queue(store, 1)
+    [item] = store.claim("a", 1, 60)
+    assert not store.fail("a", item["id"], {"kind": "closed", "message": ""})
+
+
+def test_release_hands_pages_back(store):
+    queue(store, 2)
+    ids = [item["id"] for item in store.claim("a", 2, 60)]
+    store.release("b", ids)
+    assert store.stats()["leased"] == 2
+    store.release("a", ids)
+    assert store.stats()["pending"] == 2
+
+
+class FakePage:
+    def is_closed(self):
+        return False
+
+
+def test_batch_keeps_renewing_until_reports_land(store, monkeypatch):
+    queue(store, 1)
+    batch = store.claim("a", 1, 0.3)
+    renewed = []
+    real_renew = store.renew
+
+    def renew(worker, ids, lease_sec):
+        renewed.append(list(ids))
+        return real_renew(worker, ids, lease_sec)
+
+    async def work_item(page, store, worker_id, done, out_dir, item):
+        # The page is saved but its report only reaches the store a while later
+        async def report():
+            await asyncio.sleep(0.5)
+            store.complete(worker_id, item["id"], {}, [])
+        return asyncio.ensure_future(report())
+
+    monkeypatch.setattr(store, "renew", renew)
+    monkeypatch.setattr(archiver, "work_item", work_item)
+    asyncio.run(archiver.work_batch(FakePage(), store, "a", set(), "out", batch, 0.3))
+    assert [batch[0]["id"]] in renewed
+    assert store.stats()["done"] == 1
@@ -1,17 +1,32 @@
 import asyncio
+import collections
+import concurrent.futures
+import contextvars
 import os
+import random
 import re
 import json
+import html as htmllib
 import time
+import hashlib
+import heapq
+import http.server
+import shutil
+import socket
+import sqlite3
+import struct
+import tarfile
+import zipfile
+import zlib
 import traceback
 import threading
-from urllib.parse import urljoin, urlparse
-from tkinter import *
-from tkinter import ttk, scrolledtext, messagebox, filedialog
+import urllib.request
+from urllib.parse import urljoin, urlparse, urlunparse, parse_qsl, urlencode
 import sys
 
-from bs4 import BeautifulSoup
-from playwright.async_api import async_playwright
+# Playwright, bs4 and tkinter are imported on first use (see make_soup,
+# BrowserSession.launch and load_tkinter) so the window and the non-browser
+# tooling start instantly.
 
 # ============================================================================
 # ARCHIVER CORE
@@ -22,9 +37,105 @@ BASE_URL = "https://www.thetechgame.com/"
 DELAY_SEC = 2.5
 SLOW_MO_MS = 200
 GOTO_TIMEOUT_MS = 120000
+FIRST_GOTO_TIMEOUT_MS = 45000
 PAGE_LOAD_WAIT_MS = 3000
 MAX_SEARCH_PAGES_PER_GROUP = 400
 
+# Deadline scheduling: share of the time budget allowed for finding URLs,
+# and starting per-page cost guesses (seconds) until real timings come in
+DISCOVERY_BUDGET_FRACTION = 0.25
+DEFAULT_PAGE_COST_SEC = {"full": 15.0, "html": 10.0, "png": 12.0}
+BROWSER_HEALTH_TIMEOUT_SEC = 10
+
+# Failed pages go to a retry queue instead of blocking the run: retried with
+# exponential backoff plus jitter, the load timeout growing with each attempt
+RETRY_MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY_SEC = 30
+RETRY_MAX_DELAY_SEC = 600
+INLINE_RETRY_DELAY_SEC = 5
+# HTTP statuses that count as a failed load (as http_NNN) and go to the retry
+# queue: 403 (how Cloudflare blocks a request), 429 and every 5xx. Any other 4xx
+# (404 deleted topic, 410, 401/400...) is the site's real answer and is saved as-is.
+RETRY_HTTP_STATUSES = {403, 429}
+
+# Diagnostics mode: every navigation is traced, but the trace (plus a JSON log of
+# network/console events) is only kept for pages slower than SLOW_PAGE_TRACE_SEC
+# or that fail; oldest traces are deleted past TRACE_MAX_BYTES
+SLOW_PAGE_TRACE_SEC = 60
+TRACE_MAX_BYTES = 500 * 1024 * 1024
+TRACE_EVENT_LOG_SIZE = 1000
+
+# Screenshots, HTML and progress files are written by a background thread pool
+# so capture doesn't wait on the disk; capture only pauses once this many
+# writes are queued
+WRITER_THREADS = 4
+WRITER_MAX_PENDING = 32
+
+# Self-tuning pace: knob -> (start, fastest, slowest). Every TUNING_STREAK clean
+# pages each knob steps 1/20 of its range towards fastest (and once the delay is
+# at its floor another page works in parallel, up to TUNING_MAX_PAGES);
+# challenges, errors and pages with images still loading multiply them back up.
+# The delay between pages never drops below DELAY_SEC and only one page loads at
+# a time unless TUNING_MAX_PAGES is raised. Learned values persist in
+# meta/tuning.json; slow_mo takes effect when the browser is next launched.
+TUNING_MAX_PAGES = 1
+TUNING_KNOBS = {
+    "slow_mo_ms": (SLOW_MO_MS, 0, 400),
+    "load_wait_ms": (PAGE_LOAD_WAIT_MS, 500, 8000),
+    "settle_ms": (1000, 200, 3000),
+    "delay_sec": (DELAY_SEC, DELAY_SEC, 15.0),
+    "concurrency": (1, TUNING_MAX_PAGES, 1),
+}
+TUNING_STREAK = 10
+
+# Pages taller than this are screenshotted in viewport-height tiles instead of
+# one full_page bitmap, and stitched into parts of at most MAX_IMAGE_HEIGHT_PX.
+# With STITCH_TILES off the tiles are kept next to a JSON manifest instead.
+TILED_CAPTURE_MIN_HEIGHT_PX = 8000
+MAX_IMAGE_HEIGHT_PX = 16000
+STITCH_TILES = True
+
+# Posts-only screenshots give up on the post element after this and take the whole page
+POST_SCREENSHOT_TIMEOUT_MS = 5000
+
+# Shard packaging: saved pages can be streamed into size-rolled archives
+# ("tar", "tar.gz", "tar.zst" or "zip") under <output>/shards
+PACKAGE_FORMAT = "tar.gz"
+SHARD_MAX_BYTES = 1024 * 1024 * 1024
+
+# Full-text search index of archived posts (SQLite FTS5)
+SEARCH_INDEX_FILE = "search_index.sqlite"
+
+# Forum crawler: start pages for a whole-board crawl, how many queued pages stay
+# in memory (the rest wait in meta/crawl.sqlite), the Bloom filter in front of the
+# on-disk visited set (2**27 bits = 16 MB, ~1% false positives at 14M pages - a
+# false positive only costs a lookup), and pages per results file
+CRAWL_START_URLS = [f"{BASE_URL}Forums.html", f"{BASE_URL}Archives.html"]
+CRAWL_FRONTIER_MEMORY = 10000
+CRAWL_BLOOM_BITS = 2 ** 27
+CRAWL_BLOOM_HASHES = 7
+CRAWL_RESULTS_CHUNK = 1000
+
+# Work distribution: workers claim WORK_BATCH_SIZE pages at a time from a shared
+# work store under a lease of WORK_LEASE_SEC (renewed while they work); pages whose
+# lease runs out go back to the pool. Idle workers poll every WORK_POLL_SEC.
+WORK_LEASE_SEC = 300
+WORK_BATCH_SIZE = 10
+WORK_POLL_SEC = 30
+WORK_STORE_PORT = 8765
+
+# Integrity checks: smaller files are treated as failed captures
+MIN_PNG_BYTES = 1024
+MIN_HTML_BYTES = 512
+
+CLOUDFLARE_MARKERS = [
+    "verifying you are human",
+    "verify you are human",
+    "checking your browser before accessing",
+    "just a moment",
+    "cf-browser-verification",
+]
+
 # Global variables for GUI communication
 gui_log_callback = None
 gui_progress_callback = None
@@ -32,6 +143,15 @@ gui_enable_continue_callback = None
 should_stop = False
 waiting_for_continue = False
 
+# Callables run as hook(out_dir, record) after save_page writes a page
+page_saved_hooks = []
+retry_queue = None  # RetryQueue for the running archival, if any
+page_tracer = None  # SlowPageTracer when diagnostics are on
+disk_writer = None  # DiskWriter for the running archival, if any
+tuner = None        # ThroughputTuner for the running archival, if any
+# Why the last safe_goto in this task failed (a context variable so parallel pages don't mix them up)
+goto_failure = contextvars.ContextVar("goto_failure", default=None)
+
 def log(msg: str):
     """Log to both file and GUI"""
     timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
@@ -59,6 +179,10 @@ def set_progress(current: int, total: int, status: str):
         gui_progress_callback(current, total, status)
 
 # Helper functions
+def make_soup(html: str):
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html, "html.parser")
+
 def safe_filename(s: str, max_len: int = 120) -> str:
     s = re.sub(r"[^\w\-\.]+", "_", (s or "").strip())
     return s[:max_len].strip("_") or "page"
@@ -69,11 +193,48 @@ def is_same_site(url: str) -> bool:
     except Exception:
         return False
 
+# Query parameters that never change which page is served
+TRACKING_PARAMS = {"utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content",
+                   "fbclid", "gclid", "ref", "sid"}
+CONTENT_ID_RE = re.compile(r"/(Forums|Archives)/([ptf])=(\d+)", re.IGNORECASE)
+PROFILE_TABS = ("wall", "friends", "reputation")
+
+def canonical_url(url: str) -> str:
+    """URL without fragment or tracking parameters, lower-cased host, https for TTG itself"""
+    parts = urlparse(url)
+    netloc = parts.netloc.lower()
+    scheme = "https" if netloc == urlparse(BASE_URL).netloc else parts.scheme.lower()
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                       if k.lower() not in TRACKING_PARAMS])
+    return urlunparse((scheme, netloc, parts.path or "/", parts.params, query, ""))
+
+def done_key(url: str) -> str:
+    """
+    Identity of a page for dedup and resume tracking. Posts, topic pages and
+    forum listing pages are keyed on their ID (plus /start= offset), whatever
+    slug the link carries; profile tabs (#wall etc.) keep their fragment since
+    each is a separate capture; anything else is its canonical URL.
+    """
+    m = CONTENT_ID_RE.search(url)
+    if m:
+        section, kind, num = m.group(1).capitalize(), m.group(2).lower(), m.group(3)
+        start = START_RE.search(url)
+        return f"{section}/{kind}={num}" + (f"/start={int(start.group(1))}" if start and kind in "tf" and int(start.group(1)) else "")
+    fragment = urlparse(url).fragment
+    return canonical_url(url) + (f"#{fragment}" if fragment in PROFILE_TABS else "")
+
+def dedupe_urls(urls) -> list[str]:
+    """Keep the first URL for each done_key, in order"""
+    seen = {}
+    for url in urls:
+        seen.setdefault(done_key(url), url)
+    return list(seen.values())
+
 def normalize_url(href: str, current_url: str) -> str:
-    return urljoin(current_url, href)
+    return canonical_url(urljoin(current_url, href))
 
 def extract_all_links(html: str, current_url: str) -> set[str]:
-    soup = BeautifulSoup(html, "html.parser")
+    soup = make_soup(html)
     links = set()
     for a in soup.select("a[href]"):
         href = a.get("href", "")
@@ -82,13 +243,15 @@ def extract_all_links(html: str, current_url: str) -> set[str]:
         url = normalize_url(href, current_url)
         if is_same_site(url):
             links.add(url)
-    return links
+    return set(dedupe_urls(sorted(links)))
 
 def classify_content_url(url: str) -> str | None:
     if "/Forums/p=" in url or "/Archives/p=" in url:
         return "post"
     if "/Forums/t=" in url or "/Archives/t=" in url:
         return "topic"
+    if "/Forums/f=" in url or "/Archives/f=" in url:
+        return "forum"
     return None
 
 def looks_like_search_page(url: str, root_search_url: str) -> bool:
@@ -108,7 +271,7 @@ def extract_topic_pages(html: str, base_url: str) -> list[str]:
     1. Find the highest page number mentioned
     2. Generate sequential URLs for all pages
     """
-    soup = BeautifulSoup(html, "html.parser")
+    soup = make_soup(html)
     pages = [base_url]
     
     # Look for pagination indicators to find the total number of pages
@@ -167,14 +330,7 @@ async def looks_like_cloudflare(page) -> bool:
         return False
     if "forums" in url or "archives" in url:
         return False
-    strong_indicators = [
-        "verifying you are human",
-        "verify you are human",
-        "checking your browser before accessing",
-        "just a moment",
-        "cf-browser-verification",
-    ]
-    return any(indicator in content or indicator in title for indicator in strong_indicators)
+    return any(indicator in content or indicator in title for indicator in CLOUDFLARE_MARKERS)
 
 async def wait_for_cloudflare_resolution(page, max_wait_seconds: int = 300):
     log("Waiting for Cloudflare challenge to resolve...")
@@ -189,15 +345,51 @@ async def wait_for_cloudflare_resolution(page, max_wait_seconds: int = 300):
             return True
     return False
 
-async def handle_cloudflare_challenge(page):
+async def handle_cloudflare_challenge(page) -> bool:
     log("Cloudflare challenge detected - waiting for resolution...")
     resolved = await wait_for_cloudflare_resolution(page, max_wait_seconds=300)
     if not resolved:
         log("Cloudflare not resolved automatically - manual intervention may be needed")
     else:
         log("Continuing with archival...")
+    return resolved
+
+def backoff_delay(attempt: int, base: float = RETRY_BASE_DELAY_SEC) -> float:
+    """Exponential backoff with jitter: base * 2^(attempt-1), capped, scaled by 0.5-1.5"""
+    return min(RETRY_MAX_DELAY_SEC, base * 2 ** (attempt - 1)) * (0.5 + random.random())
+
+def is_failed_status(status: int) -> bool:
+    """True for HTTP statuses that fail a load (RETRY_HTTP_STATUSES and 5xx)"""
+    return status in RETRY_HTTP_STATUSES or status >= 500
 
-async def safe_goto(page, url: str, attempts: int = 3) -> bool:
+def classify_goto_error(message: str) -> str:
+    msg = message.lower()
+    if "timeout" in msg:
+        return "timeout"
+    if "closed" in msg or "target" in msg:
+        return "closed"
+    if "net::err" in msg:
+        return "network"
+    return "error"
+
+async def safe_goto(page, url: str, attempts: int = 3, timeout_ms: int = GOTO_TIMEOUT_MS) -> bool:
+    """
+    Load a page and wait for it to settle. On failure the reason is left in
+    goto_failure as {"kind": timeout|challenge|closed|network|http_NNN|error, "message"}.
+    """
+    if page_tracer is None:
+        return await goto_with_retries(page, url, attempts, timeout_ms)
+    started = time.time()
+    await page_tracer.begin()
+    ok = False
+    try:
+        ok = await goto_with_retries(page, url, attempts, timeout_ms)
+    finally:
+        await page_tracer.end(url, time.time() - started, None if ok else goto_failure.get())
+    return ok
+
+async def goto_with_retries(page, url: str, attempts: int, timeout_ms: int) -> bool:
+    goto_failure.set(None)
     if should_stop:
         return False
     last_error = None
@@ -208,66 +400,92 @@ async def safe_goto(page, url: str, attempts: int = 3) -> bool:
             # Check if page is still open
             if page.is_closed():
                 log("Page was closed, cannot navigate")
+                goto_failure.set({"kind": "closed", "message": "page was closed"})
                 return False
             
             # Use domcontentloaded (faster) instead of networkidle (too slow)
-            response = await page.goto(url, wait_until="domcontentloaded", timeout=GOTO_TIMEOUT_MS)
+            response = await page.goto(url, wait_until="domcontentloaded", timeout=timeout_ms)
             
-            # Wait a bit for dynamic content to load
-            await page.wait_for_timeout(3000)
+            # Blocks, rate limiting and server errors are worth another try; other statuses are saved as-is
+            if response is not None and is_failed_status(response.status):
+                raise RuntimeError(f"HTTP {response.status}")
             
-            # Wait for images to load with a reasonable timeout
-            try:
-                await page.evaluate("""
-                    () => {
-                        const timeout = 10000; // 10 second max wait for images
-                        const start = Date.now();
-                        return Promise.all(
-                            Array.from(document.images)
-                                .filter(img => !img.complete)
-                                .map(img => new Promise(resolve => {
-                                    const check = () => {
-                                        if (img.complete || Date.now() - start > timeout) {
-                                            resolve();
-                                        } else {
-                                            setTimeout(check, 100);
-                                        }
-                                    };
-                                    img.onload = img.onerror = resolve;
-                                    check();
-                                }))
-                        );
-                    }
-                """)
-                log("Images loaded")
-            except Exception as e:
-                # Don't worry if this fails - we'll still take the screenshot
-                pass
+            # Wait a bit for dynamic content to load
+            await page.wait_for_timeout(tuned("load_wait_ms"))
             
-            # Small final wait for any lazy-loaded content
-            await page.wait_for_timeout(1000)
+            incomplete = await wait_for_images(page)
             
             if await looks_like_cloudflare(page):
-                await handle_cloudflare_challenge(page)
+                if tuner:
+                    tuner.record("challenge")
+                if not await handle_cloudflare_challenge(page):
+                    goto_failure.set({"kind": "challenge", "message": "Cloudflare challenge not resolved"})
+                    return False
+            elif tuner:
+                tuner.record("incomplete" if incomplete else "ok")
             return True
             
         except Exception as e:
             error_msg = str(e)
+            m = re.match(r"HTTP (\d+)$", error_msg)
+            failure = {"kind": f"http_{m.group(1)}" if m else classify_goto_error(error_msg),
+                       "message": error_msg.splitlines()[0] if error_msg else type(e).__name__}
+            goto_failure.set(failure)
             
             # Check for browser/page closure errors
-            if "closed" in error_msg.lower() or "target" in error_msg.lower():
+            if failure["kind"] == "closed":
                 log(f"Browser or page was closed - cannot continue")
                 return False
+            if tuner:
+                # A 403 is Cloudflare turning us away: slow down as for a challenge
+                tuner.record("challenge" if failure["kind"] == "http_403" else "error")
             
             last_error = e
             log(f"Navigation error (attempt {attempt}/{attempts}): {error_msg}")
             
             if attempt < attempts:
-                await asyncio.sleep(5)  # Use asyncio.sleep instead of page.wait_for_timeout
+                await asyncio.sleep(backoff_delay(attempt, INLINE_RETRY_DELAY_SEC))
     
     log(f"Failed to load after {attempts} attempts: {url}")
     return False
 
+async def wait_for_images(page) -> int:
+    """Wait (up to 10s) for the page's images; returns how many were still loading when it gave up"""
+    incomplete = 0
+    try:
+        incomplete = await page.evaluate("""
+            () => {
+                const timeout = 10000; // 10 second max wait for images
+                const start = Date.now();
+                return Promise.all(
+                    Array.from(document.images)
+                        .filter(img => !img.complete)
+                        .map(img => new Promise(resolve => {
+                            const check = () => {
+                                if (img.complete || Date.now() - start > timeout) {
+                                    resolve();
+                                } else {
+                                    setTimeout(check, 100);
+                                }
+                            };
+                            img.onload = img.onerror = resolve;
+                            check();
+                        }))
+                ).then(() => Array.from(document.images).filter(img => !img.complete).length);
+            }
+        """) or 0
+        if incomplete:
+            log(f"Images loaded ({incomplete} still loading)")
+        else:
+            log("Images loaded")
+    except Exception as e:
+        # Don't worry if this fails - we'll still take the screenshot
+        pass
+    
+    # Small final wait for any lazy-loaded content
+    await page.wait_for_timeout(tuned("settle_ms"))
+    return incomplete
+
 async def expand_click_to_view_content(page):
     locs = [
         page.locator("text=Click to View Content"),
@@ -289,7 +507,9 @@ async def expand_click_to_view_content(page):
         if not clicked:
             break
 
-async def save_page(page, out_dir, group: str, kind: str, idx: int):
+async def save_page(page, out_dir, group: str, kind: str, idx: int,
+                    with_screenshot: bool = True, with_html: bool = True, post_id: str = None):
+    """Screenshot and save a page; with post_id only that post is captured (whole page if it isn't found)"""
     if should_stop:
         return None
     try:
@@ -300,28 +520,87 @@ async def save_page(page, out_dir, group: str, kind: str, idx: int):
     slug = safe_filename(title)
     screen_dir = os.path.join(out_dir, "screenshots", group, kind)
     html_dir = os.path.join(out_dir, "html", group, kind)
-    os.makedirs(screen_dir, exist_ok=True)
-    os.makedirs(html_dir, exist_ok=True)
     
     base = f"{idx:05d}__{slug}"
     png_path = os.path.join(screen_dir, base + ".png")
     html_path = os.path.join(html_dir, base + ".html")
     
-    try:
-        await page.screenshot(path=png_path, full_page=True)
-    except Exception as e:
-        log(f"Screenshot failed: {e}")
+    fragment = None
+    if post_id:
+        try:
+            fragment = post_fragment(await page.content(), page.url, post_id)
+        except Exception as e:
+            log(f"Post lookup failed: {e}")
+        if fragment is None:
+            log(f"Post {post_id} not found on the page - saving the whole page")
     
-    try:
-        html = await page.content()
-        with open(html_path, "w", encoding="utf-8") as f:
-            f.write(html)
-    except Exception as e:
-        log(f"HTML save failed: {e}")
+    png_parts = None
+    if with_screenshot:
+        try:
+            if fragment:
+                try:
+                    post = await locate_post(page, fragment, post_id)
+                    if post is None:
+                        log(f"Post {post_id} not found in the rendered page, capturing the whole page")
+                    else:
+                        await save_file(png_path, await post.screenshot(timeout=POST_SCREENSHOT_TIMEOUT_MS))
+                        png_parts = [png_path]
+                except Exception as e:
+                    log(f"Post screenshot failed, capturing the whole page: {e}")
+            if png_parts is None:
+                png_parts = await capture_screenshot(page, png_path)
+        except Exception as e:
+            log(f"Screenshot failed: {e}")
     
-    return {"url": page.url, "title": title, "png": png_path, "html": html_path}
+    html = None
+    if with_html:
+        try:
+            html = fragment["html"] if fragment else await page.content()
+            await save_file(html_path, html)
+        except Exception as e:
+            log(f"HTML save failed: {e}")
+    
+    assets = []
+    if html and saved_assets is not None:
+        try:
+            await save_page_assets(page, out_dir, html, fetched=assets)
+        except Exception as e:
+            log(f"Saving page assets failed: {e}")
+    
+    rec = {"url": page.url, "title": title,
+           "png": png_path if with_screenshot else None,
+           "html": html_path if with_html else None}
+    if assets:
+        rec["assets"] = assets
+    if fragment:
+        rec["post_id"] = post_id
+    if png_parts and png_parts != [png_path]:
+        rec["png"] = png_parts[0]
+        rec["png_parts"] = png_parts
+        if not STITCH_TILES:
+            rec["png_manifest"] = png_path[:-4] + ".tiles.json"
+    
+    # Hooks read the saved files, so with a background writer they run once the writes land
+    if disk_writer:
+        disk_writer.defer(run_page_saved_hooks, out_dir, rec)
+    else:
+        run_page_saved_hooks(out_dir, rec)
+    return rec
 
-async def collect_search_pages(page, root_search_url: str) -> list[str]:
+def run_page_saved_hooks(out_dir: str, rec: dict):
+    for hook in list(page_saved_hooks):
+        try:
+            hook(out_dir, rec)
+        except Exception as e:
+            log(f"Post-save step failed: {e}")
+
+async def collect_search_pages(page, root_search_url: str, content: dict = None, until: float = None) -> list[str]:
+    """
+    Crawl a search result's pagination. If `content` is given ({"posts": set(),
+    "topics": set()}) post/topic links are collected in the same pass, so the
+    pages don't need a second visit; `until` stops the crawl at that time
+    (the first page is always visited).
+    """
     if should_stop:
         return []
     log(f"Collecting pagination pages...")
@@ -329,6 +608,9 @@ async def collect_search_pages(page, root_search_url: str) -> list[str]:
     visited = set()
     
     while to_visit and len(visited) < MAX_SEARCH_PAGES_PER_GROUP and not should_stop:
+        if until and visited and time.time() >= until:
+            log("Discovery time budget used up - continuing with what was found")
+            break
         cur = to_visit.pop(0)
         if cur in visited:
             continue
@@ -344,8 +626,12 @@ async def collect_search_pages(page, root_search_url: str) -> list[str]:
         for u in links:
             if looks_like_search_page(u, root_search_url) and u not in visited:
                 to_visit.append(u)
+            elif content is not None:
+                k = classify_content_url(u)
+                if k in ("post", "topic"):
+                    content[k + "s"].add(u)
         
-        await asyncio.sleep(DELAY_SEC)
+        await asyncio.sleep(tuned("delay_sec"))
     
     log(f"Found {len(visited)} pagination pages")
     return sorted(visited)
@@ -373,10 +659,61 @@ async def collect_content_links(page, search_pages: list[str]) -> dict[str, list
             elif k == "topic":
                 topics.add(u)
         
-        await asyncio.sleep(DELAY_SEC)
+        await asyncio.sleep(tuned("delay_sec"))
     
+    posts, topics = dedupe_urls(sorted(posts)), dedupe_urls(sorted(topics))
     log(f"Found {len(posts)} posts and {len(topics)} topics")
-    return {"posts": sorted(posts), "topics": sorted(topics)}
+    return {"posts": posts, "topics": topics}
+
+def load_results(meta_dir: str, group: str, kind: str) -> list[dict]:
+    text = read_checkpoint(os.path.join(meta_dir, f"{group}__{kind}__results.json"))
+    if text:
+        try:
+            return json.loads(text)
+        except:
+            pass
+    return []
+
+def write_results(meta_dir: str, group: str, kind: str, results: list[dict]):
+    write_checkpoint(os.path.join(meta_dir, f"{group}__{kind}__results.json"), results)
+
+def load_done(meta_dir: str) -> set:
+    """Set of done_key()s already archived; done lists from older versions (plain URLs) are converted"""
+    text = read_checkpoint(os.path.join(meta_dir, "done_urls.json"))
+    if text:
+        try:
+            data = json.loads(text)
+        except:
+            return set()
+        done = data.get("done", [])
+        if data.get("version", 1) < 2:
+            keys = {done_key(url) for url in done}
+            log(f"Converted {len(done)} archived URLs to {len(keys)} page keys")
+            write_done(meta_dir, keys)
+            return keys
+        return set(done)
+    return set()
+
+def write_done(meta_dir: str, done: set):
+    write_checkpoint(os.path.join(meta_dir, "done_urls.json"), {"version": 2, "done": sorted(done)})
+
+def next_file_index(results: list[dict]) -> int:
+    """Next free NNNNN__ file number (records can be dropped by verify, so don't just count them)"""
+    idx = 0
+    for r in results:
+        m = re.match(r"(\d+)__", os.path.basename(r.get("html") or ""))
+        if m:
+            idx = max(idx, int(m.group(1)))
+    return idx + 1
+
+def append_result(out_dir: str, group: str, kind: str, rec: dict):
+    """Record a saved page in meta/<group>__<kind>__results.json"""
+    meta_dir = os.path.join(out_dir, "meta")
+    os.makedirs(meta_dir, exist_ok=True)
+    # Re-running the same custom URLs overwrites the same files, so replace their records
+    results = [r for r in load_results(meta_dir, group, kind) if r.get("html") != rec.get("html")]
+    results.append(rec)
+    write_results(meta_dir, group, kind, results)
 
 async def archive_url_list(page, done: set, out_dir: str, group: str, kind: str, urls: list[str], posts_only: bool = False):
     if should_stop:
@@ -385,314 +722,3495 @@ async def archive_url_list(page, done: set, out_dir: str, group: str, kind: str,
     meta_dir = os.path.join(out_dir, "meta")
     os.makedirs(meta_dir, exist_ok=True)
     
-    results_path = os.path.join(meta_dir, f"{group}__{kind}__results.json")
-    results = []
-    if os.path.exists(results_path):
-        try:
-            with open(results_path, "r", encoding="utf-8") as f:
-                results = json.load(f)
-        except:
-            results = []
+    results = load_results(meta_dir, group, kind)
+    # Pages a deadline run saved HTML-only get their screenshot from archive_html_only, not a second record
+    html_only = {done_key(url) for url in load_html_only(meta_dir)}
     
-    idx = len([r for r in results if "error" not in r]) + 1
     total = len(urls)
+    position = enumerate(urls, 1)
+    next_idx = [next_file_index(results)]
+    
+    def claim_index() -> int:
+        # Pages work in parallel, so file numbers are handed out before capture starts
+        next_idx[0] += 1
+        return next_idx[0] - 1
+    
+    async def worker(page, number: int):
+        while not should_stop:
+            # Extra pages stop when the tuner has lowered concurrency below them
+            if number >= tuned("concurrency"):
+                break
+            i, url = next(position, (None, None))
+            if url is None:
+                break
+            if done_key(url) in done or done_key(url) in html_only:
+                continue
+            
+            set_progress(i, total, f"Archiving {kind} {i}/{total}")
+            
+            # In posts_only mode, skip topic URLs
+            if posts_only and kind == "topics":
+                log(f"[{i}/{total}] Skipping topic (posts-only mode): {url}")
+                done.add(done_key(url))
+                continue
+            
+            log(f"[{i}/{total}] Archiving: {url}")
+            await capture_url(page, done, out_dir, group, kind, url, results, posts_only, claim_index())
+            
+            # Failed pages from this list whose backoff has run out get another go in between
+            for retry_url, entry in retry_queue.take_due(group, kind) if retry_queue else []:
+                if should_stop:
+                    break
+                log(f"Retrying (attempt {len(entry['attempts']) + 1}): {retry_url}")
+                await capture_url(page, done, out_dir, group, kind, retry_url, results, posts_only, claim_index())
+    
+    # Diagnostics traces one navigation at a time, so it keeps to a single page
+    pages = [page]
+    if page_tracer is None and len(urls) > 1:
+        for _ in range(int(tuned("concurrency")) - 1):
+            try:
+                pages.append(await page.context.new_page())
+            except Exception as e:
+                log(f"Could not open another page: {e}")
+                break
+    try:
+        await asyncio.gather(*(worker(p, n) for n, p in enumerate(pages)))
+    finally:
+        for extra in pages[1:]:
+            try:
+                await extra.close()
+            except Exception:
+                pass
+
+async def capture_url(page, done: set, out_dir: str, group: str, kind: str, url: str, results: list,
+                      posts_only: bool = False, idx: int = None) -> bool:
+    """
+    Load and save one page into results (just the targeted post for /p= URLs
+    in posts-only mode). With a retry queue running, a failed load is tried
+    once and handed to the queue; otherwise (or once the queue gives up on
+    it) an error record is kept.
+    """
+    meta_dir = os.path.join(out_dir, "meta")
+    if retry_queue:
+        ok = await safe_goto(page, url, attempts=1, timeout_ms=retry_queue.timeout_ms(url))
+    else:
+        ok = await safe_goto(page, url)
+    if not ok:
+        if should_stop:
+            return False
+        failure = goto_failure.get() or {"kind": "error", "message": "failed to load"}
+        if retry_queue and retry_queue.failed(url, group, kind, failure, posts_only):
+            return False
+        results.append({"url": url, "error": "failed to load", "error_kind": failure["kind"]})
+        write_results(meta_dir, group, kind, results)
+        return False
+    
+    await expand_click_to_view_content(page)
+    rec = await save_page(page, out_dir, group, kind, idx or next_file_index(results),
+                          post_id=post_id_from_url(url) if posts_only else None)
+    if rec:
+        if rec["url"] != url:
+            rec["requested_url"] = url
+        results.append(rec)
+    if retry_queue:
+        retry_queue.succeeded(url)
+    
+    done.add(done_key(url))
+    
+    # Save progress
+    write_done(meta_dir, done)
+    write_results(meta_dir, group, kind, results)
+    
+    await asyncio.sleep(tuned("delay_sec"))
+    return True
+
+async def show_profile_tab(page, name: str) -> bool:
+    """Switch the loaded profile page to one of its tabs (wall, friends, reputation)"""
+    try:
+        link = page.locator(f'a[href$="#{name}"]').first
+        if await link.count():
+            await link.click(timeout=5000)
+        else:
+            await page.evaluate("tab => { location.hash = tab; }", name)
+        await page.wait_for_timeout(tuned("load_wait_ms"))
+        await wait_for_images(page)
+        return True
+    except Exception as e:
+        log(f"Could not open the {name} tab: {e}")
+        return False
+
+async def archive_profile(page, done: set, out_dir: str, username: str):
+    """Capture the profile and each of its tabs from a single page load, saved under extra/<tab>"""
+    profile_url = f"{BASE_URL}{username}"
+    tabs = [("profile", profile_url)] + [(name, f"{profile_url}#{name}") for name in PROFILE_TABS]
+    todo = [(name, url) for name, url in tabs if done_key(url) not in done]
+    if should_stop or not todo:
+        return
+    
+    meta_dir = os.path.join(out_dir, "meta")
+    if not await safe_goto(page, profile_url):
+        log("Profile failed to load - it will be tried again on the next run")
+        return
     
-    for i, url in enumerate(urls, 1):
+    for name, url in todo:
         if should_stop:
             break
-        if url in done:
-            continue
-        
-        set_progress(i, total, f"Archiving {kind} {i}/{total}")
-        
-        # In posts_only mode, skip topic URLs
-        if posts_only and kind == "topics":
-            log(f"[{i}/{total}] Skipping topic (posts-only mode): {url}")
-            done.add(url)
-            continue
-        
-        log(f"[{i}/{total}] Archiving: {url}")
-        
-        ok = await safe_goto(page, url)
-        if not ok:
-            results.append({"url": url, "error": "failed to load"})
+        if name != "profile" and not await show_profile_tab(page, name):
             continue
-        
+        log(f"Archiving profile tab: {name}")
         await expand_click_to_view_content(page)
-        rec = await save_page(page, out_dir, group, kind, idx)
+        results = load_results(meta_dir, "extra", name)
+        rec = await save_page(page, out_dir, "extra", name, next_file_index(results))
         if rec:
+            if rec["url"] != url:
+                rec["requested_url"] = url
             results.append(rec)
-        
-        done.add(url)
-        
-        # Save progress
-        done_urls_path = os.path.join(meta_dir, "done_urls.json")
-        with open(done_urls_path, "w", encoding="utf-8") as f:
-            json.dump({"done": sorted(done)}, f, indent=2)
-        with open(results_path, "w", encoding="utf-8") as f:
-            json.dump(results, f, indent=2)
-        
-        idx += 1
-        await asyncio.sleep(DELAY_SEC)
+        done.add(done_key(url))
+        write_done(meta_dir, done)
+        write_results(meta_dir, "extra", name, results)
 
 # ============================================================================
-# USER ARCHIVER
+# RETRY QUEUE
 # ============================================================================
 
-async def run_user_archiver(username: str, output_dir: str, include_profile: bool, 
-                            topics_live: bool, topics_arch: bool, posts_live: bool, posts_arch: bool,
-                            posts_only_mode: bool, allow_login: bool):
-    global should_stop, waiting_for_continue
-    should_stop = False
-    waiting_for_continue = False
+# Failures that another attempt won't fix
+NON_RETRYABLE_FAILURES = {"closed"}
+RETRY_STATUS_RANK = {"failed": 0, "pending": 1, "done": 2}
+
+class RetryQueue:
+    """
+    Pages that failed to load, waiting for another attempt.
     
-    log(f"Starting user archival for: {username}")
-    log(f"Output directory: {output_dir}")
-    if posts_only_mode:
-        log("Posts-only mode: Will screenshot only user posts, not full topic pages")
+    Every attempt is recorded per page (done_key, with the URL last tried)
+    in meta/retry_state.json. A failed page is due again after an exponential
+    backoff with jitter and gets a longer load timeout each time; after
+    RETRY_MAX_ATTEMPTS in one run it is given up on. Pages still waiting when
+    a run ends are due straight away on the next one.
+    """
     
-    meta_dir = os.path.join(output_dir, "meta")
-    os.makedirs(meta_dir, exist_ok=True)
-    log.file_path = os.path.join(meta_dir, "runlog.txt")
+    def __init__(self, meta_dir: str):
+        self.path = os.path.join(meta_dir, "retry_state.json")
+        self.entries = {}
+        self.run_attempts = {}
+        text = read_checkpoint(self.path)
+        if text:
+            try:
+                data = json.loads(text)
+            except:
+                data = {}
+            if data and data.get("version", 1) < 2:
+                self.entries = self.convert_entries(data)
+                log(f"Converted {len(data)} retry entries to {len(self.entries)} page keys")
+                self.save()
+            else:
+                self.entries = data.get("entries", {})
+        for entry in self.entries.values():
+            if entry["status"] == "pending":
+                entry["due"] = 0
     
-    done_urls_path = os.path.join(meta_dir, "done_urls.json")
-    done = set()
-    if os.path.exists(done_urls_path):
-        try:
-            with open(done_urls_path, "r", encoding="utf-8") as f:
-                done = set(json.load(f).get("done", []))
-            log(f"Resuming - already archived {len(done)} URLs")
-        except:
-            pass
+    @staticmethod
+    def convert_entries(old: dict) -> dict:
+        """Entries keyed by raw URL (older versions) -> keyed by done_key, merging variants of one page"""
+        entries = {}
+        for url, entry in old.items():
+            key = done_key(url)
+            if key not in entries:
+                entries[key] = dict(entry, url=url, attempts=list(entry.get("attempts", [])))
+                continue
+            merged = entries[key]
+            merged["attempts"] = sorted(merged["attempts"] + entry.get("attempts", []), key=lambda a: a["time"])
+            # One variant archived means the page is; otherwise still waiting beats given up
+            merged["status"] = max(merged["status"], entry["status"], key=RETRY_STATUS_RANK.get)
+            merged["due"] = 0 if merged["status"] == "pending" else None
+        return entries
     
-    profile_urls = [
-        ("profile", f"https://www.thetechgame.com/{username}"),
-        ("wall", f"https://www.thetechgame.com/{username}#wall"),
-        ("friends", f"https://www.thetechgame.com/{username}#friends"),
-        ("reputation", f"https://www.thetechgame.com/{username}#reputation"),
-    ]
+    def save(self):
+        write_checkpoint(self.path, {"version": 2, "entries": self.entries})
     
-    search_urls = []
-    if topics_live:
-        search_urls.append(("topics_live", f"https://www.thetechgame.com/Forums/search/search_id=startedtopics/user={username}.html"))
-    if topics_arch:
-        search_urls.append(("topics_arch", f"https://www.thetechgame.com/Archives/search/search_id=startedtopics/user={username}.html"))
-    if posts_live:
-        search_urls.append(("posts_live", f"https://www.thetechgame.com/Forums/search/search_author={username}.html"))
-    if posts_arch:
-        search_urls.append(("posts_arch", f"https://www.thetechgame.com/Archives/search/search_author={username}.html"))
+    def timeout_ms(self, url: str) -> int:
+        return min(GOTO_TIMEOUT_MS, FIRST_GOTO_TIMEOUT_MS * 2 ** self.run_attempts.get(done_key(url), 0))
     
-    try:
-        async with async_playwright() as p:
-            log("Launching browser...")
-            context = await p.chromium.launch_persistent_context(
-                user_data_dir=os.path.join(output_dir, "browser_profile"),
-                headless=False,
-                slow_mo=SLOW_MO_MS,
-                viewport={"width": 1400, "height": 900},
-                args=['--disable-blink-features=AutomationControlled'],
-            )
-            
-            page = context.pages[0] if context.pages else await context.new_page()
-            
-            # Navigate to TTG first
-            log("Opening TheTechGame...")
-            await safe_goto(page, BASE_URL)
-            
-            # Now prompt for login if enabled
-            if allow_login:
-                log("\n=== LOGIN TIME ===")
-                log("Page is loaded - log in if needed, then click 'Ready to Continue'")
-                set_progress(0, 100, "Login if needed, then click 'Ready to Continue'")
-                
-                # Enable the continue button in GUI
-                if gui_enable_continue_callback:
-                    gui_enable_continue_callback()
-                
-                waiting_for_continue = True
-                while waiting_for_continue and not should_stop:
-                    await asyncio.sleep(0.5)
-                log("User ready - continuing...")
-            
-            if should_stop:
-                await context.close()
-                return
-            
-            if include_profile:
-                log("\n=== Archiving Profile ===")
-                for name, url in profile_urls:
-                    if should_stop:
-                        break
-                    await archive_url_list(page, done, output_dir, "extra", name, [url], posts_only_mode)
-            
-            for group_name, root_url in search_urls:
-                if should_stop:
-                    break
-                log(f"\n=== {group_name} ===")
-                search_pages = await collect_search_pages(page, root_url)
-                content = await collect_content_links(page, search_pages)
-                
-                is_posts_group = "posts_" in group_name
-                
-                if content['posts']:
-                    await archive_url_list(page, done, output_dir, group_name, "posts", 
-                                          content["posts"], posts_only_mode and is_posts_group)
-                
-                if content['topics'] and not (posts_only_mode and is_posts_group):
-                    await archive_url_list(page, done, output_dir, group_name, "topics", 
-                                          content["topics"], posts_only_mode)
-            
-            await context.close()
-            
+    def failed(self, url: str, group: str, kind: str, failure: dict, posts_only: bool = False) -> bool:
+        """Record a failed attempt; True if the page was queued for another one"""
+        key = done_key(url)
+        entry = self.entries.setdefault(key, {"group": group, "kind": kind, "attempts": []})
+        entry["url"], entry["posts_only"] = url, posts_only
+        entry["attempts"].append({"time": time.time(), "kind": failure["kind"], "message": failure["message"]})
+        attempts = self.run_attempts[key] = self.run_attempts.get(key, 0) + 1
+        if failure["kind"] in NON_RETRYABLE_FAILURES or attempts >= RETRY_MAX_ATTEMPTS:
+            entry["status"], entry["due"] = "failed", None
+            log(f"Giving up on {url} after {attempts} attempts ({failure['kind']})")
+            self.save()
+            return False
+        delay = backoff_delay(attempts)
+        entry["status"], entry["due"] = "pending", time.time() + delay
+        log(f"Failed ({failure['kind']}) - retrying in {delay:.0f}s: {url}")
+        self.save()
+        return True
+    
+    def succeeded(self, url: str):
+        entry = self.entries.get(done_key(url))
+        if entry:
+            entry["status"], entry["due"] = "done", None
+            self.save()
+    
+    def pending(self) -> list:
+        return [e["url"] for e in self.entries.values() if e["status"] == "pending"]
+    
+    def next_due(self) -> float | None:
+        times = [e["due"] for e in self.entries.values() if e["status"] == "pending" and e["due"] is not None]
+        return min(times) if times else None
+    
+    def take_due(self, group: str = None, kind: str = None) -> list:
+        """Pending pages whose backoff has passed, as (url, entry), marked as in progress"""
+        now = time.time()
+        due = sorted(((e["url"], e) for e in self.entries.values()
+                      if e["status"] == "pending" and e["due"] is not None and e["due"] <= now
+                      and group in (None, e["group"]) and kind in (None, e["kind"])),
+                     key=lambda item: item[1]["due"])
+        for url, entry in due:
+            entry["due"] = None
+        return due
+
+async def wait_for_retries(until: float = None) -> bool:
+    """Sleep until the next queued retry is due; False if there is none (before `until`) or stopped"""
+    while not should_stop and retry_queue:
+        due = retry_queue.next_due()
+        if due is None or (until is not None and due > until):
+            return False
+        if due <= time.time():
+            return True
+        await asyncio.sleep(min(1.0, due - time.time()))
+    return False
+
+async def drain_retry_queue(page, done: set, out_dir: str):
+    """Work through the retries still waiting once the main queue is finished"""
+    if not retry_queue or not retry_queue.pending():
+        return
+    log(f"\n=== Retrying {len(retry_queue.pending())} failed pages ===")
+    meta_dir = os.path.join(out_dir, "meta")
+    results = {}
+    while await wait_for_retries():
+        for url, entry in retry_queue.take_due():
             if should_stop:
-                log("\n=== Stopped by User ===")
-            else:
-                log("\n=== Complete! ===")
-                log(f"Archived: {len(done)} URLs")
-            
-    except Exception as e:
-        log(f"\nERROR: {str(e)}")
-        log(traceback.format_exc())
-        raise
+                break
+            key = (entry["group"], entry["kind"])
+            if key not in results:
+                results[key] = load_results(meta_dir, *key)
+            log(f"Retrying (attempt {len(entry['attempts']) + 1}): {url}")
+            await capture_url(page, done, out_dir, entry["group"], entry["kind"], url, results[key],
+                              entry.get("posts_only", False))
 
 # ============================================================================
-# CUSTOM URL ARCHIVER
+# THROUGHPUT TUNING
 # ============================================================================
 
-async def run_custom_url_archiver(urls: list[str], output_dir: str, mode: str, allow_login: bool):
-    global should_stop, waiting_for_continue
-    should_stop = False
-    waiting_for_continue = False
+def load_tuning(meta_dir: str) -> dict:
+    """Learned pace settings from meta/tuning.json, the TUNING_KNOBS start values where missing"""
+    settings = {name: knob[0] for name, knob in TUNING_KNOBS.items()}
+    text = read_checkpoint(os.path.join(meta_dir, "tuning.json"))
+    if text:
+        try:
+            saved = json.loads(text).get("settings", {})
+        except:
+            saved = {}
+        for name, (start, fastest, slowest) in TUNING_KNOBS.items():
+            if isinstance(saved.get(name), (int, float)):
+                settings[name] = min(max(saved[name], min(fastest, slowest)), max(fastest, slowest))
+    return settings
+
+def tuned(name: str):
+    """Current value of a pace setting (the start value when no tuner is running)"""
+    return tuner.settings[name] if tuner else TUNING_KNOBS[name][0]
+
+class ThroughputTuner:
+    """
+    Feedback control of the pace settings in TUNING_KNOBS.
     
-    log(f"Starting custom URL archival")
-    log(f"Mode: {mode}")
-    log(f"URLs to archive: {len(urls)}")
+    Additive speed-up, multiplicative back-off: after every TUNING_STREAK
+    cleanly loaded pages each wait comes down a step, and once the delay
+    between pages bottoms out another page is worked in parallel. A
+    Cloudflare challenge doubles the waits and drops to one page, a load
+    error raises them by half and halves the pages, and images still loading
+    lengthen only the load waits.
+    """
     
-    meta_dir = os.path.join(output_dir, "meta")
-    os.makedirs(meta_dir, exist_ok=True)
-    log.file_path = os.path.join(meta_dir, "runlog_custom.txt")
+    BACK_OFF = {"challenge": (2.0, ("slow_mo_ms", "load_wait_ms", "settle_ms", "delay_sec")),
+                "error": (1.5, ("slow_mo_ms", "load_wait_ms", "settle_ms", "delay_sec")),
+                "incomplete": (1.5, ("load_wait_ms", "settle_ms"))}
     
-    try:
-        async with async_playwright() as p:
-            log("Launching browser...")
-            context = await p.chromium.launch_persistent_context(
-                user_data_dir=os.path.join(output_dir, "browser_profile"),
-                headless=False,
-                slow_mo=SLOW_MO_MS,
-                viewport={"width": 1400, "height": 900},
-                args=['--disable-blink-features=AutomationControlled'],
-            )
-            
-            page = context.pages[0] if context.pages else await context.new_page()
-            
-            # Navigate to TTG first
-            log("Opening TheTechGame...")
-            await safe_goto(page, BASE_URL)
-            
-            # Now prompt for login if enabled
-            if allow_login:
-                log("\n=== LOGIN TIME ===")
-                log("Page is loaded - log in if needed, then click 'Ready to Continue'")
-                set_progress(0, 100, "Login if needed, then click 'Ready to Continue'")
-                
-                # Enable the continue button in GUI
-                if gui_enable_continue_callback:
-                    gui_enable_continue_callback()
-                
-                waiting_for_continue = True
-                while waiting_for_continue and not should_stop:
-                    await asyncio.sleep(0.5)
-                log("User ready - continuing...")
-            
-            if should_stop:
-                await context.close()
-                return
-            
-            total_saved = 0
-            
-            for url_idx, url in enumerate(urls, 1):
-                if should_stop:
-                    break
-                
-                # Check if page is still open
-                if page.is_closed():
-                    log("Browser was closed - stopping archival")
-                    break
-                
-                log(f"\n=== URL {url_idx}/{len(urls)}: {url} ===")
-                set_progress(url_idx, len(urls), f"Processing URL {url_idx}/{len(urls)}")
-                
-                if mode == "single_page":
-                    # Screenshot the full first page
-                    log("Mode: Single page (full)")
-                    ok = await safe_goto(page, url)
-                    if ok:
-                        await expand_click_to_view_content(page)
-                        await save_page(page, output_dir, "custom", "single_page", url_idx)
-                        total_saved += 1
-                
-                elif mode == "all_pages":
-                    # Get all pagination pages and screenshot each
-                    log("Mode: All pages")
-                    ok = await safe_goto(page, url)
-                    if ok:
-                        html = await page.content()
-                        all_pages = extract_topic_pages(html, url)
-                        log(f"Found {len(all_pages)} pages")
-                        
-                        for page_idx, page_url in enumerate(all_pages, 1):
-                            if should_stop or page.is_closed():
-                                break
-                            log(f"  Page {page_idx}/{len(all_pages)}: {page_url}")
-                            ok = await safe_goto(page, page_url)
-                            if ok:
-                                await expand_click_to_view_content(page)
-                                await save_page(page, output_dir, "custom", f"url{url_idx}_pages", 
-                                              (url_idx - 1) * 100 + page_idx)
-                                total_saved += 1
-                            await asyncio.sleep(DELAY_SEC)
-                
-                await asyncio.sleep(DELAY_SEC)
-            
-            if not page.is_closed():
-                await context.close()
-            
-            if should_stop:
-                log("\n=== Stopped by User ===")
-            else:
-                log("\n=== Complete! ===")
-                log(f"Total pages saved: {total_saved}")
-            
-    except Exception as e:
-        error_msg = str(e)
-        if "closed" in error_msg.lower():
-            log("\nBrowser was closed - archival stopped")
+    def __init__(self, meta_dir: str):
+        self.path = os.path.join(meta_dir, "tuning.json")
+        self.settings = load_tuning(meta_dir)
+        self.streak = 0
+    
+    def describe(self) -> str:
+        s = self.settings
+        return (f"delay {s['delay_sec']:.1f}s, load wait {s['load_wait_ms'] / 1000:.1f}s, "
+                f"settle {s['settle_ms'] / 1000:.1f}s, slow_mo {s['slow_mo_ms']:.0f}ms, "
+                f"{s['concurrency']:.0f} page(s) at once")
+    
+    def record(self, outcome: str):
+        """Feed back one page load: ok, incomplete, challenge or error"""
+        if outcome == "ok":
+            self.streak += 1
+            if self.streak >= TUNING_STREAK:
+                self.streak = 0
+                self.adjust("speed_up")
         else:
-            log(f"\nERROR: {error_msg}")
-            log(traceback.format_exc())
-        raise
+            self.streak = 0
+            self.adjust(outcome)
+    
+    def adjust(self, outcome: str):
+        old = dict(self.settings)
+        s = self.settings
+        if outcome == "speed_up":
+            for name in ("slow_mo_ms", "load_wait_ms", "settle_ms", "delay_sec"):
+                start, fastest, slowest = TUNING_KNOBS[name]
+                s[name] = max(fastest, s[name] - (slowest - fastest) / 20)
+            if old["delay_sec"] <= TUNING_KNOBS["delay_sec"][1]:
+                s["concurrency"] = min(TUNING_KNOBS["concurrency"][1], s["concurrency"] + 1)
+        else:
+            factor, names = self.BACK_OFF[outcome]
+            for name in names:
+                start, fastest, slowest = TUNING_KNOBS[name]
+                s[name] = min(slowest, max(s[name] * factor, s[name] + (slowest - fastest) / 20))
+            if outcome == "challenge":
+                s["concurrency"] = 1
+            elif outcome == "error":
+                s["concurrency"] = max(1, s["concurrency"] // 2)
+        for name in ("slow_mo_ms", "load_wait_ms", "settle_ms", "concurrency"):
+            s[name] = int(round(s[name]))
+        s["delay_sec"] = round(s["delay_sec"], 2)
+        if s != old:
+            log(("Speeding up: " if outcome == "speed_up" else f"Backing off ({outcome}): ") + self.describe())
+            write_checkpoint(self.path, {"settings": s, "updated": time.strftime("%Y-%m-%d %H:%M:%S")})
 
 # ============================================================================
-# GUI APPLICATION
+# BACKGROUND WRITER
 # ============================================================================
 
-class TTGArchiverGUI:
-    def __init__(self, root):
-        self.root = root
-        self.root.title("TTG Forum Archiver")
-        self.root.geometry("900x800")  # Increased from 850x750
-        self.root.resizable(True, True)
+class DiskWriter:
+    """
+    Moves file writes off the event loop that drives Chromium.
+    
+    Jobs go to a thread pool; write() only waits while WRITER_MAX_PENDING
+    writes are already queued, so a slow disk slows capture down instead of
+    piling up screenshots in memory. JSON progress files are coalesced: only
+    the newest content of each is written, after the page files queued
+    before it, and reads see the newest content even before it lands.
+    close() waits for everything and fsyncs the files written.
+    """
+    
+    def __init__(self, workers: int = WRITER_THREADS, max_pending: int = WRITER_MAX_PENDING):
+        self.pool = concurrent.futures.ThreadPoolExecutor(workers, thread_name_prefix="disk-writer")
+        self.slots = threading.Semaphore(max_pending)
+        self.lock = threading.Lock()
+        self.jobs = set()        # futures of every job not finished yet
+        self.writes = set()      # ... of those, the slot-holding ones later jobs wait for
+        self.written = set()
+        self.checkpoints = {}    # path -> (seq, newest text)
+        self.checkpoint_seq = 0
+        self.written_seq = {}
+        self.path_locks = collections.defaultdict(threading.Lock)
+        self.failures = 0
+    
+    def _start(self, fn, args, after=(), slot=False, outputs=()) -> concurrent.futures.Future:
+        future = concurrent.futures.Future()
+        
+        def run():
+            try:
+                result = fn(*args)
+                # Before set_result: that drops the job from self.jobs, after which close() may fsync
+                with self.lock:
+                    self.written.update(outputs)
+                future.set_result(result)
+            except Exception as e:
+                with self.lock:
+                    self.failures += 1
+                log(f"Background write failed: {e}")
+                future.set_exception(e)
+            finally:
+                if slot:
+                    self.slots.release()
+        
+        with self.lock:
+            self.jobs.add(future)
+            if slot:
+                self.writes.add(future)
+        future.add_done_callback(self._finished)
+        
+        waiting = [f for f in after if not f.done()]
+        if not waiting:
+            self.pool.submit(run)
+            return future
+        remaining = [len(waiting)]
+        def dependency_done(_):
+            with self.lock:
+                remaining[0] -= 1
+                ready = remaining[0] == 0
+            if ready:
+                self.pool.submit(run)
+        for f in waiting:
+            f.add_done_callback(dependency_done)
+        return future
+    
+    def _finished(self, future):
+        with self.lock:
+            self.jobs.discard(future)
+            self.writes.discard(future)
+    
+    async def _reserve(self):
+        while not self.slots.acquire(blocking=False):
+            await asyncio.sleep(0.02)
+    
+    def _queued_writes(self) -> list:
+        with self.lock:
+            return list(self.writes)
+    
+    async def write(self, path: str, data):
+        await self._reserve()
+        self._start(write_file, (path, data), slot=True, outputs=[path])
+    
+    async def run(self, fn, *args, outputs=()) -> concurrent.futures.Future:
+        """Queue fn to run once every write queued before it has finished"""
+        after = self._queued_writes()
+        await self._reserve()
+        return self._start(fn, args, after, slot=True, outputs=outputs)
+    
+    def defer(self, fn, *args):
+        """Like run() but never waits for a slot (small follow-up jobs such as the page-saved hooks)"""
+        self._start(fn, args, self._queued_writes())
+    
+    def checkpoint(self, path: str, text: str):
+        with self.lock:
+            self.checkpoint_seq += 1
+            self.checkpoints[path] = (self.checkpoint_seq, text)
+        self._start(self._write_checkpoint, (path,), self._queued_writes())
+    
+    def _write_checkpoint(self, path: str):
+        with self.lock:
+            path_lock = self.path_locks[path]
+        # One writer per file at a time, always taking the newest snapshot, so an older one never lands last
+        with path_lock:
+            with self.lock:
+                seq, text = self.checkpoints[path]
+            if seq <= self.written_seq.get(path, 0):
+                return  # an earlier job already wrote this or newer
+            tmp_path = path + ".tmp"
+            write_file(tmp_path, text)
+            os.replace(tmp_path, path)
+            self.written_seq[path] = seq
+            with self.lock:
+                self.written.add(path)
+    
+    def peek(self, path: str) -> str | None:
+        with self.lock:
+            entry = self.checkpoints.get(path)
+        return entry[1] if entry else None
+    
+    def close(self):
+        """Wait for every queued job, fsync the written files and stop the threads"""
+        while True:
+            with self.lock:
+                pending = list(self.jobs)
+            if not pending:
+                break
+            concurrent.futures.wait(pending)
+        self.pool.shutdown(wait=True)
+        for path in sorted(self.written):
+            fsync_file(path)
+        if self.failures:
+            log(f"{self.failures} files could not be written - run Verify Archive to find and redo them")
+
+def write_file(path: str, data):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if isinstance(data, bytes):
+        with open(path, "wb") as f:
+            f.write(data)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(data)
+
+def fsync_file(path: str):
+    try:
+        with open(path, "rb+") as f:
+            os.fsync(f.fileno())
+    except OSError:
+        pass
+
+async def save_file(path: str, data):
+    """Write a file through the background writer if one is running, else directly"""
+    if disk_writer:
+        await disk_writer.write(path, data)
+    else:
+        write_file(path, data)
+
+async def run_file_job(fn, *args, outputs=()) -> asyncio.Future:
+    """
+    Run fn(*args) after the writes queued so far (directly without a background
+    writer); the returned future completes once it has run
+    """
+    if disk_writer:
+        return asyncio.wrap_future(await disk_writer.run(fn, *args, outputs=outputs))
+    future = asyncio.get_running_loop().create_future()
+    future.set_result(fn(*args))
+    return future
+
+def write_checkpoint(path: str, data):
+    text = json.dumps(data, indent=2)
+    if disk_writer:
+        disk_writer.checkpoint(path, text)
+    else:
+        write_file(path, text)
+
+def read_checkpoint(path: str) -> str | None:
+    """Current content of a JSON progress file, including a write still queued in the background"""
+    text = disk_writer.peek(path) if disk_writer else None
+    if text is None and os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+        except OSError:
+            pass
+    return text
+
+def start_disk_writer():
+    global disk_writer
+    disk_writer = DiskWriter()
+
+async def stop_disk_writer():
+    """Flush and fsync everything the background writer still has queued"""
+    global disk_writer
+    writer, disk_writer = disk_writer, None
+    if writer:
+        await asyncio.get_running_loop().run_in_executor(None, writer.close)
+
+# ============================================================================
+# TILED CAPTURE
+# ============================================================================
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+def read_png_chunks(path: str):
+    """Yield (type, data) for each chunk of a PNG file, raising ValueError if it is malformed or truncated"""
+    with open(path, "rb") as f:
+        if f.read(8) != PNG_SIGNATURE:
+            raise ValueError("not a PNG file")
+        while True:
+            head = f.read(8)
+            if len(head) < 8:
+                raise ValueError("truncated PNG (no IEND chunk)")
+            length, ctype = struct.unpack(">I4s", head)
+            data = f.read(length)
+            crc = f.read(4)
+            if len(data) < length or len(crc) < 4:
+                raise ValueError("truncated PNG chunk")
+            if struct.unpack(">I", crc)[0] != zlib.crc32(ctype + data):
+                raise ValueError(f"bad CRC in {ctype.decode('latin-1')} chunk")
+            yield ctype, data
+            if ctype == b"IEND":
+                return
+
+def read_png_header(path: str) -> tuple:
+    """Return (width, height, bit_depth, color_type, interlace) from the IHDR chunk"""
+    for ctype, data in read_png_chunks(path):
+        if ctype == b"IHDR":
+            width, height, depth, color, _, _, interlace = struct.unpack(">IIBBBBB", data)
+            return width, height, depth, color, interlace
+        break
+    raise ValueError("PNG has no IHDR chunk")
+
+def png_chunk(ctype: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + ctype + data + struct.pack(">I", zlib.crc32(ctype + data))
+
+def unfilter_first_row(row: bytes, bpp: int) -> bytes:
+    """
+    Rebuild the first scanline of a tile as filter type 0 (None).
+    The first row of a PNG is filtered against an all-zero row above it, so
+    once tiles are stacked it would decode against the wrong row. Only that
+    row needs rewriting; every other row keeps its original filter.
+    """
+    ftype, data = row[0], bytearray(row[1:])
+    if ftype in (1, 4):        # Sub, and Paeth with a zero row above == Sub
+        for i in range(bpp, len(data)):
+            data[i] = (data[i] + data[i - bpp]) & 0xFF
+    elif ftype == 3:           # Average with a zero row above
+        for i in range(bpp, len(data)):
+            data[i] = (data[i] + (data[i - bpp] >> 1)) & 0xFF
+    # Up with a zero row above is already unfiltered
+    return b"\x00" + bytes(data)
+
+def stitch_png_tiles(tile_paths: list[str], out_path: str):
+    """
+    Stack same-width PNG tiles vertically into one PNG.
+    Scanlines are copied without re-encoding pixels and the output is
+    compressed as it is written, so only one decoded tile is held in memory.
+    """
+    headers = [read_png_header(p) for p in tile_paths]
+    width, _, depth, color, interlace = headers[0]
+    channels = {0: 1, 2: 3, 4: 2, 6: 4}.get(color)
+    if depth != 8 or channels is None or interlace:
+        raise ValueError("unsupported PNG format for stitching")
+    if any(h[0] != width or h[2:] != headers[0][2:] for h in headers):
+        raise ValueError("tiles have mismatched formats")
+    total_height = sum(h[1] for h in headers)
+    stride = width * channels + 1
+    
+    compressor = zlib.compressobj(6)
+    tmp_path = out_path + ".part"
+    with open(tmp_path, "wb") as out:
+        out.write(PNG_SIGNATURE)
+        out.write(png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, total_height, depth, color, 0, 0, 0)))
+        for path in tile_paths:
+            raw = zlib.decompress(b"".join(data for ctype, data in read_png_chunks(path) if ctype == b"IDAT"))
+            out_data = compressor.compress(unfilter_first_row(raw[:stride], channels) + raw[stride:])
+            del raw
+            if out_data:
+                out.write(png_chunk(b"IDAT", out_data))
+        out.write(png_chunk(b"IDAT", compressor.flush()))
+        out.write(png_chunk(b"IEND", b""))
+    os.replace(tmp_path, out_path)
+
+async def capture_screenshot(page, png_path: str) -> list[str]:
+    """Screenshot the page, switching to tiled capture for very tall pages; returns the image files written"""
+    height = await page.evaluate(
+        "() => Math.max(document.body ? document.body.scrollHeight : 0, document.documentElement.scrollHeight)")
+    if height <= TILED_CAPTURE_MIN_HEIGHT_PX:
+        await save_file(png_path, await page.screenshot(full_page=True))
+        return [png_path]
+    return await capture_tiled_screenshot(page, png_path, height)
+
+async def capture_tiled_screenshot(page, png_path: str, height: int) -> list[str]:
+    """
+    Capture a tall page as viewport-height clip tiles streamed to disk.
+    Tiles are grouped into parts no taller than MAX_IMAGE_HEIGHT_PX; each part
+    is stitched as soon as its tiles are captured and the tiles removed.
+    With STITCH_TILES off the tiles are kept and described in a manifest.
+    """
+    viewport = page.viewport_size or {"width": 1400, "height": 900}
+    width = await page.evaluate("() => document.documentElement.scrollWidth") or viewport["width"]
+    tile_height = viewport["height"]
+    base = png_path[:-4]
+    tiles_dir = base + ".tiles"
+    log(f"Tall page ({height}px) - capturing in {tile_height}px tiles")
+    
+    outputs, part_tiles, part_height, tiles = [], [], 0, []
+    
+    async def flush_part():
+        if not part_tiles:
+            return
+        part_path = f"{base}__part{len(outputs) + 1:02d}.png"
+        # Runs after the tile writes queued before it
+        await run_file_job(stitch_tile_part, [t["file"] for t in part_tiles], part_path, outputs=[part_path])
+        outputs.append(part_path)
+    
+    for n, y in enumerate(range(0, height, tile_height)):
+        if should_stop:
+            break
+        h = min(tile_height, height - y)
+        tile_path = os.path.join(tiles_dir, f"tile_{n:04d}.png")
+        await save_file(tile_path, await page.screenshot(full_page=True,
+                                                         clip={"x": 0, "y": y, "width": width, "height": h}))
+        tile = {"file": tile_path, "y": y, "height": h}
+        tiles.append(tile)
+        if not STITCH_TILES:
+            continue
+        if part_height + h > MAX_IMAGE_HEIGHT_PX:
+            await flush_part()
+            part_tiles, part_height = [], 0
+        part_tiles.append(tile)
+        part_height += h
+    
+    if not STITCH_TILES:
+        manifest = {"url": page.url, "width": width, "height": height,
+                    "max_image_height": MAX_IMAGE_HEIGHT_PX, "tiles": tiles}
+        await save_file(base + ".tiles.json", json.dumps(manifest, indent=2))
+        return [t["file"] for t in tiles]
+    
+    await flush_part()
+    if len(outputs) == 1:
+        await run_file_job(finish_tiles, tiles_dir, outputs[0], png_path, outputs=[png_path])
+        return [png_path]
+    await run_file_job(finish_tiles, tiles_dir, None, None)
+    return outputs
+
+def stitch_tile_part(tile_files: list[str], part_path: str):
+    stitch_png_tiles(tile_files, part_path)
+    for f in tile_files:
+        os.remove(f)
+
+def finish_tiles(tiles_dir: str, single_part: str | None, png_path: str | None):
+    shutil.rmtree(tiles_dir, ignore_errors=True)
+    if single_part:
+        os.replace(single_part, png_path)
+
+# ============================================================================
+# SHARD PACKAGING
+# ============================================================================
+
+def record_files(rec: dict) -> list[str]:
+    """All files written for one results record"""
+    files = [rec["html"]] if rec.get("html") else []
+    files += rec.get("png_parts") or ([rec["png"]] if rec.get("png") else [])
+    if rec.get("png_manifest"):
+        files.append(rec["png_manifest"])
+    return files + rec.get("assets", [])
+
+class ShardWriter:
+    """
+    Streams files into size-rolled archive shards with an offset index.
+    
+    Tar shards are written one member at a time; for tar.gz / tar.zst every
+    member is its own gzip member / zstd frame, so the shard is still a normal
+    compressed tarball but a single file can be read back by seeking to its
+    offset (see read_packed_file). Each shard gets a <shard>.index.jsonl
+    sidecar that is appended as files are added, so a crash loses nothing.
+    """
+    
+    FORMATS = {"tar": ".tar", "tar.gz": ".tar.gz", "tar.zst": ".tar.zst", "zip": ".zip"}
+    
+    def __init__(self, shard_dir: str, prefix: str, fmt: str = PACKAGE_FORMAT, max_bytes: int = SHARD_MAX_BYTES):
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unknown package format: {fmt}")
+        if fmt == "tar.zst":
+            import zstandard    # optional dependency, only needed for tar.zst
+            self._zstd = zstandard.ZstdCompressor()
+        self.shard_dir = shard_dir
+        self.prefix = prefix
+        self.fmt = fmt
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.shard_path = None
+        self._file = None
+        self._zip = None
+        self._index = None
+        os.makedirs(shard_dir, exist_ok=True)
+        # Never append to shards from an earlier run - carry on numbering instead
+        self.number = 0
+        for name in os.listdir(shard_dir):
+            m = re.match(re.escape(prefix) + r"-(\d+)\.", name)
+            if m:
+                self.number = max(self.number, int(m.group(1)))
+    
+    def _open_shard(self):
+        self.number += 1
+        self.shard_path = os.path.join(self.shard_dir, f"{self.prefix}-{self.number:04d}{self.FORMATS[self.fmt]}")
+        if self.fmt == "zip":
+            self._zip = zipfile.ZipFile(self.shard_path, "w", compression=zipfile.ZIP_DEFLATED)
+        else:
+            self._file = open(self.shard_path, "wb")
+        self._index = open(self.shard_path + ".index.jsonl", "w", encoding="utf-8")
+    
+    def _compress_member(self, chunks):
+        """Yield the bytes of one tar member, as its own gzip member / zstd frame when compressing"""
+        if self.fmt == "tar":
+            yield from chunks
+            return
+        if self.fmt == "tar.gz":
+            comp = zlib.compressobj(6, zlib.DEFLATED, 31)
+        else:
+            comp = self._zstd.compressobj()
+        for chunk in chunks:
+            out = comp.compress(chunk)
+            if out:
+                yield out
+        yield comp.flush()
+    
+    def add(self, path: str, arcname: str, extra: dict = None):
+        """Append one file to the current shard, rolling to a new shard once it is full"""
+        with self.lock:
+            if self._index is None:
+                self._open_shard()
+            size = os.path.getsize(path)
+            entry = {"name": arcname, "size": size}
+            
+            if self.fmt == "zip":
+                self._zip.write(path, arcname)
+                info = self._zip.getinfo(arcname)
+                entry.update(offset=info.header_offset, length=info.compress_size)
+                shard_size = self._zip.fp.tell()
+            else:
+                info = tarfile.TarInfo(arcname)
+                info.size = size
+                info.mtime = int(os.path.getmtime(path))
+                header = info.tobuf(tarfile.GNU_FORMAT, "utf-8", "surrogateescape")
+                
+                def member_chunks():
+                    yield header
+                    with open(path, "rb") as f:
+                        while True:
+                            chunk = f.read(1024 * 1024)
+                            if not chunk:
+                                break
+                            yield chunk
+                    yield b"\0" * (-size % tarfile.BLOCKSIZE)
+                
+                offset = self._file.tell()
+                for out in self._compress_member(member_chunks()):
+                    self._file.write(out)
+                entry.update(offset=offset, length=self._file.tell() - offset, data_offset=len(header))
+                shard_size = self._file.tell()
+            
+            if extra:
+                entry.update(extra)
+            self._index.write(json.dumps(entry) + "\n")
+            self._index.flush()
+            
+            if shard_size >= self.max_bytes:
+                self._close_shard()
+    
+    def add_record(self, out_dir: str, rec: dict):
+        """page_saved_hooks entry: pack every file of a freshly saved page"""
+        for path in record_files(rec):
+            if os.path.exists(path):
+                arcname = os.path.relpath(path, out_dir).replace(os.sep, "/")
+                self.add(path, arcname, {"url": rec.get("url")})
+    
+    def _close_shard(self):
+        if self._zip is not None:
+            self._zip.close()
+        elif self._file is not None:
+            # Tar end-of-archive marker
+            for out in self._compress_member([b"\0" * (tarfile.BLOCKSIZE * 2)]):
+                self._file.write(out)
+            self._file.close()
+        if self._index is not None:
+            self._index.close()
+        self._file = self._zip = self._index = None
+    
+    def close(self):
+        with self.lock:
+            self._close_shard()
+
+def load_shard_index(shard_path: str) -> list[dict]:
+    with open(shard_path + ".index.jsonl", "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def read_packed_file(shard_path: str, entry: dict) -> bytes:
+    """Read a single file back out of a shard using its index entry, without scanning the archive"""
+    with open(shard_path, "rb") as f:
+        f.seek(entry["offset"])
+        if shard_path.endswith(".zip"):
+            # Local file header: fixed 30 bytes, then name and extra field
+            header = f.read(30)
+            method, = struct.unpack("<H", header[8:10])
+            name_len, extra_len = struct.unpack("<HH", header[26:30])
+            f.seek(name_len + extra_len, os.SEEK_CUR)
+            blob = f.read(entry["length"])
+            return zlib.decompress(blob, -15) if method == zipfile.ZIP_DEFLATED else blob
+        blob = f.read(entry["length"])
+    if shard_path.endswith(".tar.gz"):
+        blob = zlib.decompress(blob, 31)
+    elif shard_path.endswith(".tar.zst"):
+        import zstandard
+        blob = zstandard.ZstdDecompressor().decompressobj().decompress(blob)
+    start = entry["data_offset"]
+    return blob[start:start + entry["size"]]
+
+def start_packaging(output_dir: str) -> ShardWriter:
+    """Stream every page saved during a run into <output>/shards/live-NNNN shards"""
+    packager = ShardWriter(os.path.join(output_dir, "shards"), "live")
+    page_saved_hooks.append(packager.add_record)
+    log(f"Packing saved pages into {PACKAGE_FORMAT} shards")
+    return packager
+
+def stop_packaging(packager: ShardWriter):
+    if packager.add_record in page_saved_hooks:
+        page_saved_hooks.remove(packager.add_record)
+    packager.close()
+
+def _package_tree_job(args) -> int:
+    """Worker for package_output_dir: pack one directory tree into its own shard series"""
+    src_dir, out_dir, shard_dir, prefix, fmt, max_bytes = args
+    writer = ShardWriter(shard_dir, prefix, fmt, max_bytes)
+    count = 0
+    stack = [src_dir]
+    try:
+        while stack:
+            with os.scandir(stack.pop()) as it:
+                entries = sorted(it, key=lambda e: e.name)
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    writer.add(entry.path, os.path.relpath(entry.path, out_dir).replace(os.sep, "/"))
+                    count += 1
+    finally:
+        writer.close()
+    return count
+
+def package_output_dir(out_dir: str, fmt: str = PACKAGE_FORMAT, workers: int = None,
+                       max_bytes: int = SHARD_MAX_BYTES) -> int:
+    """
+    Shard an existing output directory after the fact.
+    Every screenshots/<group>/<kind> and html/<group>/<kind> folder (plus
+    assets and meta) becomes its own shard series, packed in parallel worker
+    processes.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    shard_dir = os.path.join(out_dir, "shards")
+    jobs = []
+    for top in ("screenshots", "html"):
+        top_dir = os.path.join(out_dir, top)
+        if not os.path.isdir(top_dir):
+            continue
+        for group in sorted(os.listdir(top_dir)):
+            group_dir = os.path.join(top_dir, group)
+            if not os.path.isdir(group_dir):
+                continue
+            for kind in sorted(os.listdir(group_dir)):
+                kind_dir = os.path.join(group_dir, kind)
+                if os.path.isdir(kind_dir):
+                    jobs.append((kind_dir, out_dir, shard_dir, f"{top}__{group}__{kind}", fmt, max_bytes))
+    for top in ("assets", "meta"):
+        if os.path.isdir(os.path.join(out_dir, top)):
+            jobs.append((os.path.join(out_dir, top), out_dir, shard_dir, top, fmt, max_bytes))
+    
+    log(f"Packaging {len(jobs)} folders from {out_dir} as {fmt}...")
+    total = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for (src_dir, *_), count in zip(jobs, pool.map(_package_tree_job, jobs)):
+            log(f"  {os.path.relpath(src_dir, out_dir)}: {count} files")
+            total += count
+    log(f"Packed {total} files into {shard_dir}")
+    return total
+
+# ============================================================================
+# POST PARSING
+# ============================================================================
+
+# TTG marks post containers with ids like "p123456" / "post_123456"; the class
+# and link fallbacks cover the archive skin and older saved pages.
+POST_ID_ATTR_RE = re.compile(r"^(?:p|post|postid|post_id|msg)[-_]?(\d+)$", re.IGNORECASE)
+POST_LINK_RE = re.compile(r"/(?:Forums|Archives)/p=(\d+)")
+TOPIC_ID_RE = re.compile(r"/(?:Forums|Archives)/t=(\d+)")
+START_RE = re.compile(r"/start=(\d+)")
+AUTHOR_SELECTORS = [".username", ".author", ".postauthor", ".post-author", "[class*=author] a", "[class*=user] a"]
+DATE_SELECTORS = ["time[datetime]", ".postdate", ".post-date", "[class*=date]", "[class*=time]"]
+BODY_SELECTORS = [".postbody", ".post-body", ".post-content", ".content", "[class*=message]", "[class*=body]"]
+QUOTE_SELECTORS = ["blockquote", ".quote", ".quotebox", "[class*=quote]"]
+QUOTE_AUTHOR_RE = re.compile(r"^\s*(?:Quote from\s+|Originally Posted by\s+)?(.{1,40}?)\s+(?:wrote|said|posted)\s*:", re.IGNORECASE)
+DATE_FORMATS = ["%b %d %Y %I:%M %p", "%B %d %Y %I:%M %p", "%b %d %Y %H:%M", "%b %d %Y", "%B %d %Y",
+                "%m/%d/%Y %I:%M %p", "%m/%d/%Y %H:%M", "%m/%d/%Y", "%m/%d/%y %I:%M %p", "%m/%d/%y", "%m-%d-%Y",
+                "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"]
+DATE_TEXT_RE = re.compile(
+    r"\b(?:\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|\d{4}-\d{2}-\d{2}|"
+    r"(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.? \d{1,2},? \d{4})"
+    r"(?:,? (?:at )?\d{1,2}:\d{2}(?::\d{2})?\s*(?:[AaPp][Mm])?)?")
+
+def topic_id_from_url(url: str) -> str | None:
+    m = TOPIC_ID_RE.search(url or "")
+    return m.group(1) if m else None
+
+def post_id_from_url(url: str) -> str | None:
+    m = POST_LINK_RE.search(url or "")
+    return m.group(1) if m else None
+
+def find_post_containers(soup) -> list:
+    """Return [(post_id, element)] for every post on a topic page, in page order"""
+    found, seen = [], set()
+    for el in soup.find_all(id=POST_ID_ATTR_RE):
+        pid = POST_ID_ATTR_RE.match(el["id"]).group(1)
+        if pid not in seen:
+            seen.add(pid)
+            found.append((pid, el))
+    if found:
+        return found
+    for el in soup.select("[class*=post]"):
+        if el.find_parent(class_=re.compile("post")):
+            continue
+        link = el.find("a", href=POST_LINK_RE)
+        if link:
+            pid = POST_LINK_RE.search(link["href"]).group(1)
+            if pid not in seen:
+                seen.add(pid)
+                found.append((pid, el))
+    return found
+
+# find_post_containers' class/link fallback, run in the live page: the browser's
+# tree differs from html.parser's (it adds <tbody> and the like), so the element is
+# found there and tagged rather than addressed by a path through the parsed tree
+MARK_POST_JS = r"""
+(postId) => {
+    const linkRe = /\/(?:Forums|Archives)\/p=(\d+)/;
+    for (const el of document.querySelectorAll('[class*=post]')) {
+        if (el.parentElement && el.parentElement.closest('[class*=post]')) continue;
+        const link = Array.from(el.querySelectorAll('a[href]')).find(a => linkRe.test(a.getAttribute('href')));
+        if (link && link.getAttribute('href').match(linkRe)[1] === postId) {
+            el.setAttribute('data-archiver-post', postId);
+            return true;
+        }
+    }
+    return false;
+}
+"""
+
+async def locate_post(page, fragment: dict, post_id: str):
+    """Locator for the post post_fragment found, in the live page; None if the page doesn't have it"""
+    if fragment["selector"]:
+        return page.locator(fragment["selector"]).first
+    if await page.evaluate(MARK_POST_JS, post_id):
+        return page.locator(f'[data-archiver-post="{post_id}"]').first
+    return None
+
+def post_fragment(html: str, url: str, post_id: str) -> dict | None:
+    """
+    Cut one post out of a topic page: {"selector", "html"} where selector
+    finds the post by its id (None when it has none - see locate_post) and
+    html is a small standalone document holding the post, the topic heading
+    and the page's stylesheets; None if the post isn't on the page.
+    """
+    soup = make_soup(html)
+    el = next((el for pid, el in find_post_containers(soup) if pid == post_id), None)
+    if el is None:
+        return None
+    head = ['<meta charset="utf-8">', f"<title>{htmllib.escape(soup.title.get_text(strip=True) if soup.title else '')}</title>",
+            f'<base href="{htmllib.escape(url)}">']
+    head += [str(tag) for tag in soup.find_all(["link", "style"])
+             if tag.name == "style" or {"stylesheet", "canonical"} & set(tag.get("rel") or [])]
+    heading = soup.find("h1")
+    body = (str(heading) if heading else "") + str(el)
+    return {"selector": f'[id="{el["id"]}"]' if el.get("id") else None,
+            "html": f"<!DOCTYPE html>\n<html><head>{''.join(head)}</head><body>{body}</body></html>\n"}
+
+def _first_text(el, selectors: list[str]) -> str:
+    for sel in selectors:
+        hit = el.select_one(sel)
+        if hit:
+            text = hit.get("datetime") or hit.get_text(" ", strip=True)
+            if text:
+                return text
+    return ""
+
+def parse_timestamp(text: str) -> str | None:
+    """Best-effort ISO 8601 timestamp from a forum date string"""
+    import datetime
+    if not text:
+        return None
+    m = re.search(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}", text) or DATE_TEXT_RE.search(text)
+    if not m:
+        return None
+    value = m.group(0).replace(",", " ").replace(".", "").replace(" at ", " ")
+    value = re.sub(r"\s*([AaPp][Mm])$", lambda x: " " + x.group(1).upper(), re.sub(r"\s+", " ", value).strip())
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, fmt).isoformat()
+        except ValueError:
+            continue
+    return None
+
+def find_quote_refs(el) -> list[dict]:
+    """Posts quoted inside a post body: [{"post_id", "author"}] (either may be None)"""
+    refs, seen = [], set()
+    for sel in QUOTE_SELECTORS:
+        for quote in el.select(sel):
+            if id(quote) in seen or any(id(p) in seen for p in quote.parents):
+                continue
+            seen.add(id(quote))
+            link = quote.find("a", href=POST_LINK_RE)
+            cite = quote.find("cite") or quote.find(class_=re.compile("author|title|header"))
+            text = cite.get_text(" ", strip=True) if cite else quote.get_text(" ", strip=True)[:80]
+            m = QUOTE_AUTHOR_RE.match(text)
+            author = m.group(1) if m else (cite.get_text(" ", strip=True).rstrip(":") if cite else None)
+            refs.append({"post_id": POST_LINK_RE.search(link["href"]).group(1) if link else None,
+                         "author": author or None})
+    return refs
+
+def parse_post_element(el) -> dict:
+    author = _first_text(el, AUTHOR_SELECTORS)
+    if not author:
+        # Profile links are https://www.thetechgame.com/<username>
+        for a in el.find_all("a", href=True):
+            path = urlparse(urljoin(BASE_URL, a["href"])).path.strip("/")
+            if path and "/" not in path and "=" not in path and "." not in path:
+                author = a.get_text(strip=True) or path
+                break
+    date = _first_text(el, DATE_SELECTORS)
+    if not DATE_TEXT_RE.search(date or ""):
+        m = DATE_TEXT_RE.search(el.get_text(" ", strip=True))
+        date = m.group(0) if m else date
+    body = None
+    for sel in BODY_SELECTORS:
+        body = el.select_one(sel)
+        if body:
+            break
+    body = body or el
+    return {"author": author, "date": date, "body_html": str(body), "body_text": body.get_text(" ", strip=True),
+            "quotes": find_quote_refs(body)}
+
+def parse_page_posts(html: str, url: str) -> dict:
+    """
+    Parse a saved topic/post page into {"title", "topic_id", "posts": [...]}.
+    Pages without recognisable post markup come back as a single post
+    holding the whole page text, so they are still searchable.
+    """
+    soup = make_soup(html)
+    heading = soup.find("h1")
+    title = heading.get_text(" ", strip=True) if heading else (soup.title.get_text(strip=True) if soup.title else "")
+    posts = []
+    for pid, el in find_post_containers(soup):
+        post = parse_post_element(el)
+        post["post_id"] = pid
+        posts.append(post)
+    if not posts:
+        body = soup.body or soup
+        posts.append({"post_id": post_id_from_url(url), "author": "", "date": "",
+                      "body_html": "", "body_text": body.get_text(" ", strip=True), "quotes": []})
+    topic_id = topic_id_from_url(url)
+    if topic_id is None:
+        # /p= pages land on the topic page; take the topic from its canonical or first topic link
+        link = soup.find("link", rel="canonical", href=TOPIC_ID_RE) or soup.find("a", href=TOPIC_ID_RE)
+        topic_id = topic_id_from_url(link["href"]) if link else None
+    return {"title": title, "topic_id": topic_id, "posts": posts}
+
+def load_all_results(out_dir: str) -> list[dict]:
+    """Every successful record from meta/*__results.json, tagged with its group and kind"""
+    meta_dir = os.path.join(out_dir, "meta")
+    records = []
+    if not os.path.isdir(meta_dir):
+        return records
+    for name in sorted(os.listdir(meta_dir)):
+        if not name.endswith("__results.json"):
+            continue
+        group, kind = (name[:-len("__results.json")].split("__") + [""])[:2]
+        try:
+            with open(os.path.join(meta_dir, name), "r", encoding="utf-8") as f:
+                results = json.load(f)
+        except:
+            continue
+        for rec in results:
+            if "error" not in rec:
+                records.append(dict(rec, group=group, kind=kind))
+    return records
+
+def archive_path(out_dir: str, path: str) -> str:
+    """Resolve a path from the results metadata, even if the archive folder has moved"""
+    if path and not os.path.exists(path):
+        for top in ("html", "screenshots"):
+            marker = os.sep + top + os.sep
+            norm = os.path.normpath(path)
+            if marker in norm:
+                return os.path.join(out_dir, top, norm.split(marker, 1)[1])
+    return path
+
+# ============================================================================
+# SEARCH INDEX
+# ============================================================================
+
+class SearchIndex:
+    """
+    SQLite FTS5 index of archived posts, stored in meta/search_index.sqlite.
+    Pages are keyed by their HTML path (relative to the output folder) and
+    re-indexed only when the file's mtime changes.
+    """
+    
+    def __init__(self, out_dir: str):
+        self.out_dir = out_dir
+        self.lock = threading.Lock()
+        os.makedirs(os.path.join(out_dir, "meta"), exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(out_dir, "meta", SEARCH_INDEX_FILE), check_same_thread=False)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                html TEXT PRIMARY KEY, mtime REAL, url TEXT, png TEXT, title TEXT
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS posts USING fts5(
+                body, author, date, title,
+                url UNINDEXED, html UNINDEXED, png UNINDEXED, post_id UNINDEXED,
+                tokenize = 'porter unicode61'
+            );
+        """)
+    
+    def _rel(self, path: str) -> str:
+        return os.path.relpath(path, self.out_dir).replace(os.sep, "/") if path else ""
+    
+    def is_current(self, html_path: str) -> bool:
+        row = self.db.execute("SELECT mtime FROM pages WHERE html = ?", (self._rel(html_path),)).fetchone()
+        return row is not None and row[0] == os.path.getmtime(html_path)
+    
+    def store(self, html_path: str, url: str, png_path: str, parsed: dict, commit: bool = True):
+        html_rel, png_rel = self._rel(html_path), self._rel(png_path)
+        with self.lock:
+            self.db.execute("DELETE FROM posts WHERE html = ?", (html_rel,))
+            self.db.executemany(
+                "INSERT INTO posts (body, author, date, title, url, html, png, post_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(p["body_text"], p["author"], p["date"], parsed["title"], url, html_rel, png_rel, p["post_id"])
+                 for p in parsed["posts"]])
+            self.db.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)",
+                            (html_rel, os.path.getmtime(html_path), url, png_rel, parsed["title"]))
+            if commit:
+                self.db.commit()
+    
+    def add_record(self, out_dir: str, rec: dict):
+        """page_saved_hooks entry: index a freshly saved page"""
+        html_path = rec.get("html")
+        if not html_path or not os.path.exists(html_path):
+            return
+        with open(html_path, "r", encoding="utf-8", errors="replace") as f:
+            parsed = parse_page_posts(f.read(), rec.get("url", ""))
+        self.store(html_path, rec.get("url", ""), rec.get("png"), parsed)
+    
+    def search(self, query: str, limit: int = 20) -> list[dict]:
+        """Ranked hits (best first) with absolute paths to the matching HTML/PNG"""
+        with self.lock:
+            rows = self.db.execute("""
+                SELECT title, author, date, url, html, png, post_id,
+                       snippet(posts, 0, '[', ']', '...', 16), bm25(posts)
+                FROM posts WHERE posts MATCH ? ORDER BY bm25(posts) LIMIT ?
+            """, (query, limit)).fetchall()
+        return [{"title": r[0], "author": r[1], "date": r[2], "url": r[3],
+                 "html": os.path.join(self.out_dir, r[4]) if r[4] else "",
+                 "png": os.path.join(self.out_dir, r[5]) if r[5] else "",
+                 "post_id": r[6], "snippet": r[7], "score": -r[8]} for r in rows]
+    
+    def close(self):
+        with self.lock:
+            self.db.commit()
+            self.db.close()
+
+def _parse_for_index(args):
+    """Worker for build_search_index: parse one HTML file in a separate process"""
+    html_path, url = args
+    with open(html_path, "r", encoding="utf-8", errors="replace") as f:
+        return parse_page_posts(f.read(), url)
+
+def build_search_index(out_dir: str, workers: int = None) -> int:
+    """Index every saved HTML page of an existing archive, parsing in a worker pool"""
+    from concurrent.futures import ProcessPoolExecutor
+    index = SearchIndex(out_dir)
+    by_html = {}
+    for rec in load_all_results(out_dir):
+        html_path = archive_path(out_dir, rec.get("html"))
+        if html_path:
+            by_html[os.path.normcase(os.path.abspath(html_path))] = rec
+    
+    todo = []
+    for root, _, files in os.walk(os.path.join(out_dir, "html")):
+        for name in files:
+            if name.endswith(".html"):
+                path = os.path.join(root, name)
+                if not index.is_current(path):
+                    rec = by_html.get(os.path.normcase(os.path.abspath(path)), {})
+                    todo.append((path, rec.get("url", ""), archive_path(out_dir, rec.get("png"))))
+    
+    log(f"Indexing {len(todo)} new or changed pages...")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for n, ((path, url, png), parsed) in enumerate(
+                zip(todo, pool.map(_parse_for_index, [(p, u) for p, u, _ in todo], chunksize=16)), 1):
+            index.store(path, url, png, parsed, commit=False)
+            if n % 500 == 0:
+                index.db.commit()
+                log(f"  {n}/{len(todo)} pages indexed")
+    index.close()
+    log(f"Search index up to date ({len(todo)} pages updated)")
+    return len(todo)
+
+def start_search_indexing(output_dir: str) -> SearchIndex:
+    """Index every page saved during a run as soon as it is written"""
+    index = SearchIndex(output_dir)
+    page_saved_hooks.append(index.add_record)
+    log("Indexing saved pages for search")
+    return index
+
+def stop_search_indexing(index: SearchIndex):
+    if index.add_record in page_saved_hooks:
+        page_saved_hooks.remove(index.add_record)
+    index.close()
+
+# ============================================================================
+# OFFLINE MIRROR
+# ============================================================================
+
+MIRROR_TAG_RE = re.compile(r"<(?:a|img|link|area|source|script|iframe)\b[^>]*>", re.IGNORECASE)
+MIRROR_ATTR_RE = re.compile(r"""(\s(?:href|src)\s*=\s*)(?:"([^"]*)"|'([^']*)'|([^\s>"']+))""", re.IGNORECASE)
+MIRROR_STYLE_ATTR_RE = re.compile(r"""(\sstyle\s*=\s*)(["'])(.*?)\2""", re.IGNORECASE | re.DOTALL)
+MIRROR_STYLE_BLOCK_RE = re.compile(r"(<style\b[^>]*>)(.*?)(</style>)", re.IGNORECASE | re.DOTALL)
+MIRROR_CSS_URL_RE = re.compile(r"""url\(\s*(["']?)([^)"']+)\1\s*\)""", re.IGNORECASE)
+MIRROR_BASE_TAG_RE = re.compile(r"<base\b[^>]*>", re.IGNORECASE)
+MIRROR_ASSET_TAG_RE = re.compile(r"<(?:img|link|source|script)\b[^>]*>", re.IGNORECASE)
+MIRROR_LINK_REL_RE = re.compile(r"""\srel\s*=\s*["']?([^"'>]*)""", re.IGNORECASE)
+
+# With the mirror on, same-site images, stylesheets, scripts and icons are fetched
+# through the browser as pages are saved (once each, paced like page loads) into
+# <output>/assets, so the mirror still renders once the site is gone; each
+# page's record lists the assets it brought in. Fewer changed pages than
+# MIRROR_POOL_MIN_JOBS are rewritten in-process instead of starting a process pool
+ASSET_MAX_BYTES = 20 * 1024 * 1024
+MIRROR_POOL_MIN_JOBS = 200
+saved_assets = None  # asset files fetched (or tried) in this run; None when assets aren't captured
+
+def start_asset_capture():
+    global saved_assets
+    saved_assets = set()
+
+def stop_asset_capture():
+    global saved_assets
+    saved_assets = None
+
+def asset_relpath(url: str) -> str:
+    """Where a same-site asset is kept: assets/<site path>, so relative links inside stylesheets keep working"""
+    parts = urlparse(url)
+    segments = [safe_filename(s, 200) for s in parts.path.split("/") if s not in ("", ".", "..")] or ["index"]
+    if parts.query:
+        stem, ext = os.path.splitext(segments[-1])
+        segments[-1] = f"{stem}__{hashlib.sha1(parts.query.encode('utf-8')).hexdigest()[:10]}{ext}"
+    return "/".join(["assets"] + segments)
+
+def is_asset_tag(tag: str) -> bool:
+    """img/source/script tags, and link tags for stylesheets and icons"""
+    if not MIRROR_ASSET_TAG_RE.match(tag):
+        return False
+    if tag[1:5].lower() != "link":
+        return True
+    rel = MIRROR_LINK_REL_RE.search(tag)
+    return bool(rel) and ("stylesheet" in rel.group(1).lower() or "icon" in rel.group(1).lower())
+
+def page_asset_urls(html: str, page_url: str) -> list[str]:
+    """Same-site asset URLs a page (or stylesheet) refers to"""
+    urls = set()
+    
+    def add(raw: str):
+        raw = htmllib.unescape(raw).strip()
+        if not raw or raw.startswith(("#", "javascript:", "mailto:", "data:")):
+            return
+        absolute = urljoin(page_url, raw)
+        if is_same_site(absolute) and not classify_content_url(absolute):
+            urls.add(urlparse(absolute)._replace(fragment="").geturl())
+    
+    for tag in MIRROR_ASSET_TAG_RE.finditer(html):
+        if is_asset_tag(tag.group(0)):
+            for m in MIRROR_ATTR_RE.finditer(tag.group(0)):
+                add(next(v for v in m.groups()[1:] if v is not None))
+    for m in MIRROR_CSS_URL_RE.finditer(html):
+        add(m.group(2))
+    return sorted(urls)
+
+async def save_page_assets(page, out_dir: str, html: str, base_url: str = None, depth: int = 0,
+                           fetched: list = None):
+    """
+    Fetch the assets of a saved page that aren't in <output>/assets yet, with
+    the browser's cookies (so Cloudflare lets them through), waiting the tuned
+    delay before each request; stylesheets have the images and fonts they use
+    fetched too. Paths of the files written are appended to `fetched`.
+    """
+    for url in page_asset_urls(html, base_url or page.url):
+        path = os.path.join(out_dir, *asset_relpath(url).split("/"))
+        if path in saved_assets or os.path.exists(path) or should_stop:
+            continue
+        saved_assets.add(path)
+        await asyncio.sleep(tuned("delay_sec"))
+        try:
+            response = await page.context.request.get(url, timeout=30000)
+            body = await response.body() if response.ok else None
+        except Exception as e:
+            log(f"Could not fetch {url}: {e}")
+            continue
+        if not body or len(body) > ASSET_MAX_BYTES:
+            continue
+        await save_file(path, body)
+        if fetched is not None:
+            fetched.append(path)
+        if depth == 0 and path.endswith(".css"):
+            await save_page_assets(page, out_dir, body.decode("utf-8", errors="replace"), url, depth + 1, fetched)
+
+def mirror_url_key(url: str) -> str:
+    """Key used to match links against archived pages: done_key() for forum/topic/post pages, else scheme and fragment ignored"""
+    if CONTENT_ID_RE.search(url):
+        return done_key(url)
+    parts = urlparse(url)
+    key = parts.netloc.lower() + (parts.path.rstrip("/") or "/")
+    return key + ("?" + parts.query if parts.query else "")
+
+def build_mirror_map(out_dir: str) -> tuple[dict, dict]:
+    """Return ({url key: mirror-relative path}, {html source path: (url, mirror-relative path)})"""
+    url_map, sources = {}, {}
+    html_root = os.path.join(out_dir, "html")
+    for rec in load_all_results(out_dir):
+        html_path = archive_path(out_dir, rec.get("html"))
+        if not html_path or not os.path.exists(html_path) or not rec.get("url"):
+            continue
+        rel = os.path.relpath(html_path, html_root).replace(os.sep, "/")
+        for url in (rec["url"], rec.get("requested_url")):
+            if url:
+                url_map.setdefault(mirror_url_key(url), rel)
+        sources[html_path] = (rec["url"], rel)
+    return url_map, sources
+
+_mirror_url_map = {}
+_mirror_assets = frozenset()
+
+def _init_mirror_worker(url_map: dict, assets: set):
+    global _mirror_url_map, _mirror_assets
+    _mirror_url_map, _mirror_assets = url_map, assets
+
+def rewrite_page_links(html: str, page_url: str, page_rel: str, url_map: dict,
+                       assets: set = frozenset()) -> tuple[str, list[str]]:
+    """
+    Point links at archived pages and saved assets (mirror-relative paths, e.g.
+    "assets/images/logo.png") to their relative mirror path and make every
+    other relative URL absolute. Returns the new HTML and the keys of archive
+    links and assets that are not in the mirror yet (so the page can be redone later).
+    """
+    page_dir = os.path.dirname(page_rel)
+    unresolved = set()
+    
+    def resolve(raw: str, asset: bool = False) -> str:
+        raw = raw.strip()
+        if not raw or raw.startswith(("#", "javascript:", "mailto:", "data:")):
+            return raw
+        absolute = urljoin(page_url, raw)
+        if not is_same_site(absolute):
+            return absolute
+        key = mirror_url_key(absolute)
+        target = url_map.get(key)
+        if target:
+            frag = urlparse(absolute).fragment
+            return os.path.relpath(target, page_dir or ".").replace(os.sep, "/") + ("#" + frag if frag else "")
+        if classify_content_url(absolute):
+            unresolved.add(key)
+        elif asset:
+            rel = asset_relpath(absolute)
+            if rel in assets:
+                return os.path.relpath(rel, page_dir or ".").replace(os.sep, "/")
+            unresolved.add(rel)
+        return absolute
+    
+    def css(text: str) -> str:
+        return MIRROR_CSS_URL_RE.sub(lambda m: f'url("{resolve(m.group(2), True)}")', text)
+    
+    def attr(m, asset: bool):
+        value = next(v for v in m.groups()[1:] if v is not None)
+        return f'{m.group(1)}"{htmllib.escape(resolve(htmllib.unescape(value), asset), quote=True)}"'
+    
+    def tag(m):
+        asset = is_asset_tag(m.group(0))
+        return MIRROR_ATTR_RE.sub(lambda a: attr(a, asset), m.group(0))
+    
+    html = MIRROR_BASE_TAG_RE.sub("", html)
+    html = MIRROR_TAG_RE.sub(tag, html)
+    html = MIRROR_STYLE_BLOCK_RE.sub(lambda m: m.group(1) + css(m.group(2)) + m.group(3), html)
+    html = MIRROR_STYLE_ATTR_RE.sub(
+        lambda m: f'{m.group(1)}"{htmllib.escape(css(htmllib.unescape(m.group(3))), quote=True)}"', html)
+    return html, sorted(unresolved)
+
+def _render_mirror_page(args):
+    """Worker for update_mirror: rewrite one archived page into the mirror"""
+    src_path, page_url, page_rel, mirror_dir = args
+    with open(src_path, "r", encoding="utf-8", errors="replace") as f:
+        html, unresolved = rewrite_page_links(f.read(), page_url, page_rel, _mirror_url_map, _mirror_assets)
+    dest = os.path.join(mirror_dir, page_rel)
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    with open(dest, "w", encoding="utf-8") as f:
+        f.write(html)
+    return unresolved
+
+async def refresh_mirror(output_dir: str):
+    """Bring the offline mirror up to date with the pages archived so far"""
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, update_mirror, output_dir)
+    except Exception as e:
+        log(f"Mirror update failed: {e}")
+
+def copy_mirror_assets(out_dir: str, mirror_dir: str) -> frozenset:
+    """Copy new or changed files from <output>/assets into the mirror; returns every asset's mirror path"""
+    assets = set()
+    assets_dir = os.path.join(out_dir, "assets")
+    for root, _, files in os.walk(assets_dir):
+        for name in files:
+            src = os.path.join(root, name)
+            rel = os.path.relpath(src, out_dir).replace(os.sep, "/")
+            dest = os.path.join(mirror_dir, rel)
+            if not os.path.exists(dest) or os.path.getmtime(dest) != os.path.getmtime(src):
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                shutil.copy2(src, dest)
+            assets.add(rel)
+    return frozenset(assets)
+
+def write_mirror_index(mirror_dir: str, sources: dict):
+    rows = {}
+    for page_url, rel in sources.values():
+        rows.setdefault(os.path.dirname(rel), []).append((rel, page_url))
+    parts = ["<!DOCTYPE html><html><head><meta charset='utf-8'><title>TTG Archive</title></head><body>",
+             "<h1>TTG Archive</h1>"]
+    for folder in sorted(rows):
+        parts.append(f"<h2>{htmllib.escape(folder)}</h2><ul>")
+        for rel, page_url in sorted(rows[folder]):
+            parts.append(f"<li><a href=\"{htmllib.escape(rel, quote=True)}\">{htmllib.escape(os.path.basename(rel))}</a>"
+                         f" <small>{htmllib.escape(page_url)}</small></li>")
+        parts.append("</ul>")
+    parts.append("</body></html>")
+    with open(os.path.join(mirror_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write("\n".join(parts))
+
+def update_mirror(out_dir: str, workers: int = None) -> int:
+    """
+    Build or refresh <output>/mirror, a copy of the archived HTML and saved
+    assets with links rewritten so the archive can be browsed from disk.
+    Only pages whose source changed, or that link to pages or assets saved
+    since the last update, are rewritten (tracked in mirror/manifest.json).
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    mirror_dir = os.path.join(out_dir, "mirror")
+    manifest_path = os.path.join(mirror_dir, "manifest.json")
+    manifest = {"pages": {}}
+    if os.path.exists(manifest_path):
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except:
+            pass
+    
+    url_map, sources = build_mirror_map(out_dir)
+    assets = copy_mirror_assets(out_dir, mirror_dir)
+    known = set(url_map) | assets
+    jobs = []
+    for src_path, (page_url, rel) in sources.items():
+        state = manifest["pages"].get(rel)
+        mtime = os.path.getmtime(src_path)
+        if (state is None or state["mtime"] != mtime or state["url"] != page_url
+                or known.intersection(state["unresolved"])
+                or not os.path.exists(os.path.join(mirror_dir, rel))):
+            jobs.append((src_path, page_url, rel, mirror_dir))
+    
+    log(f"Mirror: rewriting {len(jobs)} of {len(sources)} pages...")
+    os.makedirs(mirror_dir, exist_ok=True)
+    
+    def record(results):
+        for (src_path, page_url, rel, _), unresolved in zip(jobs, results):
+            manifest["pages"][rel] = {"mtime": os.path.getmtime(src_path), "url": page_url, "unresolved": unresolved}
+    
+    if len(jobs) >= MIRROR_POOL_MIN_JOBS:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_mirror_worker, initargs=(url_map, assets)) as pool:
+            record(pool.map(_render_mirror_page, jobs, chunksize=16))
+    elif jobs:
+        _init_mirror_worker(url_map, assets)
+        record(map(_render_mirror_page, jobs))
+    
+    write_mirror_index(mirror_dir, sources)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    log(f"Mirror ready: {os.path.join(mirror_dir, 'index.html')}")
+    return len(jobs)
+
+# ============================================================================
+# POST DATASET
+# ============================================================================
+
+POST_FIELDS = ["post_id", "topic_id", "author", "timestamp", "date_text", "page_start", "position",
+               "page_offset", "url", "html", "quote_post_ids", "quote_authors", "body_text", "body_html"]
+
+def _extract_page_posts(args) -> list[dict]:
+    """Worker for extract_posts_dataset: one saved page -> per-post records"""
+    html_path, html_rel, url = args
+    try:
+        with open(html_path, "r", encoding="utf-8", errors="replace") as f:
+            parsed = parse_page_posts(f.read(), url)
+    except Exception:
+        return []
+    m = START_RE.search(url or "")
+    start = int(m.group(1)) if m else (0 if "/t=" in (url or "") else None)
+    records = []
+    for position, post in enumerate(parsed["posts"]):
+        records.append({
+            "post_id": post["post_id"],
+            "topic_id": parsed["topic_id"],
+            "author": post["author"],
+            "timestamp": parse_timestamp(post["date"]),
+            "date_text": post["date"],
+            "page_start": start,
+            "position": position,
+            # Offset of the post within the whole topic (TTG pages are start=0, 10, 20...)
+            "page_offset": start + position if start is not None else None,
+            "url": url,
+            "html": html_rel,
+            "quote_post_ids": [q["post_id"] for q in post["quotes"] if q["post_id"]],
+            "quote_authors": [q["author"] for q in post["quotes"] if q["author"]],
+            "body_text": post["body_text"],
+            "body_html": post["body_html"],
+        })
+    return records
+
+# Posts are buffered and written to the columnar file this many at a time
+COLUMNAR_BATCH_ROWS = 10000
+POST_INT_FIELDS = {"page_start", "position", "page_offset"}
+POST_LIST_FIELDS = {"quote_post_ids", "quote_authors"}
+
+class ColumnarWriter:
+    """
+    Writes post rows in batches: a Parquet row group per batch when pyarrow is
+    installed, otherwise one line of gzipped column arrays per batch
+    (<base>.columns.jsonl.gz), so memory is bounded by one batch.
+    """
+    
+    def __init__(self, base_path: str):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            import gzip
+            self.path = base_path + ".columns.jsonl.gz"
+            self.parquet = None
+            self.file = gzip.open(self.path + ".part", "wt", encoding="utf-8")
+            return
+        self.pyarrow = pyarrow
+        self.path = base_path + ".parquet"
+        self.schema = pyarrow.schema([
+            (field, pyarrow.int64() if field in POST_INT_FIELDS
+             else pyarrow.list_(pyarrow.string()) if field in POST_LIST_FIELDS else pyarrow.string())
+            for field in POST_FIELDS])
+        self.parquet = pyarrow.parquet.ParquetWriter(self.path + ".part", self.schema, compression="zstd")
+    
+    def write(self, rows: list[dict]):
+        if not rows:
+            return
+        columns = {field: [r[field] for r in rows] for field in POST_FIELDS}
+        if self.parquet is None:
+            self.file.write(json.dumps(columns, ensure_ascii=False) + "\n")
+        else:
+            self.parquet.write_table(self.pyarrow.table(columns, schema=self.schema))
+    
+    def close(self) -> str:
+        (self.file if self.parquet is None else self.parquet).close()
+        os.replace(self.path + ".part", self.path)
+        return self.path
+
+def extract_posts_dataset(out_dir: str, workers: int = None) -> int:
+    """
+    Parse every saved topic/post page into per-post records.
+    Records stream to dataset/posts.jsonl as pages are parsed (in a process
+    pool); posts seen on several pages are kept once, from the earliest page.
+    The same rows go to a compact columnar file next to it, COLUMNAR_BATCH_ROWS
+    at a time, so only the set of post keys seen grows with the archive.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    dataset_dir = os.path.join(out_dir, "dataset")
+    os.makedirs(dataset_dir, exist_ok=True)
+    
+    jobs = []
+    for rec in load_all_results(out_dir):
+        html_path = archive_path(out_dir, rec.get("html"))
+        if html_path and os.path.exists(html_path) and classify_content_url(rec.get("url", "")) in ("post", "topic"):
+            jobs.append((html_path, os.path.relpath(html_path, out_dir).replace(os.sep, "/"), rec["url"]))
+    
+    # Topic pages first, in topic/page order, so a post is attributed to its real page
+    # rather than to a /p= link that happens to land on the same page
+    def order(job):
+        url = job[2]
+        m = START_RE.search(url)
+        return (classify_content_url(url) != "topic", topic_id_from_url(url) or "", int(m.group(1)) if m else 0)
+    jobs.sort(key=order)
+    
+    log(f"Extracting posts from {len(jobs)} pages...")
+    seen, batch = set(), []
+    jsonl_path = os.path.join(dataset_dir, "posts.jsonl")
+    columnar = ColumnarWriter(os.path.join(dataset_dir, "posts"))
+    with open(jsonl_path + ".part", "w", encoding="utf-8") as out, \
+            ProcessPoolExecutor(max_workers=workers) as pool:
+        for n, records in enumerate(pool.map(_extract_page_posts, jobs, chunksize=16), 1):
+            for r in records:
+                key = r["post_id"] or (r["url"], r["position"])
+                if key in seen:
+                    continue
+                seen.add(key)
+                out.write(json.dumps(r, ensure_ascii=False) + "\n")
+                batch.append(r)
+            if len(batch) >= COLUMNAR_BATCH_ROWS:
+                columnar.write(batch)
+                batch = []
+            if n % 500 == 0:
+                log(f"  {n}/{len(jobs)} pages, {len(seen)} posts")
+    columnar.write(batch)
+    os.replace(jsonl_path + ".part", jsonl_path)
+    columnar_path = columnar.close()
+    log(f"Extracted {len(seen)} unique posts -> {jsonl_path}, {columnar_path}")
+    return len(seen)
+
+# ============================================================================
+# INTEGRITY VERIFICATION
+# ============================================================================
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(1024 * 1024)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+def check_png(path: str, size: int, min_bytes: int = MIN_PNG_BYTES) -> str | None:
+    """Return a problem description, or None if the PNG is complete and decodes"""
+    if size < min_bytes:
+        return f"too small ({size} bytes)"
+    try:
+        decomp = zlib.decompressobj()
+        expected = produced = 0
+        for ctype, data in read_png_chunks(path):
+            if ctype == b"IHDR":
+                width, height, depth, color, _, _, interlace = struct.unpack(">IIBBBBB", data)
+                channels = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}.get(color, 4)
+                expected = 0 if interlace else height * (1 + (width * channels * depth + 7) // 8)
+            elif ctype == b"IDAT":
+                produced += len(decomp.decompress(data))
+        produced += len(decomp.flush())
+    except (ValueError, zlib.error, struct.error) as e:
+        return f"corrupt PNG: {e}"
+    if not decomp.eof or (expected and produced < expected):
+        return "truncated PNG image data"
+    return None
+
+CLOUDFLARE_PAGE_MARKERS = ["cf-browser-verification", "cf-challenge-running",
+                           'id="challenge-form"', "id='challenge-form'"]
+
+def check_html(path: str, size: int) -> str | None:
+    """Return a problem description, or None if the HTML looks like a complete TTG page"""
+    if size < MIN_HTML_BYTES:
+        return f"too small ({size} bytes)"
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        text = f.read()
+    lower = text.lower()
+    if "</html>" not in lower[-4096:]:
+        return "truncated HTML (no closing </html>)"
+    m = re.search(r"<title[^>]*>(.*?)</title>", lower, re.DOTALL)
+    title = m.group(1) if m else ""
+    # Only markers of the interstitial itself: normal pages on Cloudflare sites also
+    # load /cdn-cgi/challenge-platform/ scripts
+    if (any(marker in title for marker in CLOUDFLARE_MARKERS + ["attention required"])
+            or any(marker in lower for marker in CLOUDFLARE_PAGE_MARKERS)):
+        return "Cloudflare challenge page"
+    return None
+
+def verify_file(path: str, size: int, mtime_ns: int, asset: bool = False) -> dict:
+    """Check one file; saved assets (icons, stylesheets...) only need to be non-empty and, for PNGs, decode"""
+    try:
+        if path.endswith(".png"):
+            problem = check_png(path, size, 1 if asset else MIN_PNG_BYTES)
+        elif path.endswith(".html") and not asset:
+            problem = check_html(path, size)
+        else:
+            problem = None if size else "empty file"
+        sha = file_sha256(path)
+    except OSError as e:
+        problem, sha = f"unreadable: {e}", None
+    return {"size": size, "mtime_ns": mtime_ns, "problem": problem, "sha256": sha}
+
+def _verify_tree(root: str, out_dir: str, cache: dict, asset: bool = False) -> dict:
+    """Walk one folder with os.scandir, re-checking only files whose size/mtime changed"""
+    results = {}
+    stack = [root]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                    continue
+                st = entry.stat()
+                rel = os.path.relpath(entry.path, out_dir).replace(os.sep, "/")
+                cached = cache.get(rel)
+                if cached and cached["size"] == st.st_size and cached["mtime_ns"] == st.st_mtime_ns:
+                    results[rel] = cached
+                else:
+                    results[rel] = verify_file(entry.path, st.st_size, st.st_mtime_ns, asset)
+    return results
+
+def verify_archive(out_dir: str, workers: int = None, requeue: bool = True) -> dict:
+    """
+    Check every screenshot, HTML file and saved asset, then cross-check the
+    results metadata. Records pointing at missing or broken files, and failed
+    loads, are removed from the results and done list and written to
+    meta/requeue.json so the next run re-archives just those URLs; broken
+    assets are deleted so they are fetched again.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    meta_dir = os.path.join(out_dir, "meta")
+    os.makedirs(meta_dir, exist_ok=True)
+    cache_path = os.path.join(meta_dir, "verify_cache.json")
+    cache = {}
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except:
+            pass
+    
+    roots = []
+    for top in ("screenshots", "html"):
+        top_dir = os.path.join(out_dir, top)
+        if os.path.isdir(top_dir):
+            with os.scandir(top_dir) as it:
+                for group in it:
+                    if group.is_dir():
+                        with os.scandir(group.path) as kinds:
+                            roots += [k.path for k in kinds if k.is_dir()]
+    assets_dir = os.path.join(out_dir, "assets")
+    if os.path.isdir(assets_dir):
+        roots.append(assets_dir)
+    log(f"Verifying files in {len(roots)} folders...")
+    files = {}
+    with ThreadPoolExecutor(max_workers=workers or min(32, (os.cpu_count() or 1) * 4)) as pool:
+        for part in pool.map(lambda root: _verify_tree(root, out_dir, cache, root == assets_dir), roots):
+            files.update(part)
+    with open(cache_path, "w", encoding="utf-8") as f:
+        json.dump(files, f)
+    
+    def problem_for(path: str) -> str | None:
+        path = archive_path(out_dir, path)
+        rel = os.path.relpath(path, out_dir).replace(os.sep, "/")
+        if rel not in files:
+            return f"missing file {rel}"
+        return files[rel]["problem"] and f"{rel}: {files[rel]['problem']}"
+    
+    done = load_done(meta_dir)
+    requeued, referenced = [], set()
+    for name in sorted(os.listdir(meta_dir)):
+        if not name.endswith("__results.json"):
+            continue
+        group, kind = (name[:-len("__results.json")].split("__") + [""])[:2]
+        results = load_results(meta_dir, group, kind)
+        kept = []
+        for rec in results:
+            problem = rec["error"] if "error" in rec else None
+            for path in ([] if problem else record_files(rec)):
+                referenced.add(os.path.relpath(archive_path(out_dir, path), out_dir).replace(os.sep, "/"))
+                problem = problem or problem_for(path)
+            if problem and requeue:
+                url = rec.get("requested_url") or rec["url"]
+                requeued.append({"group": group, "kind": kind, "url": url, "reason": problem})
+                done.discard(done_key(url))
+                done.discard(done_key(rec["url"]))
+            else:
+                kept.append(rec)
+        if len(kept) != len(results):
+            write_results(meta_dir, group, kind, kept)
+    
+    if requeued:
+        requeue_path = os.path.join(meta_dir, "requeue.json")
+        existing = []
+        if os.path.exists(requeue_path):
+            try:
+                with open(requeue_path, "r", encoding="utf-8") as f:
+                    existing = json.load(f)
+            except:
+                pass
+        urls = {e["url"] for e in requeued}
+        with open(requeue_path, "w", encoding="utf-8") as f:
+            json.dump([e for e in existing if e["url"] not in urls] + requeued, f, indent=2)
+        write_done(meta_dir, done)
+    
+    broken_files = {rel: info["problem"] for rel, info in files.items() if info["problem"]}
+    if requeue:
+        for rel in broken_files:
+            if rel.startswith("assets/"):
+                try:
+                    os.remove(os.path.join(out_dir, *rel.split("/")))
+                except OSError:
+                    pass
+    report = {
+        "files": len(files),
+        "broken_files": broken_files,
+        "unreferenced_broken": sorted(rel for rel in broken_files if rel not in referenced),
+        "requeued": requeued,
+    }
+    with open(os.path.join(meta_dir, "verify_report.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    
+    log(f"Checked {len(files)} files: {len(broken_files)} broken")
+    for entry in requeued[:20]:
+        log(f"  Requeued {entry['url']} ({entry['reason']})")
+    if len(requeued) > 20:
+        log(f"  ...and {len(requeued) - 20} more (see meta/verify_report.json)")
+    if requeued:
+        log(f"{len(requeued)} pages will be re-archived on the next run")
+    return report
+
+def load_requeued(meta_dir: str, crawl: bool = False) -> list[dict]:
+    """
+    Pages verify put in meta/requeue.json: [{"group", "kind", "url", "reason"}].
+    Pages of the forum crawl (group "crawl") are the crawler's to redo, so they
+    are returned only with crawl=True, and then only those.
+    """
+    requeue_path = os.path.join(meta_dir, "requeue.json")
+    if not os.path.exists(requeue_path):
+        return []
+    try:
+        with open(requeue_path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    except:
+        return []
+    return [e for e in entries if (e["group"] == "crawl") == crawl]
+
+def write_requeued(meta_dir: str, entries: list[dict]):
+    """Rewrite meta/requeue.json (removed once nothing is left in it)"""
+    requeue_path = os.path.join(meta_dir, "requeue.json")
+    if entries:
+        with open(requeue_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, indent=2)
+    elif os.path.exists(requeue_path):
+        os.remove(requeue_path)
+
+def update_requeued(meta_dir: str, done: set):
+    """Drop the requeued pages that have been archived again"""
+    write_requeued(meta_dir, [e for e in load_requeued(meta_dir) if done_key(e["url"]) not in done]
+                   + load_requeued(meta_dir, crawl=True))
+
+async def archive_requeued(page, done: set, output_dir: str):
+    """Re-archive the pages that verify put in meta/requeue.json, before anything else"""
+    meta_dir = os.path.join(output_dir, "meta")
+    entries = load_requeued(meta_dir)
+    if should_stop or not entries:
+        return
+    
+    log(f"\n=== Repairing {len(entries)} broken captures ===")
+    batches = {}
+    for e in entries:
+        batches.setdefault((e["group"], e["kind"]), []).append(e["url"])
+    for (group, kind), urls in batches.items():
+        if should_stop:
+            break
+        await archive_url_list(page, done, output_dir, group, kind, urls)
+    update_requeued(meta_dir, done)
+
+# ============================================================================
+# SLOW PAGE DIAGNOSTICS
+# ============================================================================
+
+class SlowPageTracer:
+    """
+    Opt-in Playwright tracing for finding out why some pages are slow.
+    
+    Tracing runs for the whole run but each navigation is its own trace
+    chunk, which is only written to meta/traces when the page took longer
+    than SLOW_PAGE_TRACE_SEC or failed (open it with `playwright show-trace`).
+    A rolling log of responses, failed requests and console messages is kept
+    alongside as JSON, so there is something to look at even when tracing
+    can't be started.
+    """
+    
+    def __init__(self, page, trace_dir: str):
+        self.page = page
+        self.context = page.context
+        self.trace_dir = trace_dir
+        self.events = collections.deque(maxlen=TRACE_EVENT_LOG_SIZE)
+        self.tracing = False
+        self.started = 0
+        self.listeners = {"response": self.on_response, "requestfinished": self.on_request_finished,
+                          "requestfailed": self.on_request_failed, "console": self.on_console}
+    
+    def on_response(self, response):
+        self.events.append({"time": time.time(), "event": "response", "url": response.url,
+                            "status": response.status, "type": response.request.resource_type})
+    
+    def on_request_finished(self, request):
+        timing = request.timing or {}
+        ms = timing.get("responseEnd", -1)
+        self.events.append({"time": time.time(), "event": "finished", "url": request.url,
+                            "type": request.resource_type, "ms": round(ms) if ms >= 0 else None})
+    
+    def on_request_failed(self, request):
+        self.events.append({"time": time.time(), "event": "failed", "url": request.url,
+                            "type": request.resource_type, "error": request.failure})
+    
+    def on_console(self, msg):
+        self.events.append({"time": time.time(), "event": "console", "level": msg.type, "text": msg.text[:500]})
+    
+    async def start(self):
+        os.makedirs(self.trace_dir, exist_ok=True)
+        for event, handler in self.listeners.items():
+            self.page.on(event, handler)
+        try:
+            await self.context.tracing.start(screenshots=False, snapshots=False)
+            self.tracing = True
+        except Exception as e:
+            log(f"Tracing unavailable ({e}) - keeping a network log only")
+        log(f"Diagnostics on - slow or failed pages are traced to {self.trace_dir}")
+    
+    async def begin(self):
+        self.started = time.time()
+        if self.tracing:
+            try:
+                await self.context.tracing.start_chunk()
+            except Exception as e:
+                log(f"Tracing stopped: {e}")
+                self.tracing = False
+    
+    async def end(self, url: str, seconds: float, failure: dict | None):
+        keep = failure is not None or seconds >= SLOW_PAGE_TRACE_SEC
+        base = os.path.join(self.trace_dir, f"{time.strftime('%Y%m%d-%H%M%S')}__{safe_filename(urlparse(url).path, 80)}")
+        if self.tracing:
+            try:
+                await self.context.tracing.stop_chunk(path=base + ".zip" if keep else None)
+            except Exception as e:
+                log(f"Tracing stopped: {e}")
+                self.tracing = False
+        if not keep:
+            return
+        
+        events = [e for e in self.events if e["time"] >= self.started]
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump({"url": url, "seconds": round(seconds, 1), "failure": failure, "events": events}, f, indent=2)
+        reason = f"failed ({failure['kind']})" if failure else f"slow ({seconds:.0f}s)"
+        log(f"Page {reason} - trace saved to {os.path.basename(base)}")
+        slowest = sorted((e for e in events if e.get("ms")), key=lambda e: e["ms"], reverse=True)[:3]
+        for e in slowest:
+            log(f"  {e['ms'] / 1000:.1f}s  {e['type']}  {e['url'][:120]}")
+        self.prune()
+    
+    def prune(self):
+        """Delete the oldest traces until the folder is under TRACE_MAX_BYTES"""
+        files = []
+        for entry in os.scandir(self.trace_dir):
+            if entry.is_file():
+                st = entry.stat()
+                files.append((st.st_mtime, st.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= TRACE_MAX_BYTES:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+    
+    async def stop(self):
+        for event, handler in self.listeners.items():
+            try:
+                self.page.remove_listener(event, handler)
+            except Exception:
+                pass
+        if self.tracing:
+            try:
+                await self.context.tracing.stop()
+            except Exception:
+                pass
+            self.tracing = False
+
+async def start_diagnostics(page, output_dir: str):
+    global page_tracer
+    page_tracer = SlowPageTracer(page, os.path.join(output_dir, "meta", "traces"))
+    await page_tracer.start()
+
+async def stop_diagnostics():
+    global page_tracer
+    tracer, page_tracer = page_tracer, None
+    if tracer:
+        await tracer.stop()
+
+# ============================================================================
+# BROWSER SESSION
+# ============================================================================
+
+class BrowserSession:
+    """
+    Long-lived Chromium session owned by the app.
+
+    The persistent context (and the login it carries) stays warm across
+    Start clicks and tabs. When used from the GUI the session runs its own
+    event loop on a background thread and archival coroutines are submitted
+    with run(). Before each use the browser is health-checked and relaunched
+    if Chromium has died.
+    """
+
+    def __init__(self, headless: bool = False):
+        self.headless = headless
+        self.loop = None
+        self.thread = None
+        self.playwright = None
+        self.context = None
+        self.page = None
+        self.profile_dir = None
+        self.site_opened = False   # BASE_URL has been loaded in this browser
+        self.login_done = False    # the user already passed the login gate
+
+    def run(self, coro):
+        """Run a coroutine on the session loop and block until it finishes"""
+        if self.loop is None or not self.thread.is_alive():
+            self.loop = asyncio.new_event_loop()
+            self.thread = threading.Thread(target=self.loop.run_forever, name="browser-session", daemon=True)
+            self.thread.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def shutdown(self):
+        """Close the browser and stop the session loop (called on app exit)"""
+        if self.loop is None or not self.thread.is_alive():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.close(), self.loop).result(timeout=15)
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    async def is_healthy(self) -> bool:
+        if self.context is None:
+            return False
+        try:
+            if self.page is None or self.page.is_closed():
+                self.page = await asyncio.wait_for(self.context.new_page(), BROWSER_HEALTH_TIMEOUT_SEC)
+            await asyncio.wait_for(self.page.evaluate("() => 1"), BROWSER_HEALTH_TIMEOUT_SEC)
+            return True
+        except Exception:
+            return False
+
+    async def launch(self, profile_dir: str):
+        await self.close()
+        from playwright.async_api import async_playwright
+        # slow_mo can only be set at launch, so the tuned value from the last run applies here
+        slow_mo = load_tuning(os.path.join(os.path.dirname(profile_dir), "meta"))["slow_mo_ms"]
+        log(f"Launching browser (slow_mo {slow_mo}ms)...")
+        self.playwright = await async_playwright().start()
+        self.context = await self.playwright.chromium.launch_persistent_context(
+            user_data_dir=profile_dir,
+            headless=self.headless,
+            slow_mo=slow_mo,
+            viewport={"width": 1400, "height": 900},
+            args=['--disable-blink-features=AutomationControlled'],
+        )
+        self.profile_dir = profile_dir
+        self.site_opened = False
+        self.login_done = False
+        self.page = self.context.pages[0] if self.context.pages else await self.context.new_page()
+
+    async def get_page(self, profile_dir: str):
+        """
+        Return the session page, (re)launching Chromium if it is not running,
+        unresponsive, or using another output folder's browser profile
+        (each output folder keeps its own cookies and login)
+        """
+        healthy = await self.is_healthy()
+        if healthy and profile_dir == self.profile_dir:
+            log("Reusing warm browser session")
+            return self.page
+        if healthy:
+            log("Output folder changed - relaunching the browser with its profile...")
+        elif self.context is not None:
+            log("Browser is not responding - relaunching...")
+        await self.launch(profile_dir)
+        return self.page
+
+    async def close(self):
+        context, playwright = self.context, self.playwright
+        self.context = self.page = self.playwright = None
+        self.site_opened = self.login_done = False
+        if context is not None:
+            try:
+                await asyncio.wait_for(context.close(), 10)
+            except Exception:
+                pass
+        if playwright is not None:
+            try:
+                await asyncio.wait_for(playwright.stop(), 10)
+            except Exception:
+                pass
+
+async def open_session_page(session: BrowserSession, output_dir: str, allow_login: bool):
+    """Get a page from the session, loading TTG and pausing for login only when the session is cold"""
+    global waiting_for_continue
+    page = await session.get_page(os.path.join(output_dir, "browser_profile"))
+
+    if allow_login and session.login_done:
+        log("Already logged in this session - skipping login pause")
+        return page
+
+    if not session.site_opened:
+        # Navigate to TTG first
+        log("Opening TheTechGame...")
+        session.site_opened = await safe_goto(page, BASE_URL)
+
+    # Now prompt for login if enabled
+    if allow_login:
+        log("\n=== LOGIN TIME ===")
+        log("Page is loaded - log in if needed, then click 'Ready to Continue'")
+        set_progress(0, 100, "Login if needed, then click 'Ready to Continue'")
+
+        # Enable the continue button in GUI
+        if gui_enable_continue_callback:
+            gui_enable_continue_callback()
+
+        waiting_for_continue = True
+        while waiting_for_continue and not should_stop:
+            await asyncio.sleep(0.5)
+        if not should_stop:
+            session.login_done = True
+            log("User ready - continuing...")
+
+    return page
+
+# ============================================================================
+# DEADLINE SCHEDULER
+# ============================================================================
+
+def url_slug(url: str) -> str:
+    """Last path segment without .html - TTG post and topic URLs share the topic's slug"""
+    return START_RE.sub("", urlparse(url).path).rstrip("/").rsplit("/", 1)[-1].replace(".html", "").lower()
+
+class DeadlineScheduler:
+    """
+    Orders archive work to cover as much as possible before a deadline.
+    
+    Per-page cost is measured as pages are captured (moving average per group
+    and capture phase). Before every page the plan is redone: if the pending
+    pages no longer fit in the time left, pages are captured HTML-only and
+    their screenshots queued for a later pass. Ordering puts fresh captures
+    before screenshot backfill, unique content before URLs that probably land
+    on an already captured topic page (same slug), first pages before later
+    /start= pages, then cheaper groups first.
+    """
+    
+    def __init__(self, deadline: float):
+        self.deadline = deadline
+        self.items = []
+        self.seq = 0
+        self.costs = {}
+        self.captured_slugs = set()
+        self.html_only = False
+    
+    def add(self, group: str, kind: str, url: str, phase: str = "full", rec: dict = None):
+        m = START_RE.search(url)
+        self.seq += 1
+        self.items.append({"group": group, "kind": kind, "url": url, "phase": phase, "rec": rec,
+                           "page_num": int(m.group(1)) // 10 + 1 if m else 1, "seq": self.seq})
+    
+    def time_left(self) -> float:
+        return self.deadline - time.time()
+    
+    def estimate(self, group: str, phase: str) -> float:
+        return self.costs.get((group, phase)) or self.costs.get(phase) or DEFAULT_PAGE_COST_SEC[phase]
+    
+    def record(self, item: dict, phase: str, seconds: float, ok: bool):
+        for key in ((item["group"], phase), phase):
+            old = self.costs.get(key)
+            self.costs[key] = seconds if old is None else old * 0.7 + seconds * 0.3
+        if ok:
+            self.captured_slugs.add(url_slug(item["url"]))
+    
+    def replan(self):
+        captures = [i for i in self.items if i["phase"] != "png"]
+        full_cost = sum(self.estimate(i["group"], "full") for i in captures)
+        # Some slack before switching back, so the mode doesn't flap on every page
+        html_only = full_cost > self.time_left() * (0.8 if self.html_only else 1.0)
+        if html_only != self.html_only:
+            self.html_only = html_only
+            if html_only:
+                log(f"Not enough time for full captures of {len(captures)} pages "
+                    f"(~{full_cost / 60:.0f} min needed, {self.time_left() / 60:.0f} min left) - saving HTML first")
+            else:
+                log("Back on schedule - taking screenshots with each page again")
+        capture_phase = "html" if html_only else "full"
+        
+        def priority(i):
+            phase = "png" if i["phase"] == "png" else capture_phase
+            return (i["phase"] == "png", url_slug(i["url"]) in self.captured_slugs,
+                    i["page_num"], self.estimate(i["group"], phase), i["seq"])
+        self.items.sort(key=priority)
+    
+    def next(self) -> dict | None:
+        if not self.items:
+            return None
+        if self.time_left() <= 0:
+            log(f"Deadline reached - {len(self.items)} pages left unarchived")
+            return None
+        self.replan()
+        item = self.items.pop(0)
+        if item["phase"] == "full" and self.html_only:
+            item["phase"] = "html"
+        return item
+
+def load_html_only(meta_dir: str) -> dict:
+    """URLs captured HTML-only by a deadline run: {url: {"group", "kind", "rec"}}"""
+    text = read_checkpoint(os.path.join(meta_dir, "html_only_urls.json"))
+    if text:
+        try:
+            return json.loads(text)
+        except:
+            pass
+    return {}
+
+def write_html_only(meta_dir: str, html_only: dict):
+    write_checkpoint(os.path.join(meta_dir, "html_only_urls.json"), html_only)
+
+async def save_missing_screenshot(page, out_dir: str, group: str, kind: str, rec: dict, results: list,
+                                  post_id: str = None) -> bool:
+    """Screenshot a page saved HTML-only under its existing file number and fill in its record in results"""
+    idx = int(re.match(r"(\d+)__", os.path.basename(rec["html"])).group(1))
+    shot = await save_page(page, out_dir, group, kind, idx, with_html=False, post_id=post_id)
+    if not shot:
+        return False
+    for field in ("png", "png_parts", "png_manifest"):
+        if shot.get(field):
+            rec[field] = shot[field]
+    results[:] = [rec if r.get("html") == rec["html"] else r for r in results]
+    return True
+
+async def archive_html_only(page, done: set, out_dir: str):
+    """Take the screenshots a deadline run skipped (meta/html_only_urls.json), into the pages' existing records"""
+    meta_dir = os.path.join(out_dir, "meta")
+    html_only = load_html_only(meta_dir)
+    todo = [(url, entry) for url, entry in html_only.items() if done_key(url) not in done]
+    if should_stop or not todo:
+        return
+    
+    log(f"\n=== Taking {len(todo)} screenshots left out by a deadline run ===")
+    results = {}
+    for n, (url, entry) in enumerate(todo, 1):
+        if should_stop:
+            break
+        group, kind, rec = entry["group"], entry["kind"], entry["rec"]
+        if (group, kind) not in results:
+            results[group, kind] = load_results(meta_dir, group, kind)
+        set_progress(n, len(todo), f"Screenshots {n}/{len(todo)}")
+        log(f"[{n}/{len(todo)}] Screenshot: {url}")
+        # A page that won't load keeps its HTML-only record and is tried again next run
+        if await safe_goto(page, url):
+            await expand_click_to_view_content(page)
+            if await save_missing_screenshot(page, out_dir, group, kind, rec, results[group, kind], rec.get("post_id")):
+                html_only.pop(url)
+                done.add(done_key(url))
+                write_done(meta_dir, done)
+                write_html_only(meta_dir, html_only)
+                write_results(meta_dir, group, kind, results[group, kind])
+        elif should_stop:
+            break
+        await asyncio.sleep(tuned("delay_sec"))
+
+async def archive_scheduled(page, done: set, out_dir: str, scheduler: DeadlineScheduler, posts_only: bool = False):
+    """Work through the scheduler's queue until it is empty or the deadline passes"""
+    meta_dir = os.path.join(out_dir, "meta")
+    html_only = load_html_only(meta_dir)
+    for url, entry in html_only.items():
+        if done_key(url) not in done:
+            scheduler.add(entry["group"], entry["kind"], url, "png", entry["rec"])
+    
+    results = {}
+    captured = 0
+    while not should_stop:
+        for url, entry in retry_queue.take_due() if retry_queue else []:
+            scheduler.add(entry["group"], entry["kind"], url)
+        item = scheduler.next()
+        if item is None:
+            # Nothing left but retries still backing off - wait for them if the deadline allows
+            if await wait_for_retries(until=scheduler.deadline):
+                continue
+            break
+        group, kind, url, phase = item["group"], item["kind"], item["url"], item["phase"]
+        key = (group, kind)
+        if key not in results:
+            results[key] = load_results(meta_dir, group, kind)
+        group_results = results[key]
+        
+        captured += 1
+        set_progress(captured, captured + len(scheduler.items),
+                     f"Archiving {kind} ({scheduler.time_left() / 60:.0f} min left)")
+        log(f"[{phase}] Archiving: {url}")
+        started = time.time()
+        post_id = post_id_from_url(url) if posts_only and group.startswith("posts_") and kind == "posts" else None
+        
+        ok = await safe_goto(page, url, attempts=1, timeout_ms=retry_queue.timeout_ms(url)) if retry_queue \
+            else await safe_goto(page, url)
+        if not ok:
+            scheduler.record(item, phase, time.time() - started, False)
+            if should_stop:
+                break
+            failure = goto_failure.get() or {"kind": "error", "message": "failed to load"}
+            if phase == "png" or not (retry_queue and retry_queue.failed(url, group, kind, failure, post_id is not None)):
+                group_results.append({"url": url, "error": "failed to load", "error_kind": failure["kind"]})
+                write_results(meta_dir, group, kind, group_results)
+            continue
+        await expand_click_to_view_content(page)
+        if retry_queue:
+            retry_queue.succeeded(url)
+        
+        if phase == "png":
+            if await save_missing_screenshot(page, out_dir, group, kind, item["rec"], group_results, post_id):
+                html_only.pop(url, None)
+                done.add(done_key(url))
+        else:
+            rec = await save_page(page, out_dir, group, kind, next_file_index(group_results),
+                                  with_screenshot=(phase == "full"), post_id=post_id)
+            if rec:
+                if rec["url"] != url:
+                    rec["requested_url"] = url
+                group_results.append(rec)
+                if phase == "html":
+                    html_only[url] = {"group": group, "kind": kind, "rec": rec}
+                    scheduler.add(group, kind, url, "png", rec)
+                else:
+                    done.add(done_key(url))
+        
+        write_done(meta_dir, done)
+        write_html_only(meta_dir, html_only)
+        write_results(meta_dir, group, kind, group_results)
+        await asyncio.sleep(tuned("delay_sec"))
+        scheduler.record(item, phase, time.time() - started, True)
+    
+    if html_only:
+        log(f"{len(html_only)} pages saved as HTML only - their screenshots will be taken on the next run")
+
+# ============================================================================
+# USER ARCHIVER
+# ============================================================================
+
+# Parts of a user's history, in the order they are archived
+USER_GROUPS = ("topics_live", "topics_arch", "posts_live", "posts_arch")
+
+def user_search_urls(username: str, topics_live: bool, topics_arch: bool,
+                     posts_live: bool, posts_arch: bool) -> list[tuple[str, str]]:
+    """(group name, search URL) for each selected part of a user's history"""
+    search_urls = []
+    if topics_live:
+        search_urls.append(("topics_live", f"https://www.thetechgame.com/Forums/search/search_id=startedtopics/user={username}.html"))
+    if topics_arch:
+        search_urls.append(("topics_arch", f"https://www.thetechgame.com/Archives/search/search_id=startedtopics/user={username}.html"))
+    if posts_live:
+        search_urls.append(("posts_live", f"https://www.thetechgame.com/Forums/search/search_author={username}.html"))
+    if posts_arch:
+        search_urls.append(("posts_arch", f"https://www.thetechgame.com/Archives/search/search_author={username}.html"))
+    return search_urls
+
+async def run_user_archiver(username: str, output_dir: str, include_profile: bool, 
+                            topics_live: bool, topics_arch: bool, posts_live: bool, posts_arch: bool,
+                            posts_only_mode: bool, allow_login: bool, session: BrowserSession = None,
+                            package: bool = False, search_index: bool = False, mirror: bool = False,
+                            time_budget: float = None, diagnostics: bool = False):
+    """time_budget (seconds) switches to deadline mode; the clock starts once the browser is ready and logged in"""
+    global should_stop, waiting_for_continue, retry_queue, tuner
+    should_stop = False
+    waiting_for_continue = False
+    
+    log(f"Starting user archival for: {username}")
+    log(f"Output directory: {output_dir}")
+    if posts_only_mode:
+        log("Posts-only mode: Will screenshot only user posts, not full topic pages")
+    
+    meta_dir = os.path.join(output_dir, "meta")
+    os.makedirs(meta_dir, exist_ok=True)
+    log.file_path = os.path.join(meta_dir, "runlog.txt")
+    
+    done = load_done(meta_dir)
+    if done:
+        log(f"Resuming - already archived {len(done)} URLs")
+    retry_queue = RetryQueue(meta_dir)
+    tuner = ThroughputTuner(meta_dir)
+    log(f"Pace: {tuner.describe()}")
+    
+    search_urls = user_search_urls(username, topics_live, topics_arch, posts_live, posts_arch)
+    
+    owns_session = session is None
+    if owns_session:
+        session = BrowserSession()
+    
+    packager = start_packaging(output_dir) if package else None
+    indexer = start_search_indexing(output_dir) if search_index else None
+    if mirror:
+        start_asset_capture()
+    
+    try:
+        page = await open_session_page(session, output_dir, allow_login)
+        
+        if should_stop:
+            return
+        if diagnostics:
+            await start_diagnostics(page, output_dir)
+        start_disk_writer()
+        
+        deadline = time.time() + time_budget if time_budget else None
+        if not deadline:
+            await archive_requeued(page, done, output_dir)
+            await archive_html_only(page, done, output_dir)
+        
+        if deadline:
+            await run_scheduled_user_archival(page, done, output_dir, deadline, include_profile,
+                                              username, search_urls, posts_only_mode)
+        
+        if include_profile and not deadline:
+            log("\n=== Archiving Profile ===")
+            await archive_profile(page, done, output_dir, username)
+        
+        for group_name, root_url in ([] if deadline else search_urls):
+            if should_stop:
+                break
+            log(f"\n=== {group_name} ===")
+            search_pages = await collect_search_pages(page, root_url)
+            content = await collect_content_links(page, search_pages)
+            
+            is_posts_group = "posts_" in group_name
+            
+            if content['posts']:
+                await archive_url_list(page, done, output_dir, group_name, "posts", 
+                                      content["posts"], posts_only_mode and is_posts_group)
+            
+            if content['topics'] and not (posts_only_mode and is_posts_group):
+                await archive_url_list(page, done, output_dir, group_name, "topics", 
+                                      content["topics"], posts_only_mode)
+        
+        if not deadline:
+            await drain_retry_queue(page, done, output_dir)
+        
+        if should_stop:
+            log("\n=== Stopped by User ===")
+        else:
+            log("\n=== Complete! ===")
+            log(f"Archived: {len(done)} URLs")
+            
+    except Exception as e:
+        log(f"\nERROR: {str(e)}")
+        log(traceback.format_exc())
+        raise
+    finally:
+        retry_queue = tuner = None
+        await stop_diagnostics()
+        await stop_disk_writer()
+        if packager:
+            stop_packaging(packager)
+        if indexer:
+            stop_search_indexing(indexer)
+        stop_asset_capture()
+        if mirror:
+            await refresh_mirror(output_dir)
+        if owns_session:
+            await session.close()
+
+async def run_scheduled_user_archival(page, done: set, output_dir: str, deadline: float, include_profile: bool,
+                                      username: str, search_urls: list, posts_only_mode: bool):
+    """
+    Deadline mode: the profile (one page load) goes first, then find
+    everything else (within a share of the budget) and let the scheduler order
+    it, together with the pages verify requeued
+    """
+    log(f"\n=== Deadline mode: {max(0, deadline - time.time()) / 60:.0f} minutes available ===")
+    scheduler = DeadlineScheduler(deadline)
+    meta_dir = os.path.join(output_dir, "meta")
+    requeued = load_requeued(meta_dir)
+    for entry in requeued:
+        scheduler.add(entry["group"], entry["kind"], entry["url"])
+    # Pages already queued (requeued, or waiting for a screenshot) aren't added again when found
+    queued = {done_key(e["url"]) for e in requeued} | {done_key(url) for url in load_html_only(meta_dir)}
+    if include_profile:
+        await archive_profile(page, done, output_dir, username)
+    
+    discovery_until = time.time() + max(0, deadline - time.time()) * DISCOVERY_BUDGET_FRACTION
+    for n, (group_name, root_url) in enumerate(search_urls):
+        if should_stop:
+            break
+        # Each group gets an equal share of the discovery time left (unused time rolls
+        # over), so one huge group can't keep the others from being found at all
+        group_until = time.time() + max(0, discovery_until - time.time()) / (len(search_urls) - n)
+        log(f"\n=== Finding {group_name} ===")
+        content = {"posts": set(), "topics": set()}
+        await collect_search_pages(page, root_url, content, until=group_until)
+        log(f"Found {len(content['posts'])} posts and {len(content['topics'])} topics")
+        for kind in ("posts", "topics"):
+            if kind == "topics" and posts_only_mode:
+                continue
+            for url in dedupe_urls(sorted(content[kind])):
+                if done_key(url) not in done and done_key(url) not in queued:
+                    queued.add(done_key(url))
+                    scheduler.add(group_name, kind, url)
+    
+    log(f"\n=== Archiving {len(scheduler.items)} pages by priority ===")
+    await archive_scheduled(page, done, output_dir, scheduler, posts_only_mode)
+    if requeued:
+        update_requeued(meta_dir, done)
+
+# ============================================================================
+# CUSTOM URL ARCHIVER
+# ============================================================================
+
+async def run_custom_url_archiver(urls: list[str], output_dir: str, mode: str, allow_login: bool,
+                                  session: BrowserSession = None, package: bool = False,
+                                  search_index: bool = False, mirror: bool = False, diagnostics: bool = False):
+    global should_stop, waiting_for_continue, tuner
+    should_stop = False
+    waiting_for_continue = False
+    
+    log(f"Starting custom URL archival")
+    log(f"Mode: {mode}")
+    log(f"URLs to archive: {len(urls)}")
+    
+    meta_dir = os.path.join(output_dir, "meta")
+    os.makedirs(meta_dir, exist_ok=True)
+    log.file_path = os.path.join(meta_dir, "runlog_custom.txt")
+    tuner = ThroughputTuner(meta_dir)
+    
+    owns_session = session is None
+    if owns_session:
+        session = BrowserSession()
+    
+    packager = start_packaging(output_dir) if package else None
+    indexer = start_search_indexing(output_dir) if search_index else None
+    if mirror:
+        start_asset_capture()
+    
+    try:
+        page = await open_session_page(session, output_dir, allow_login)
+        
+        if should_stop:
+            return
+        if diagnostics:
+            await start_diagnostics(page, output_dir)
+        start_disk_writer()
+        
+        await archive_requeued(page, load_done(meta_dir), output_dir)
+        
+        total_saved = 0
+        
+        for url_idx, url in enumerate(urls, 1):
+            if should_stop:
+                break
+            
+            # Check if page is still open
+            if page.is_closed():
+                log("Browser was closed - stopping archival")
+                break
+            
+            log(f"\n=== URL {url_idx}/{len(urls)}: {url} ===")
+            set_progress(url_idx, len(urls), f"Processing URL {url_idx}/{len(urls)}")
+            
+            if mode == "single_page":
+                # Screenshot the full first page
+                log("Mode: Single page (full)")
+                ok = await safe_goto(page, url)
+                if ok:
+                    await expand_click_to_view_content(page)
+                    rec = await save_page(page, output_dir, "custom", "single_page", url_idx)
+                    if rec:
+                        append_result(output_dir, "custom", "single_page", rec)
+                    total_saved += 1
+            
+            elif mode == "all_pages":
+                # Get all pagination pages and screenshot each
+                log("Mode: All pages")
+                ok = await safe_goto(page, url)
+                if ok:
+                    html = await page.content()
+                    all_pages = extract_topic_pages(html, url)
+                    log(f"Found {len(all_pages)} pages")
+                    
+                    for page_idx, page_url in enumerate(all_pages, 1):
+                        if should_stop or page.is_closed():
+                            break
+                        log(f"  Page {page_idx}/{len(all_pages)}: {page_url}")
+                        ok = await safe_goto(page, page_url)
+                        if ok:
+                            await expand_click_to_view_content(page)
+                            rec = await save_page(page, output_dir, "custom", f"url{url_idx}_pages", 
+                                                  (url_idx - 1) * 100 + page_idx)
+                            if rec:
+                                append_result(output_dir, "custom", f"url{url_idx}_pages", rec)
+                            total_saved += 1
+                        await asyncio.sleep(tuned("delay_sec"))
+            
+            await asyncio.sleep(tuned("delay_sec"))
+        
+        if should_stop:
+            log("\n=== Stopped by User ===")
+        else:
+            log("\n=== Complete! ===")
+            log(f"Total pages saved: {total_saved}")
+        
+    except Exception as e:
+        error_msg = str(e)
+        if "closed" in error_msg.lower():
+            log("\nBrowser was closed - archival stopped")
+        else:
+            log(f"\nERROR: {error_msg}")
+            log(traceback.format_exc())
+        raise
+    finally:
+        tuner = None
+        await stop_diagnostics()
+        await stop_disk_writer()
+        if packager:
+            stop_packaging(packager)
+        if indexer:
+            stop_search_indexing(indexer)
+        stop_asset_capture()
+        if mirror:
+            await refresh_mirror(output_dir)
+        if owns_session:
+            await session.close()
+
+# ============================================================================
+# FORUM CRAWLER
+# ============================================================================
+
+CRAWL_QUEUED, CRAWL_DONE, CRAWL_FAILED = 0, 1, 2
+# Lower runs first: listing pages (to keep discovering), then topics, then their later pages
+CRAWL_PRIORITY = {"forum": 0, "topic": 1, "topic_page": 2}
+
+class BloomFilter:
+    """Fixed-size bit array answering "maybe seen" / "definitely not seen" for strings"""
+    
+    def __init__(self, bits: int = CRAWL_BLOOM_BITS, hashes: int = CRAWL_BLOOM_HASHES):
+        self.bits = bits
+        self.hashes = hashes
+        self.array = bytearray(bits // 8)
+    
+    def positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+    
+    def add(self, key: str):
+        for pos in self.positions(key):
+            self.array[pos >> 3] |= 1 << (pos & 7)
+    
+    def __contains__(self, key: str) -> bool:
+        return all(self.array[pos >> 3] & (1 << (pos & 7)) for pos in self.positions(key))
+
+class ForumCrawler:
+    """
+    Frontier and visited set for a whole-board crawl, in meta/crawl.sqlite.
+    Every page ever queued is a row in `visited` (by done_key) with its state;
+    a Bloom filter in front of it answers most "seen?" checks without touching
+    the disk. The frontier keeps up to CRAWL_FRONTIER_MEMORY pages in a heap
+    and spills the rest to the `frontier` table, so memory stays flat however
+    big the board is. A stopped crawl resumes where it left off.
+    """
+    
+    def __init__(self, meta_dir: str):
+        os.makedirs(meta_dir, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(meta_dir, "crawl.sqlite"))
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS visited (key TEXT PRIMARY KEY, url TEXT, kind TEXT,
+                                                state INTEGER DEFAULT 0, attempts INTEGER DEFAULT 0);
+            CREATE TABLE IF NOT EXISTS frontier (priority INTEGER, seq INTEGER, key TEXT, url TEXT, kind TEXT,
+                                                 PRIMARY KEY (priority, seq));
+            CREATE INDEX IF NOT EXISTS frontier_key ON frontier (key);
+            CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER);
+        """)
+        self.bloom = BloomFilter()
+        for (key,) in self.db.execute("SELECT key FROM visited"):
+            self.bloom.add(key)
+        self.heap = []
+        self.seq = self.counter("seq")
+        self.spilled = self.db.execute("SELECT COUNT(*) FROM frontier").fetchone()[0]
+        counts = dict(self.db.execute("SELECT state, COUNT(*) FROM visited GROUP BY state").fetchall())
+        self.done, self.failed = counts.get(CRAWL_DONE, 0), counts.get(CRAWL_FAILED, 0)
+        # Queued pages that never made it to the frontier table (the last run was killed)
+        lost = self.db.execute("SELECT url, kind, attempts FROM visited v WHERE state = ? AND NOT EXISTS "
+                               "(SELECT 1 FROM frontier f WHERE f.key = v.key)", (CRAWL_QUEUED,)).fetchall()
+        for url, kind, attempts in lost:
+            self.push(url, kind, attempts)
+        if lost:
+            log(f"Re-queued {len(lost)} pages from an interrupted crawl")
+    
+    def counter(self, name: str) -> int:
+        row = self.db.execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+    
+    def next_index(self, name: str) -> int:
+        value = self.counter(name) + 1
+        self.db.execute("INSERT OR REPLACE INTO counters VALUES (?, ?)", (name, value))
+        return value
+    
+    def seen(self, key: str) -> bool:
+        return key in self.bloom and self.db.execute("SELECT 1 FROM visited WHERE key = ?", (key,)).fetchone() is not None
+    
+    def add(self, url: str, kind: str) -> bool:
+        """Queue a page unless it was ever queued before; True if it's new"""
+        key = done_key(url)
+        if self.seen(key):
+            return False
+        self.bloom.add(key)
+        self.db.execute("INSERT OR IGNORE INTO visited (key, url, kind) VALUES (?, ?, ?)", (key, url, kind))
+        self.push(url, kind)
+        return True
+    
+    def push(self, url: str, kind: str, attempts: int = 0):
+        # Failed pages go back behind all fresh work
+        self.seq += 1
+        item = (CRAWL_PRIORITY[kind] + 10 * attempts, self.seq, url, kind)
+        if len(self.heap) < CRAWL_FRONTIER_MEMORY:
+            heapq.heappush(self.heap, item)
+        else:
+            self.db.execute("INSERT INTO frontier VALUES (?, ?, ?, ?, ?)", (item[0], item[1], done_key(url), url, kind))
+            self.spilled += 1
+    
+    def pop(self):
+        """Next (url, kind) to crawl, or None when the frontier is empty"""
+        row = None
+        if self.spilled:
+            row = self.db.execute("SELECT priority, seq, url, kind FROM frontier ORDER BY priority, seq LIMIT 1").fetchone()
+        if row and (not self.heap or row[:2] < self.heap[0][:2]):
+            self.db.execute("DELETE FROM frontier WHERE priority = ? AND seq = ?", row[:2])
+            self.spilled -= 1
+            return row[2], row[3]
+        if self.heap:
+            _, _, url, kind = heapq.heappop(self.heap)
+            return url, kind
+        return None
+    
+    def pending(self) -> int:
+        return len(self.heap) + self.spilled
+    
+    def finish(self, url: str, ok: bool) -> int:
+        """Record a crawl attempt; returns the page's failed attempts so far"""
+        key = done_key(url)
+        if ok:
+            self.db.execute("UPDATE visited SET state = ? WHERE key = ?", (CRAWL_DONE, key))
+            self.done += 1
+            return 0
+        self.db.execute("UPDATE visited SET state = ?, attempts = attempts + 1 WHERE key = ?", (CRAWL_FAILED, key))
+        self.failed += 1
+        return self.db.execute("SELECT attempts FROM visited WHERE key = ?", (key,)).fetchone()[0]
+    
+    def retry(self, url: str, kind: str, attempts: int):
+        """Put a page back in the frontier (attempts > 0: after a failure recorded by finish)"""
+        if attempts:
+            self.failed -= 1
+        self.db.execute("UPDATE visited SET state = ? WHERE key = ?", (CRAWL_QUEUED, done_key(url)))
+        self.push(url, kind, attempts)
+    
+    def requeue(self, url: str) -> bool:
+        """Crawl a page again (verify found its capture broken); False if it is already waiting"""
+        key = done_key(url)
+        row = self.db.execute("SELECT url, kind, state FROM visited WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            kind = "forum" if classify_content_url(url) == "forum" else "topic_page" if START_RE.search(url) else "topic"
+            return self.add(url, kind)
+        if row[2] == CRAWL_QUEUED:
+            return False
+        if row[2] == CRAWL_DONE:
+            self.done -= 1
+        else:
+            self.failed -= 1
+        self.db.execute("UPDATE visited SET state = ?, attempts = 0 WHERE key = ?", (CRAWL_QUEUED, key))
+        self.push(row[0], row[1])
+        return True
+    
+    def stats(self) -> dict:
+        return {"done": self.done, "failed": self.failed, "queued": self.pending()}
+    
+    def commit(self):
+        self.db.execute("INSERT OR REPLACE INTO counters VALUES ('seq', ?)", (self.seq,))
+        self.db.commit()
+    
+    def close(self):
+        """Spill the in-memory frontier to disk so the next run picks it up"""
+        self.db.executemany("INSERT INTO frontier VALUES (?, ?, ?, ?, ?)",
+                            [(prio, seq, done_key(url), url, kind) for prio, seq, url, kind in self.heap])
+        self.spilled += len(self.heap)
+        self.heap = []
+        self.commit()
+        self.db.close()
+
+def url_section(url: str) -> str:
+    """First path segment ("Forums", "Archives", ...) - a crawl stays inside the sections it started in"""
+    path = urlparse(url).path.strip("/")
+    return re.split(r"[/.]", path, maxsplit=1)[0].lower() if path else ""
+
+def forum_id_from_url(url: str) -> str | None:
+    m = CONTENT_ID_RE.search(url)
+    return f"{m.group(1).capitalize()}/f={m.group(3)}" if m and m.group(2).lower() == "f" else None
+
+def requeue_crawl_pages(meta_dir: str, crawler: ForumCrawler):
+    """Move the crawl pages verify put in meta/requeue.json into the crawler's frontier"""
+    entries = load_requeued(meta_dir, crawl=True)
+    if not entries:
+        return
+    queued = sum(crawler.requeue(e["url"]) for e in entries)
+    crawler.commit()
+    write_requeued(meta_dir, load_requeued(meta_dir))
+    log(f"Re-queued {queued} broken crawl captures")
+
+async def crawl_forums(page, out_dir: str, crawler: ForumCrawler, start_urls: list[str], skip: set):
+    """
+    Crawl from start_urls: board index and forum listing pages are scanned for
+    subforums, further listing pages and topics; each topic is saved with all
+    its /start= pages. Started from forum pages, the crawl only follows those
+    forums' own listing pages; started from an index it takes every forum in
+    the same section. Topics whose done_key is in `skip` are left out.
+    """
+    meta_dir = os.path.join(out_dir, "meta")
+    sections = {url_section(u) for u in start_urls}
+    only_forums = {forum_id_from_url(u) for u in start_urls}
+    if None in only_forums:
+        only_forums = None
+    
+    for url in start_urls:
+        crawler.add(url, "forum")
+    crawler.commit()
+    
+    saved = 0
+    while not should_stop:
+        item = crawler.pop()
+        if item is None:
+            break
+        url, kind = item
+        if page.is_closed():
+            log("Browser was closed - stopping crawl")
+            crawler.retry(url, kind, 0)
+            break
+        if kind != "forum" and done_key(url) in skip:
+            crawler.finish(url, True)
+            continue
+        
+        stats = crawler.stats()
+        set_progress(stats["done"], stats["done"] + stats["queued"], f"Crawling - {stats['queued']} pages queued")
+        ok = await safe_goto(page, url)
+        if not ok:
+            if should_stop:
+                crawler.retry(url, kind, 0)
+                break
+            failure = goto_failure.get() or {"kind": "error"}
+            attempts = crawler.finish(url, False)
+            if failure["kind"] not in NON_RETRYABLE_FAILURES and attempts < RETRY_MAX_ATTEMPTS:
+                crawler.retry(url, kind, attempts)
+            else:
+                log(f"Giving up on {url} after {attempts} attempts ({failure['kind']})")
+            crawler.commit()
+            continue
+        
+        html = await page.content()
+        if kind == "forum":
+            for u in extract_all_links(html, page.url):
+                k = classify_content_url(u)
+                if url_section(u) not in sections:
+                    continue
+                if k == "forum" and (only_forums is None or forum_id_from_url(u) in only_forums):
+                    crawler.add(u, "forum")
+                elif k == "topic":
+                    crawler.add(u, "topic_page" if START_RE.search(u) else "topic")
+        elif kind == "topic":
+            for u in extract_topic_pages(html, url)[1:]:
+                crawler.add(u, "topic_page")
+        
+        # Listing pages are kept as HTML so the mirror can browse the board; results
+        # files are split every CRAWL_RESULTS_CHUNK pages to stay small
+        await expand_click_to_view_content(page)
+        name = "forums" if kind == "forum" else "topics"
+        idx = crawler.next_index(name)
+        chunk = f"{name}_{(idx - 1) // CRAWL_RESULTS_CHUNK:04d}"
+        rec = await save_page(page, out_dir, "crawl", chunk, idx, with_screenshot=kind != "forum")
+        if rec:
+            if rec["url"] != url:
+                rec["requested_url"] = url
+            append_result(out_dir, "crawl", chunk, rec)
+            saved += 1
+        crawler.finish(url, rec is not None)
+        crawler.commit()
+        await asyncio.sleep(tuned("delay_sec"))
+    
+    stats = crawler.stats()
+    log(f"Crawl saved {saved} pages this run ({stats['done']} in total, {stats['failed']} failed, {stats['queued']} still queued)")
+
+async def run_forum_crawler(start_urls: list[str], output_dir: str, allow_login: bool,
+                            session: BrowserSession = None, package: bool = False,
+                            search_index: bool = False, mirror: bool = False, diagnostics: bool = False):
+    global should_stop, waiting_for_continue, tuner
+    should_stop = False
+    waiting_for_continue = False
+    
+    start_urls = dedupe_urls(canonical_url(u) for u in (start_urls or CRAWL_START_URLS))
+    log("Starting forum crawl")
+    log(f"Start pages: {', '.join(start_urls)}")
+    
+    meta_dir = os.path.join(output_dir, "meta")
+    os.makedirs(meta_dir, exist_ok=True)
+    log.file_path = os.path.join(meta_dir, "runlog_crawl.txt")
+    tuner = ThroughputTuner(meta_dir)
+    crawler = ForumCrawler(meta_dir)
+    requeue_crawl_pages(meta_dir, crawler)
+    
+    owns_session = session is None
+    if owns_session:
+        session = BrowserSession()
+    
+    packager = start_packaging(output_dir) if package else None
+    indexer = start_search_indexing(output_dir) if search_index else None
+    if mirror:
+        start_asset_capture()
+    
+    try:
+        page = await open_session_page(session, output_dir, allow_login)
+        
+        if should_stop:
+            return
+        if diagnostics:
+            await start_diagnostics(page, output_dir)
+        start_disk_writer()
+        
+        # Topics already archived by the user archiver aren't captured twice
+        await crawl_forums(page, output_dir, crawler, start_urls, load_done(meta_dir))
+        
+        if should_stop:
+            log("\n=== Stopped by User ===")
+        else:
+            log("\n=== Complete! ===")
+        
+    except Exception as e:
+        error_msg = str(e)
+        if "closed" in error_msg.lower():
+            log("\nBrowser was closed - crawl stopped")
+        else:
+            log(f"\nERROR: {error_msg}")
+            log(traceback.format_exc())
+        raise
+    finally:
+        tuner = None
+        crawler.close()
+        await stop_diagnostics()
+        await stop_disk_writer()
+        if packager:
+            stop_packaging(packager)
+        if indexer:
+            stop_search_indexing(indexer)
+        stop_asset_capture()
+        if mirror:
+            await refresh_mirror(output_dir)
+        if owns_session:
+            await session.close()
+
+# ============================================================================
+# WORK DISTRIBUTION
+# ============================================================================
+
+class WorkStore:
+    """
+    Shared pool of pages to archive, in one SQLite file (on a volume every node
+    can reach, or behind serve_work_store). Workers claim batches under a
+    time-limited lease and renew it while they work; a page whose lease runs
+    out (its worker crashed or hung) goes back to the pool and counts as a
+    failed attempt, and a completion is only accepted from the lease holder,
+    so each page ends up recorded once. Leases are compared against the clock
+    of whichever machine makes the call - keep node clocks in sync.
+    """
+    
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Rollback journal rather than WAL: WAL needs shared memory, which network filesystems don't give
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS work (id INTEGER PRIMARY KEY, key TEXT UNIQUE, url TEXT,
+                                             grp TEXT, kind TEXT, posts_only INTEGER DEFAULT 0,
+                                             state TEXT DEFAULT 'pending', worker TEXT, lease_until REAL,
+                                             attempts INTEGER DEFAULT 0, error TEXT, result TEXT, manifest TEXT);
+            CREATE INDEX IF NOT EXISTS work_state ON work (state, attempts, id);
+        """)
+    
+    def transaction(self, fn):
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn()
+                self.db.execute("COMMIT")
+                return result
+            except:
+                self.db.execute("ROLLBACK")
+                raise
+    
+    def add(self, items: list) -> int:
+        """Queue (group, kind, url, posts_only) items, skipping pages already in the pool; returns how many were new"""
+        def run():
+            before = self.db.total_changes
+            self.db.executemany("INSERT OR IGNORE INTO work (key, url, grp, kind, posts_only) VALUES (?, ?, ?, ?, ?)",
+                                [(done_key(url), url, group, kind, int(posts_only)) for group, kind, url, posts_only in items])
+            return self.db.total_changes - before
+        return self.transaction(run)
+    
+    def claim(self, worker: str, count: int, lease_sec: float) -> list[dict]:
+        """Lease up to `count` pages to a worker, first putting expired leases back in the pool"""
+        def run():
+            now = time.time()
+            self.db.execute("UPDATE work SET state = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END, "
+                            "attempts = attempts + 1, error = 'lease expired', worker = NULL "
+                            "WHERE state = 'leased' AND lease_until < ?", (RETRY_MAX_ATTEMPTS, now))
+            rows = self.db.execute("SELECT id, url, grp, kind, posts_only FROM work WHERE state = 'pending' "
+                                   "ORDER BY attempts, id LIMIT ?", (count,)).fetchall()
+            self.db.executemany("UPDATE work SET state = 'leased', worker = ?, lease_until = ? WHERE id = ?",
+                                [(worker, now + lease_sec, row[0]) for row in rows])
+            return [{"id": row[0], "url": row[1], "group": row[2], "kind": row[3], "posts_only": bool(row[4])}
+                    for row in rows]
+        return self.transaction(run)
+    
+    def renew(self, worker: str, ids: list[int], lease_sec: float) -> list[int]:
+        """Extend the worker's leases; returns the ids it still holds"""
+        def run():
+            held = []
+            for work_id in ids:
+                cur = self.db.execute("UPDATE work SET lease_until = ? WHERE id = ? AND worker = ? AND state = 'leased'",
+                                      (time.time() + lease_sec, work_id, worker))
+                if cur.rowcount:
+                    held.append(work_id)
+            return held
+        return self.transaction(run)
+    
+    def complete(self, worker: str, work_id: int, result: dict, manifest: list) -> bool:
+        """Record a saved page with its file manifest; False if the worker no longer held the lease"""
+        def run():
+            return self.db.execute("UPDATE work SET state = 'done', result = ?, manifest = ?, error = NULL "
+                                   "WHERE id = ? AND worker = ? AND state = 'leased'",
+                                   (json.dumps(result), json.dumps(manifest), work_id, worker)).rowcount > 0
+        return self.transaction(run)
+    
+    def fail(self, worker: str, work_id: int, failure: dict) -> bool:
+        """Record a failed attempt; True if the page went back to the pool for another one"""
+        def run():
+            row = self.db.execute("SELECT attempts FROM work WHERE id = ? AND worker = ? AND state = 'leased'",
+                                  (work_id, worker)).fetchone()
+            if row is None:
+                return False
+            retry = failure["kind"] not in NON_RETRYABLE_FAILURES and row[0] + 1 < RETRY_MAX_ATTEMPTS
+            self.db.execute("UPDATE work SET state = ?, attempts = attempts + 1, error = ?, worker = NULL WHERE id = ?",
+                            ("pending" if retry else "failed", f"{failure['kind']}: {failure.get('message', '')}", work_id))
+            return retry
+        return self.transaction(run)
+    
+    def release(self, worker: str, ids: list[int]):
+        """Hand back leased pages untouched (a worker stopping mid-batch)"""
+        def run():
+            self.db.executemany("UPDATE work SET state = 'pending', worker = NULL WHERE id = ? AND worker = ? AND state = 'leased'",
+                                [(work_id, worker) for work_id in ids])
+        self.transaction(run)
+    
+    def stats(self) -> dict:
+        with self.lock:
+            counts = dict(self.db.execute("SELECT state, COUNT(*) FROM work GROUP BY state").fetchall())
+            workers = dict(self.db.execute("SELECT worker, COUNT(*) FROM work WHERE state = 'done' GROUP BY worker").fetchall())
+        stats = {state: counts.get(state, 0) for state in ("pending", "leased", "done", "failed")}
+        stats["workers"] = workers
+        return stats
+    
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+# Methods a RemoteWorkStore can call on the served store
+WORK_STORE_CALLS = ("add", "claim", "renew", "complete", "fail", "release", "stats")
+
+class WorkStoreHandler(http.server.BaseHTTPRequestHandler):
+    """POST /<method> with a JSON object of keyword arguments; replies with the JSON result"""
+    
+    def do_POST(self):
+        name = self.path.strip("/")
+        if name not in WORK_STORE_CALLS:
+            self.send_error(404)
+            return
+        try:
+            kwargs = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+            body = json.dumps(getattr(self.server.store, name)(**kwargs)).encode("utf-8")
+        except Exception as e:
+            self.send_error(500, str(e))
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+class RemoteWorkStore:
+    """WorkStore client for a store served with serve_work_store (same methods, over HTTP)"""
+    
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+    
+    def call(self, name: str, **kwargs):
+        request = urllib.request.Request(f"{self.url}/{name}", data=json.dumps(kwargs).encode("utf-8"),
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=60) as response:
+            return json.loads(response.read())
+    
+    def add(self, items: list) -> int:
+        return self.call("add", items=items)
+    
+    def claim(self, worker: str, count: int, lease_sec: float) -> list[dict]:
+        return self.call("claim", worker=worker, count=count, lease_sec=lease_sec)
+    
+    def renew(self, worker: str, ids: list[int], lease_sec: float) -> list[int]:
+        return self.call("renew", worker=worker, ids=ids, lease_sec=lease_sec)
+    
+    def complete(self, worker: str, work_id: int, result: dict, manifest: list) -> bool:
+        return self.call("complete", worker=worker, work_id=work_id, result=result, manifest=manifest)
+    
+    def fail(self, worker: str, work_id: int, failure: dict) -> bool:
+        return self.call("fail", worker=worker, work_id=work_id, failure=failure)
+    
+    def release(self, worker: str, ids: list[int]):
+        return self.call("release", worker=worker, ids=ids)
+    
+    def stats(self) -> dict:
+        return self.call("stats")
+    
+    def close(self):
+        pass
+
+def open_work_store(target: str):
+    """WorkStore for a SQLite path, RemoteWorkStore for an http:// URL"""
+    if target.startswith(("http://", "https://")):
+        return RemoteWorkStore(target)
+    return WorkStore(target)
+
+def describe_work(stats: dict) -> str:
+    return (f"{stats['done']} done, {stats['leased']} in progress, "
+            f"{stats['pending']} waiting, {stats['failed']} failed")
+
+def serve_work_store(store_path: str, host: str = "127.0.0.1", port: int = WORK_STORE_PORT):
+    """Serve the store over HTTP for workers without the shared volume, until no work is left (or Ctrl+C)"""
+    store = WorkStore(store_path)
+    server = http.server.ThreadingHTTPServer((host, port), WorkStoreHandler)
+    server.store = store
+    threading.Thread(target=server.serve_forever, name="work-store", daemon=True).start()
+    log(f"Serving {store_path} on http://{host}:{port}/")
+    try:
+        while True:
+            stats = store.stats()
+            log(f"Work: {describe_work(stats)}")
+            if not stats["pending"] and not stats["leased"]:
+                break
+            time.sleep(WORK_POLL_SEC)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        store.close()
+
+async def run_coordinator(store_path: str, output_dir: str, username: str = None, urls: list[str] = (),
+                          posts_only_mode: bool = False, allow_login: bool = False, session: BrowserSession = None,
+                          topics_live: bool = True, topics_arch: bool = True, posts_live: bool = True,
+                          posts_arch: bool = True):
+    """
+    Find a user's posts and topics in the selected groups (plus any extra URLs)
+    and put every page not yet archived into the shared work store for workers
+    to pick up
+    """
+    global should_stop, waiting_for_continue, tuner
+    should_stop = False
+    waiting_for_continue = False
+    
+    meta_dir = os.path.join(output_dir, "meta")
+    os.makedirs(meta_dir, exist_ok=True)
+    log.file_path = os.path.join(meta_dir, "runlog_coordinator.txt")
+    tuner = ThroughputTuner(meta_dir)
+    done = load_done(meta_dir)
+    
+    items = [("custom", "pages", url, False) for url in dedupe_urls(urls)]
+    owns_session = session is None and bool(username)
+    if owns_session:
+        session = BrowserSession()
+    store = WorkStore(store_path)
+    
+    try:
+        if username:
+            page = await open_session_page(session, output_dir, allow_login)
+            for group_name, root_url in user_search_urls(username, topics_live, topics_arch, posts_live, posts_arch):
+                if should_stop:
+                    break
+                log(f"\n=== Finding {group_name} ===")
+                content = {"posts": set(), "topics": set()}
+                await collect_search_pages(page, root_url, content)
+                log(f"Found {len(content['posts'])} posts and {len(content['topics'])} topics")
+                is_posts_group = "posts_" in group_name
+                items += [(group_name, "posts", url, posts_only_mode and is_posts_group)
+                          for url in dedupe_urls(sorted(content["posts"]))]
+                if not (posts_only_mode and is_posts_group):
+                    items += [(group_name, "topics", url, False)
+                              for url in dedupe_urls(sorted(content["topics"]))]
+        
+        items = [item for item in items if done_key(item[2]) not in done]
+        added = store.add(items)
+        log(f"\nQueued {added} new pages ({len(items) - added} were already in the work store)")
+        log(f"Work: {describe_work(store.stats())}")
+    finally:
+        tuner = None
+        store.close()
+        if owns_session:
+            await session.close()
+
+async def work_store_call(fn, *args):
+    """Run a (possibly networked) work store call off the event loop"""
+    return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+def report_work_done(store, worker_id: str, work_id: int, out_dir: str, rec: dict):
+    """Send a saved page's record and file manifest to the store (run once its files are on disk)"""
+    manifest = []
+    for path in record_files(rec):
+        if os.path.exists(path):
+            manifest.append({"path": os.path.relpath(path, out_dir).replace(os.sep, "/"),
+                             "size": os.path.getsize(path), "sha256": file_sha256(path)})
+    try:
+        if not store.complete(worker_id, work_id, rec, manifest):
+            log(f"Lease on {rec['url']} ran out before it was reported - another worker will redo it")
+    except Exception as e:
+        log(f"Could not report {rec['url']} to the work store: {e}")
+
+async def work_item(page, store, worker_id: str, done: set, out_dir: str, item: dict) -> asyncio.Future | None:
+    """
+    Archive one claimed page and report it. Returns a future that completes
+    once the store has the report (a saved page is reported after its files
+    are written), or None if the page was left unfinished (stopping).
+    """
+    url, group, kind = item["url"], item["group"], item["kind"]
+    ok = await safe_goto(page, url)
+    rec = None
+    if ok:
+        await expand_click_to_view_content(page)
+        rec = await save_page(page, out_dir, group, kind, item["id"],
+                              post_id=post_id_from_url(url) if item["posts_only"] else None)
+    elif should_stop:
+        return None
+    
+    reported = asyncio.get_running_loop().create_future()
+    if rec:
+        if rec["url"] != url:
+            rec["requested_url"] = url
+        append_result(out_dir, group, kind, rec)
+        done.add(done_key(url))
+        write_done(os.path.join(out_dir, "meta"), done)
+        reported = await run_file_job(report_work_done, store, worker_id, item["id"], out_dir, rec)
+    else:
+        failure = (goto_failure.get() if not ok else None) or {"kind": "error", "message": "failed to save"}
+        try:
+            if not await work_store_call(store.fail, worker_id, item["id"], failure):
+                log(f"Giving up on {url} ({failure['kind']})")
+        except Exception as e:
+            log(f"Could not report the failure of {url}: {e}")
+        reported.set_result(None)
+    
+    await asyncio.sleep(tuned("delay_sec"))
+    return reported
+
+async def work_batch(page, store, worker_id: str, done: set, out_dir: str, batch: list, lease_sec: float):
+    """Work through a claimed batch, renewing its leases in the background"""
+    held = {item["id"] for item in batch}
+    reports = []
+    
+    async def renew_leases():
+        while True:
+            await asyncio.sleep(lease_sec / 3)
+            try:
+                kept = set(await work_store_call(store.renew, worker_id, sorted(held), lease_sec))
+            except Exception as e:
+                log(f"Could not renew leases: {e}")
+                continue
+            if held - kept:
+                log(f"Lost the lease on {len(held - kept)} pages - leaving them to other workers")
+            held.intersection_update(kept)
+    
+    async def settle(work_id: int, reported: asyncio.Future):
+        # A page stays leased (and renewed) until the store has its report
+        try:
+            await reported
+        finally:
+            held.discard(work_id)
+    
+    renewer = asyncio.create_task(renew_leases())
+    try:
+        for n, item in enumerate(batch, 1):
+            if should_stop or page.is_closed():
+                break
+            if item["id"] not in held:
+                continue
+            log(f"[{n}/{len(batch)}] {item['url']}")
+            reported = await work_item(page, store, worker_id, done, out_dir, item)
+            if reported is not None:
+                reports.append(asyncio.ensure_future(settle(item["id"], reported)))
+    finally:
+        await asyncio.gather(*reports, return_exceptions=True)
+        renewer.cancel()
+        if held:
+            try:
+                await work_store_call(store.release, worker_id, sorted(held))
+            except Exception as e:
+                log(f"Could not hand back unfinished pages (they return to the pool when their lease runs out): {e}")
+
+async def run_worker(store_target: str, output_dir: str, worker_id: str = None, batch_size: int = WORK_BATCH_SIZE,
+                     lease_sec: float = WORK_LEASE_SEC, wait: bool = False, session: BrowserSession = None,
+                     diagnostics: bool = False):
+    """
+    Claim pages from a work store (SQLite path or http:// URL) and archive them
+    into output_dir until the pool is empty (or, with `wait`, until stopped)
+    """
+    global should_stop, waiting_for_continue, tuner
+    should_stop = False
+    waiting_for_continue = False
+    
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    meta_dir = os.path.join(output_dir, "meta")
+    os.makedirs(meta_dir, exist_ok=True)
+    log.file_path = os.path.join(meta_dir, "runlog_worker.txt")
+    log(f"Worker {worker_id} taking work from {store_target}")
+    tuner = ThroughputTuner(meta_dir)
+    done = load_done(meta_dir)
+    store = open_work_store(store_target)
+    
+    owns_session = session is None
+    if owns_session:
+        session = BrowserSession(headless=True)
+    
+    try:
+        page = await open_session_page(session, output_dir, False)
+        if diagnostics:
+            await start_diagnostics(page, output_dir)
+        start_disk_writer()
+        
+        while not should_stop and not page.is_closed():
+            try:
+                batch = await work_store_call(store.claim, worker_id, batch_size, lease_sec)
+                stats = None if batch else await work_store_call(store.stats)
+            except Exception as e:
+                log(f"Work store unavailable ({e}) - trying again in {WORK_POLL_SEC}s")
+                await asyncio.sleep(WORK_POLL_SEC)
+                continue
+            if stats is not None:
+                # Leased pages may still come back to the pool if their worker dies
+                if not wait and not stats["leased"]:
+                    log(f"\n=== No work left ({describe_work(stats)}) ===")
+                    break
+                await asyncio.sleep(WORK_POLL_SEC)
+                continue
+            log(f"\nClaimed {len(batch)} pages")
+            await work_batch(page, store, worker_id, done, output_dir, batch, lease_sec)
+        
+        if should_stop:
+            log("\n=== Stopped by User ===")
+        
+    except Exception as e:
+        log(f"\nERROR: {str(e)}")
+        log(traceback.format_exc())
+        raise
+    finally:
+        tuner = None
+        await stop_diagnostics()
+        await stop_disk_writer()
+        store.close()
+        if owns_session:
+            await session.close()
+
+# ============================================================================
+# GUI APPLICATION
+# ============================================================================
+
+class TTGArchiverGUI:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("TTG Forum Archiver")
+        self.root.geometry("900x800")  # Increased from 850x750
+        self.root.resizable(True, True)
         
         self.archiver_thread = None
         self.is_running = False
         self.waiting_for_login = False
         
+        # One warm browser shared by every run and tab, closed with the window
+        self.browser = BrowserSession()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
         self.create_widgets()
         
     def create_widgets(self):
         # Notebook (tabs)
         self.notebook = ttk.Notebook(self.root)
-        self.notebook.pack(fill=BOTH, expand=True, padx=5, pady=5)
+        self.notebook.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
         # Tab 1: User Archiver
         self.user_tab = ttk.Frame(self.notebook)
@@ -704,12 +4222,17 @@ class TTGArchiverGUI:
         self.notebook.add(self.custom_tab, text="Archive Custom URLs")
         self.create_custom_tab()
         
+        # Tab 3: Forum Crawler
+        self.crawl_tab = ttk.Frame(self.notebook)
+        self.notebook.add(self.crawl_tab, text="Crawl Forums")
+        self.create_crawl_tab()
+        
         # Shared: Progress and Log (at bottom, outside tabs)
         self.create_shared_widgets()
     
     def create_user_tab(self):
         main_frame = ttk.Frame(self.user_tab, padding="10")
-        main_frame.pack(fill=BOTH, expand=True)
+        main_frame.pack(fill=tk.BOTH, expand=True)
         
         # Title
         title = ttk.Label(main_frame, text="Archive Your TTG Profile", font=("Arial", 14, "bold"))
@@ -721,58 +4244,82 @@ class TTGArchiverGUI:
         
         # Config
         config_frame = ttk.LabelFrame(main_frame, text="Configuration", padding="10")
-        config_frame.pack(fill=X, pady=(0, 10))
+        config_frame.pack(fill=tk.X, pady=(0, 10))
         
-        ttk.Label(config_frame, text="TTG Username:").grid(row=0, column=0, sticky=W, pady=5)
-        self.username_var = StringVar()
-        ttk.Entry(config_frame, textvariable=self.username_var, width=30).grid(row=0, column=1, sticky=W, padx=10, pady=5)
+        ttk.Label(config_frame, text="TTG Username:").grid(row=0, column=0, sticky=tk.W, pady=5)
+        self.username_var = tk.StringVar()
+        ttk.Entry(config_frame, textvariable=self.username_var, width=30).grid(row=0, column=1, sticky=tk.W, padx=10, pady=5)
         
-        ttk.Label(config_frame, text="Output Folder:").grid(row=1, column=0, sticky=W, pady=5)
+        ttk.Label(config_frame, text="Output Folder:").grid(row=1, column=0, sticky=tk.W, pady=5)
         output_frame = ttk.Frame(config_frame)
-        output_frame.grid(row=1, column=1, sticky=(W, E), padx=10, pady=5)
-        self.output_var = StringVar(value=os.path.join(os.getcwd(), "archive_out"))
-        ttk.Entry(output_frame, textvariable=self.output_var, width=35).pack(side=LEFT)
-        ttk.Button(output_frame, text="Browse", command=self.browse_output, width=10).pack(side=LEFT, padx=(5, 0))
+        output_frame.grid(row=1, column=1, sticky=(tk.W, tk.E), padx=10, pady=5)
+        self.output_var = tk.StringVar(value=os.path.join(os.getcwd(), "archive_out"))
+        ttk.Entry(output_frame, textvariable=self.output_var, width=35).pack(side=tk.LEFT)
+        ttk.Button(output_frame, text="Browse", command=self.browse_output, width=10).pack(side=tk.LEFT, padx=(5, 0))
+        
+        ttk.Label(config_frame, text="Time Budget (min):").grid(row=2, column=0, sticky=tk.W, pady=5)
+        budget_frame = ttk.Frame(config_frame)
+        budget_frame.grid(row=2, column=1, sticky=tk.W, padx=10, pady=5)
+        self.time_budget_var = tk.StringVar()
+        ttk.Entry(budget_frame, textvariable=self.time_budget_var, width=8).pack(side=tk.LEFT)
+        ttk.Label(budget_frame, text="leave blank for no limit - otherwise the most important pages go first",
+                  font=("Arial", 8), foreground="#666666").pack(side=tk.LEFT, padx=(5, 0))
         
         # Options
         options_frame = ttk.LabelFrame(main_frame, text="What to Archive", padding="5")
-        options_frame.pack(fill=X, pady=(0, 10))
+        options_frame.pack(fill=tk.X, pady=(0, 10))
         
-        self.profile_var = BooleanVar(value=True)
-        ttk.Checkbutton(options_frame, text="Profile Pages", variable=self.profile_var).grid(row=0, column=0, sticky=W, padx=5, pady=2)
+        self.profile_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(options_frame, text="Profile Pages", variable=self.profile_var).grid(row=0, column=0, sticky=tk.W, padx=5, pady=2)
         
-        ttk.Label(options_frame, text="Topics:", font=("Arial", 9, "bold")).grid(row=1, column=0, sticky=W, padx=5, pady=(5,2))
-        self.topics_live_var = BooleanVar(value=True)
-        self.topics_arch_var = BooleanVar(value=True)
-        ttk.Checkbutton(options_frame, text="Live Topics", variable=self.topics_live_var).grid(row=2, column=0, sticky=W, padx=20, pady=2)
-        ttk.Checkbutton(options_frame, text="Archives", variable=self.topics_arch_var).grid(row=3, column=0, sticky=W, padx=20, pady=2)
+        ttk.Label(options_frame, text="Topics:", font=("Arial", 9, "bold")).grid(row=1, column=0, sticky=tk.W, padx=5, pady=(5,2))
+        self.topics_live_var = tk.BooleanVar(value=True)
+        self.topics_arch_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(options_frame, text="Live Topics", variable=self.topics_live_var).grid(row=2, column=0, sticky=tk.W, padx=20, pady=2)
+        ttk.Checkbutton(options_frame, text="Archives", variable=self.topics_arch_var).grid(row=3, column=0, sticky=tk.W, padx=20, pady=2)
         
-        ttk.Label(options_frame, text="Posts:", font=("Arial", 9, "bold")).grid(row=1, column=1, sticky=W, padx=5, pady=(5,2))
-        self.posts_live_var = BooleanVar(value=True)
-        self.posts_arch_var = BooleanVar(value=True)
-        ttk.Checkbutton(options_frame, text="Live Posts", variable=self.posts_live_var).grid(row=2, column=1, sticky=W, padx=20, pady=2)
-        ttk.Checkbutton(options_frame, text="Archives", variable=self.posts_arch_var).grid(row=3, column=1, sticky=W, padx=20, pady=2)
+        ttk.Label(options_frame, text="Posts:", font=("Arial", 9, "bold")).grid(row=1, column=1, sticky=tk.W, padx=5, pady=(5,2))
+        self.posts_live_var = tk.BooleanVar(value=True)
+        self.posts_arch_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(options_frame, text="Live Posts", variable=self.posts_live_var).grid(row=2, column=1, sticky=tk.W, padx=20, pady=2)
+        ttk.Checkbutton(options_frame, text="Archives", variable=self.posts_arch_var).grid(row=3, column=1, sticky=tk.W, padx=20, pady=2)
         
-        ttk.Separator(options_frame, orient=HORIZONTAL).grid(row=4, column=0, columnspan=2, sticky=(W, E), pady=5)
+        ttk.Separator(options_frame, orient=tk.HORIZONTAL).grid(row=4, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=5)
         
-        self.posts_only_var = BooleanVar(value=False)
+        self.posts_only_var = tk.BooleanVar(value=False)
         ttk.Checkbutton(options_frame, text="Posts-only mode (save space - screenshot only posts, not full topics)", 
-                       variable=self.posts_only_var).grid(row=5, column=0, columnspan=2, sticky=W, padx=5, pady=2)
+                       variable=self.posts_only_var).grid(row=5, column=0, columnspan=2, sticky=tk.W, padx=5, pady=2)
         
-        self.allow_login_var = BooleanVar(value=True)
+        self.allow_login_var = tk.BooleanVar(value=True)
         ttk.Checkbutton(options_frame, text="Pause for login (recommended)", 
-                       variable=self.allow_login_var).grid(row=6, column=0, columnspan=2, sticky=W, padx=5, pady=2)
+                       variable=self.allow_login_var).grid(row=6, column=0, columnspan=2, sticky=tk.W, padx=5, pady=2)
         
         # Login info note
         login_note = ttk.Label(options_frame, 
                               text="💡 Wait for the page to load (~10 seconds), then click 'Ready to Continue'",
                               font=("Arial", 8),
                               foreground="#666666")
-        login_note.grid(row=7, column=0, columnspan=2, sticky=W, pady=(2, 0), padx=20)
+        login_note.grid(row=7, column=0, columnspan=2, sticky=tk.W, pady=(2, 0), padx=20)
+        
+        self.package_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="Pack saved pages into archive shards while running (easier to copy/back up)", 
+                       variable=self.package_var).grid(row=8, column=0, columnspan=2, sticky=tk.W, padx=5, pady=2)
+        
+        self.search_index_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(options_frame, text="Build a search index of saved posts", 
+                       variable=self.search_index_var).grid(row=9, column=0, columnspan=2, sticky=tk.W, padx=5, pady=2)
+        
+        self.mirror_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="Update the offline mirror (browsable copy with working links) when done", 
+                       variable=self.mirror_var).grid(row=10, column=0, columnspan=2, sticky=tk.W, padx=5, pady=2)
+        
+        self.diagnostics_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="Diagnostics: save a trace of pages that load slowly or fail (meta/traces)", 
+                       variable=self.diagnostics_var).grid(row=11, column=0, columnspan=2, sticky=tk.W, padx=5, pady=2)
     
     def create_custom_tab(self):
         main_frame = ttk.Frame(self.custom_tab, padding="10")
-        main_frame.pack(fill=BOTH, expand=True)
+        main_frame.pack(fill=tk.BOTH, expand=True)
         
         # Title
         title = ttk.Label(main_frame, text="Archive Specific URLs", font=("Arial", 14, "bold"))
@@ -784,40 +4331,40 @@ class TTGArchiverGUI:
         
         # URL Input
         url_frame = ttk.LabelFrame(main_frame, text="URLs to Archive", padding="10")
-        url_frame.pack(fill=BOTH, expand=True, pady=(0, 10))
+        url_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
         
-        ttk.Label(url_frame, text="Paste URLs (one per line):").pack(anchor=W, pady=(0, 5))
+        ttk.Label(url_frame, text="Paste URLs (one per line):").pack(anchor=tk.W, pady=(0, 5))
         
-        self.url_text = scrolledtext.ScrolledText(url_frame, wrap=WORD, height=8, width=70)
-        self.url_text.pack(fill=BOTH, expand=True)
+        self.url_text = scrolledtext.ScrolledText(url_frame, wrap=tk.WORD, height=8, width=70)
+        self.url_text.pack(fill=tk.BOTH, expand=True)
         self.url_text.insert(1.0, "https://www.thetechgame.com/Forums/t=7842769/...\nhttps://www.thetechgame.com/Archives/t=...\n")
         
         # Mode Selection
         mode_frame = ttk.LabelFrame(main_frame, text="Archive Mode", padding="10")
-        mode_frame.pack(fill=X, pady=(0, 10))
+        mode_frame.pack(fill=tk.X, pady=(0, 10))
         
-        self.archive_mode_var = StringVar(value="single_page")
+        self.archive_mode_var = tk.StringVar(value="single_page")
         
         ttk.Radiobutton(mode_frame, text="Single Page - Screenshot the full first page (includes original post + some replies)", 
-                       variable=self.archive_mode_var, value="single_page").pack(anchor=W, pady=2)
+                       variable=self.archive_mode_var, value="single_page").pack(anchor=tk.W, pady=2)
         
         ttk.Radiobutton(mode_frame, text="All Pages - Screenshot every page of the topic (complete thread archive)", 
-                       variable=self.archive_mode_var, value="all_pages").pack(anchor=W, pady=2)
+                       variable=self.archive_mode_var, value="all_pages").pack(anchor=tk.W, pady=2)
         
         # Output folder
         output_frame = ttk.LabelFrame(main_frame, text="Output", padding="10")
-        output_frame.pack(fill=X, pady=(0, 10))
+        output_frame.pack(fill=tk.X, pady=(0, 10))
         
-        ttk.Label(output_frame, text="Output Folder:").grid(row=0, column=0, sticky=W, pady=5)
+        ttk.Label(output_frame, text="Output Folder:").grid(row=0, column=0, sticky=tk.W, pady=5)
         folder_frame = ttk.Frame(output_frame)
-        folder_frame.grid(row=0, column=1, sticky=(W, E), padx=10)
-        self.custom_output_var = StringVar(value=os.path.join(os.getcwd(), "archive_custom"))
-        ttk.Entry(folder_frame, textvariable=self.custom_output_var, width=40).pack(side=LEFT)
-        ttk.Button(folder_frame, text="Browse", command=self.browse_custom_output, width=10).pack(side=LEFT, padx=(5, 0))
+        folder_frame.grid(row=0, column=1, sticky=(tk.W, tk.E), padx=10)
+        self.custom_output_var = tk.StringVar(value=os.path.join(os.getcwd(), "archive_custom"))
+        ttk.Entry(folder_frame, textvariable=self.custom_output_var, width=40).pack(side=tk.LEFT)
+        ttk.Button(folder_frame, text="Browse", command=self.browse_custom_output, width=10).pack(side=tk.LEFT, padx=(5, 0))
         
-        self.custom_login_var = BooleanVar(value=True)
+        self.custom_login_var = tk.BooleanVar(value=True)
         ttk.Checkbutton(output_frame, text="Pause for login (recommended)", 
-                       variable=self.custom_login_var).grid(row=1, column=0, columnspan=2, sticky=W, pady=5)
+                       variable=self.custom_login_var).grid(row=1, column=0, columnspan=2, sticky=tk.W, pady=5)
         
         # Login info note
         login_note = ttk.Label(output_frame, 
@@ -827,40 +4374,115 @@ class TTGArchiverGUI:
                               font=("Arial", 8),
                               foreground="#666666",
                               wraplength=450,
-                              justify=LEFT)
-        login_note.grid(row=2, column=0, columnspan=2, sticky=W, pady=(5, 0), padx=20)
+                              justify=tk.LEFT)
+        login_note.grid(row=2, column=0, columnspan=2, sticky=tk.W, pady=(5, 0), padx=20)
+        
+        self.custom_package_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(output_frame, text="Pack saved pages into archive shards while running", 
+                       variable=self.custom_package_var).grid(row=3, column=0, columnspan=2, sticky=tk.W, pady=5)
+        
+        self.custom_search_index_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(output_frame, text="Build a search index of saved posts", 
+                       variable=self.custom_search_index_var).grid(row=4, column=0, columnspan=2, sticky=tk.W, pady=5)
+        
+        self.custom_mirror_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(output_frame, text="Update the offline mirror when done", 
+                       variable=self.custom_mirror_var).grid(row=5, column=0, columnspan=2, sticky=tk.W, pady=5)
+        
+        self.custom_diagnostics_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(output_frame, text="Diagnostics: save a trace of pages that load slowly or fail", 
+                       variable=self.custom_diagnostics_var).grid(row=6, column=0, columnspan=2, sticky=tk.W, pady=5)
+    
+    def create_crawl_tab(self):
+        main_frame = ttk.Frame(self.crawl_tab, padding="10")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Title
+        title = ttk.Label(main_frame, text="Crawl Whole Forums", font=("Arial", 14, "bold"))
+        title.pack(pady=(0, 5))
+        subtitle = ttk.Label(main_frame, text="Save every topic in a forum, a few subforums, or the whole board", font=("Arial", 9))
+        subtitle.pack(pady=(0, 5))
+        credit = ttk.Label(main_frame, text="Made by Cygnet", font=("Arial", 8, "italic"), foreground="#666666")
+        credit.pack(pady=(0, 15))
+        
+        # Start pages
+        url_frame = ttk.LabelFrame(main_frame, text="Start Pages", padding="10")
+        url_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
+        
+        ttk.Label(url_frame, text="Forum pages to crawl (one per line) - the board index crawls everything:").pack(anchor=tk.W, pady=(0, 5))
+        
+        self.crawl_url_text = scrolledtext.ScrolledText(url_frame, wrap=tk.WORD, height=6, width=70)
+        self.crawl_url_text.pack(fill=tk.BOTH, expand=True)
+        self.crawl_url_text.insert(1.0, "\n".join(CRAWL_START_URLS) + "\n")
+        
+        ttk.Label(url_frame, text="Progress is kept in meta/crawl.sqlite - Stop any time and start again to carry on.",
+                  font=("Arial", 8), foreground="#666666").pack(anchor=tk.W, pady=(5, 0))
+        
+        # Output folder
+        output_frame = ttk.LabelFrame(main_frame, text="Output", padding="10")
+        output_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        ttk.Label(output_frame, text="Output Folder:").grid(row=0, column=0, sticky=tk.W, pady=5)
+        folder_frame = ttk.Frame(output_frame)
+        folder_frame.grid(row=0, column=1, sticky=(tk.W, tk.E), padx=10)
+        self.crawl_output_var = tk.StringVar(value=os.path.join(os.getcwd(), "archive_crawl"))
+        ttk.Entry(folder_frame, textvariable=self.crawl_output_var, width=40).pack(side=tk.LEFT)
+        ttk.Button(folder_frame, text="Browse", command=self.browse_crawl_output, width=10).pack(side=tk.LEFT, padx=(5, 0))
+        
+        self.crawl_login_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(output_frame, text="Pause for login (recommended)", 
+                       variable=self.crawl_login_var).grid(row=1, column=0, columnspan=2, sticky=tk.W, pady=5)
+        
+        self.crawl_package_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(output_frame, text="Pack saved pages into archive shards while running", 
+                       variable=self.crawl_package_var).grid(row=2, column=0, columnspan=2, sticky=tk.W, pady=5)
+        
+        self.crawl_search_index_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(output_frame, text="Build a search index of saved posts", 
+                       variable=self.crawl_search_index_var).grid(row=3, column=0, columnspan=2, sticky=tk.W, pady=5)
+        
+        self.crawl_mirror_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(output_frame, text="Update the offline mirror when done", 
+                       variable=self.crawl_mirror_var).grid(row=4, column=0, columnspan=2, sticky=tk.W, pady=5)
+        
+        self.crawl_diagnostics_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(output_frame, text="Diagnostics: save a trace of pages that load slowly or fail", 
+                       variable=self.crawl_diagnostics_var).grid(row=5, column=0, columnspan=2, sticky=tk.W, pady=5)
     
     def create_shared_widgets(self):
         # Control buttons (below tabs)
         button_frame = ttk.Frame(self.root)
-        button_frame.pack(fill=X, padx=10, pady=(5, 5))
+        button_frame.pack(fill=tk.X, padx=10, pady=(5, 5))
         
         self.start_btn = ttk.Button(button_frame, text="Start Archiving", command=self.start_archiving, width=20)
-        self.start_btn.pack(side=LEFT, padx=5)
+        self.start_btn.pack(side=tk.LEFT, padx=5)
         
         self.continue_btn = ttk.Button(button_frame, text="Ready to Continue", command=self.continue_after_login, 
-                                      state=DISABLED, width=20)
-        self.continue_btn.pack(side=LEFT, padx=5)
+                                      state=tk.DISABLED, width=20)
+        self.continue_btn.pack(side=tk.LEFT, padx=5)
         
-        self.stop_btn = ttk.Button(button_frame, text="Stop", command=self.stop_archiving, state=DISABLED, width=20)
-        self.stop_btn.pack(side=LEFT, padx=5)
+        self.stop_btn = ttk.Button(button_frame, text="Stop", command=self.stop_archiving, state=tk.DISABLED, width=20)
+        self.stop_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.verify_btn = ttk.Button(button_frame, text="Verify Archive", command=self.start_verify, width=20)
+        self.verify_btn.pack(side=tk.LEFT, padx=5)
         
         # Progress
         progress_frame = ttk.LabelFrame(self.root, text="Progress", padding="10")
-        progress_frame.pack(fill=X, padx=10, pady=(0, 5))
+        progress_frame.pack(fill=tk.X, padx=10, pady=(0, 5))
         
-        self.status_var = StringVar(value="Ready")
-        ttk.Label(progress_frame, textvariable=self.status_var).pack(anchor=W, pady=(0, 5))
+        self.status_var = tk.StringVar(value="Ready")
+        ttk.Label(progress_frame, textvariable=self.status_var).pack(anchor=tk.W, pady=(0, 5))
         
         self.progress = ttk.Progressbar(progress_frame, mode='determinate')
-        self.progress.pack(fill=X)
+        self.progress.pack(fill=tk.X)
         
         # Log
         log_frame = ttk.LabelFrame(self.root, text="Log", padding="10")
-        log_frame.pack(fill=BOTH, expand=True, padx=10, pady=(0, 10))
+        log_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
         
-        self.log_text = scrolledtext.ScrolledText(log_frame, wrap=WORD, height=10)
-        self.log_text.pack(fill=BOTH, expand=True)
+        self.log_text = scrolledtext.ScrolledText(log_frame, wrap=tk.WORD, height=10)
+        self.log_text.pack(fill=tk.BOTH, expand=True)
     
     def browse_output(self):
         folder = filedialog.askdirectory(initialdir=self.output_var.get())
@@ -872,9 +4494,14 @@ class TTGArchiverGUI:
         if folder:
             self.custom_output_var.set(folder)
     
+    def browse_crawl_output(self):
+        folder = filedialog.askdirectory(initialdir=self.crawl_output_var.get())
+        if folder:
+            self.crawl_output_var.set(folder)
+    
     def log_message(self, msg):
-        self.log_text.insert(END, msg + "\n")
-        self.log_text.see(END)
+        self.log_text.insert(tk.END, msg + "\n")
+        self.log_text.see(tk.END)
         self.root.update_idletasks()
     
     def update_progress(self, current, total, status):
@@ -888,8 +4515,10 @@ class TTGArchiverGUI:
         
         if current_tab == 0:  # User tab
             self.start_user_archiving()
-        else:  # Custom URL tab
+        elif current_tab == 1:  # Custom URL tab
             self.start_custom_archiving()
+        else:  # Crawl tab
+            self.start_crawl_archiving()
     
     def start_user_archiving(self):
         username = self.username_var.get().strip()
@@ -910,6 +4539,15 @@ class TTGArchiverGUI:
             messagebox.showerror("Error", "Please select at least one option to archive")
             return
         
+        time_budget = None
+        budget = self.time_budget_var.get().strip()
+        if budget:
+            try:
+                time_budget = float(budget) * 60
+            except ValueError:
+                messagebox.showerror("Error", "Time budget must be a number of minutes")
+                return
+        
         self.start_archiving_common()
         
         self.archiver_thread = threading.Thread(
@@ -917,14 +4555,15 @@ class TTGArchiverGUI:
             args=(username, output_dir, self.profile_var.get(), 
                   self.topics_live_var.get(), self.topics_arch_var.get(),
                   self.posts_live_var.get(), self.posts_arch_var.get(),
-                  self.posts_only_var.get(), self.allow_login_var.get()),
+                  self.posts_only_var.get(), self.allow_login_var.get(), self.package_var.get(),
+                  self.search_index_var.get(), self.mirror_var.get(), time_budget, self.diagnostics_var.get()),
             daemon=True
         )
         self.archiver_thread.start()
         # Removed the automatic button enabling - script will enable it when ready
     
     def start_custom_archiving(self):
-        urls_text = self.url_text.get(1.0, END).strip()
+        urls_text = self.url_text.get(1.0, tk.END).strip()
         if not urls_text:
             messagebox.showerror("Error", "Please enter at least one URL")
             return
@@ -944,12 +4583,35 @@ class TTGArchiverGUI:
         
         self.archiver_thread = threading.Thread(
             target=self.run_custom_archiver_thread,
-            args=(urls, output_dir, self.archive_mode_var.get(), self.custom_login_var.get()),
+            args=(urls, output_dir, self.archive_mode_var.get(), self.custom_login_var.get(),
+                  self.custom_package_var.get(), self.custom_search_index_var.get(),
+                  self.custom_mirror_var.get(), self.custom_diagnostics_var.get()),
             daemon=True
         )
         self.archiver_thread.start()
         # Removed the automatic button enabling - script will enable it when ready
     
+    def start_crawl_archiving(self):
+        urls = [u.strip() for u in self.crawl_url_text.get(1.0, tk.END).split("\n") if u.strip().startswith("http")]
+        if not urls:
+            messagebox.showerror("Error", "Please enter at least one forum page")
+            return
+        
+        output_dir = self.crawl_output_var.get().strip()
+        if not output_dir:
+            messagebox.showerror("Error", "Please select an output folder")
+            return
+        
+        self.start_archiving_common()
+        
+        self.archiver_thread = threading.Thread(
+            target=self.run_crawl_thread,
+            args=(urls, output_dir, self.crawl_login_var.get(), self.crawl_package_var.get(),
+                  self.crawl_search_index_var.get(), self.crawl_mirror_var.get(), self.crawl_diagnostics_var.get()),
+            daemon=True
+        )
+        self.archiver_thread.start()
+    
     def start_archiving_common(self):
         global gui_log_callback, gui_progress_callback, gui_enable_continue_callback, should_stop
         gui_log_callback = self.log_message
@@ -958,51 +4620,64 @@ class TTGArchiverGUI:
         should_stop = False
         self.waiting_for_login = False
         
-        self.start_btn.config(state=DISABLED)
-        self.continue_btn.config(state=DISABLED)
-        self.stop_btn.config(state=NORMAL)
+        self.start_btn.config(state=tk.DISABLED)
+        self.continue_btn.config(state=tk.DISABLED)
+        self.stop_btn.config(state=tk.NORMAL)
+        self.verify_btn.config(state=tk.DISABLED)
         self.is_running = True
-        self.log_text.delete(1.0, END)
+        self.log_text.delete(1.0, tk.END)
         self.progress['value'] = 0
     
     def enable_continue_button_from_script(self):
         """Called by the archiver script when it's ready for user to continue"""
-        self.root.after(0, lambda: self.continue_btn.config(state=NORMAL))
+        self.root.after(0, lambda: self.continue_btn.config(state=tk.NORMAL))
     
     def enable_continue_button(self):
         if self.is_running and not self.waiting_for_login:
-            self.continue_btn.config(state=NORMAL)
+            self.continue_btn.config(state=tk.NORMAL)
             self.waiting_for_login = True
     
     def continue_after_login(self):
         global waiting_for_continue
-        self.continue_btn.config(state=DISABLED)
+        self.continue_btn.config(state=tk.DISABLED)
         self.waiting_for_login = False
         waiting_for_continue = False
         log("User clicked continue - resuming...")
     
     def run_user_archiver_thread(self, username, output_dir, include_profile, 
                                  topics_live, topics_arch, posts_live, posts_arch,
-                                 posts_only_mode, allow_login):
+                                 posts_only_mode, allow_login, package, search_index, mirror, time_budget, diagnostics):
         try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            loop.run_until_complete(
+            self.browser.run(
                 run_user_archiver(username, output_dir, include_profile,
                                  topics_live, topics_arch, posts_live, posts_arch,
-                                 posts_only_mode, allow_login)
+                                 posts_only_mode, allow_login, session=self.browser, package=package,
+                                 search_index=search_index, mirror=mirror, time_budget=time_budget,
+                                 diagnostics=diagnostics)
+            )
+        except Exception as e:
+            self.log_message(f"\nError: {str(e)}")
+        finally:
+            self.root.after(0, self.archiving_finished)
+    
+    def run_custom_archiver_thread(self, urls, output_dir, mode, allow_login, package, search_index, mirror,
+                                   diagnostics):
+        try:
+            self.browser.run(
+                run_custom_url_archiver(urls, output_dir, mode, allow_login, session=self.browser,
+                                        package=package, search_index=search_index, mirror=mirror,
+                                        diagnostics=diagnostics)
             )
         except Exception as e:
             self.log_message(f"\nError: {str(e)}")
         finally:
             self.root.after(0, self.archiving_finished)
     
-    def run_custom_archiver_thread(self, urls, output_dir, mode, allow_login):
+    def run_crawl_thread(self, urls, output_dir, allow_login, package, search_index, mirror, diagnostics):
         try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            loop.run_until_complete(
-                run_custom_url_archiver(urls, output_dir, mode, allow_login)
+            self.browser.run(
+                run_forum_crawler(urls, output_dir, allow_login, session=self.browser, package=package,
+                                  search_index=search_index, mirror=mirror, diagnostics=diagnostics)
             )
         except Exception as e:
             self.log_message(f"\nError: {str(e)}")
@@ -1013,20 +4688,220 @@ class TTGArchiverGUI:
         global should_stop
         should_stop = True
         self.log_message("\nStopping...")
-        self.stop_btn.config(state=DISABLED)
+        self.stop_btn.config(state=tk.DISABLED)
     
     def archiving_finished(self):
-        self.start_btn.config(state=NORMAL)
-        self.continue_btn.config(state=DISABLED)
-        self.stop_btn.config(state=DISABLED)
+        self.start_btn.config(state=tk.NORMAL)
+        self.continue_btn.config(state=tk.DISABLED)
+        self.stop_btn.config(state=tk.DISABLED)
+        self.verify_btn.config(state=tk.NORMAL)
         self.is_running = False
         self.status_var.set("Finished")
         messagebox.showinfo("Complete", "Archival finished! Check the output folder.")
+    
+    def start_verify(self):
+        current_tab = self.notebook.index(self.notebook.select())
+        output_dir = (self.output_var, self.custom_output_var, self.crawl_output_var)[current_tab].get().strip()
+        if not output_dir or not os.path.isdir(output_dir):
+            messagebox.showerror("Error", "Output folder does not exist yet")
+            return
+        
+        self.start_archiving_common()
+        self.stop_btn.config(state=tk.DISABLED)
+        self.status_var.set("Verifying archive...")
+        threading.Thread(target=self.run_verify_thread, args=(output_dir,), daemon=True).start()
+    
+    def run_verify_thread(self, output_dir):
+        report = None
+        try:
+            report = verify_archive(output_dir)
+        except Exception as e:
+            self.log_message(f"\nError: {str(e)}")
+        finally:
+            self.root.after(0, lambda: self.verify_finished(report))
+    
+    def verify_finished(self, report):
+        self.start_btn.config(state=tk.NORMAL)
+        self.verify_btn.config(state=tk.NORMAL)
+        self.is_running = False
+        self.status_var.set("Verify finished")
+        if report is not None:
+            messagebox.showinfo("Verify Complete",
+                                f"Checked {report['files']} files, {len(report['broken_files'])} broken.\n"
+                                f"{len(report['requeued'])} pages will be re-archived on the next run.")
+    
+    def on_close(self):
+        global should_stop
+        should_stop = True
+        self.browser.shutdown()
+        self.root.destroy()
 
-def main():
-    root = Tk()
+def load_tkinter():
+    """Import tkinter on demand (as tk, ttk, scrolledtext, messagebox and filedialog)"""
+    global tk, ttk, scrolledtext, messagebox, filedialog
+    import tkinter as tk
+    from tkinter import ttk, scrolledtext, messagebox, filedialog
+
+def run_gui():
+    load_tkinter()
+    root = tk.Tk()
     app = TTGArchiverGUI(root)
     root.mainloop()
 
+# ============================================================================
+# COMMAND LINE TOOLS
+# ============================================================================
+
+def cli_package(args):
+    package_output_dir(args.output_dir, args.format, args.workers, int(args.shard_mb * 1024 * 1024))
+
+def cli_index(args):
+    build_search_index(args.output_dir, args.workers)
+
+def cli_search(args):
+    index = SearchIndex(args.output_dir)
+    try:
+        hits = index.search(args.query, args.limit)
+    except sqlite3.OperationalError as e:
+        print(f"Bad search query: {e}")
+        return
+    finally:
+        index.close()
+    for n, hit in enumerate(hits, 1):
+        print(f"{n}. {hit['title']} - {hit['author']} {hit['date']}".rstrip())
+        print(f"   {hit['snippet']}")
+        print(f"   {hit['url']}")
+        print(f"   HTML: {hit['html']}")
+        if hit["png"]:
+            print(f"   PNG:  {hit['png']}")
+    if not hits:
+        print("No matches")
+
+def cli_mirror(args):
+    update_mirror(args.output_dir, args.workers)
+
+def cli_extract(args):
+    extract_posts_dataset(args.output_dir, args.workers)
+
+def cli_verify(args):
+    verify_archive(args.output_dir, args.workers, requeue=not args.no_requeue)
+
+def cli_crawl(args):
+    session = BrowserSession(headless=args.headless)
+    try:
+        session.run(run_forum_crawler(args.urls, args.output_dir, False, session=session, package=args.package,
+                                      search_index=args.index, mirror=args.mirror, diagnostics=args.diagnostics))
+    finally:
+        session.shutdown()
+
+def cli_coordinator(args):
+    store_path = args.store or os.path.join(args.output_dir, "meta", "work.sqlite")
+    if args.user or args.url:
+        session = BrowserSession(headless=args.headless)
+        try:
+            session.run(run_coordinator(store_path, args.output_dir, args.user, args.url or [],
+                                        args.posts_only, session=session,
+                                        **{group: group in args.groups for group in USER_GROUPS}))
+        finally:
+            session.shutdown()
+    if args.serve:
+        serve_work_store(store_path, args.host, args.port)
+    elif not (args.user or args.url):
+        store = WorkStore(store_path)
+        print(f"Work: {describe_work(store.stats())}")
+        store.close()
+
+def cli_worker(args):
+    session = BrowserSession(headless=not args.show_browser)
+    try:
+        session.run(run_worker(args.store, args.output_dir, args.id, args.batch, args.lease, args.wait,
+                               session=session, diagnostics=args.diagnostics))
+    finally:
+        session.shutdown()
+
+def build_arg_parser():
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="TTG Forum Archiver. Run without a command to open the GUI.")
+    commands = parser.add_subparsers(dest="command")
+    
+    p = commands.add_parser("package", help="Pack an existing output folder into indexed archive shards")
+    p.add_argument("output_dir")
+    p.add_argument("--format", choices=sorted(ShardWriter.FORMATS), default=PACKAGE_FORMAT)
+    p.add_argument("--workers", type=int, default=None, help="Parallel packing processes (default: CPU count)")
+    p.add_argument("--shard-mb", type=float, default=SHARD_MAX_BYTES / (1024 * 1024), help="Roll to a new shard after this size")
+    p.set_defaults(func=cli_package)
+    
+    p = commands.add_parser("index", help="Build or update the full-text search index of an output folder")
+    p.add_argument("output_dir")
+    p.add_argument("--workers", type=int, default=None, help="Parallel parsing processes (default: CPU count)")
+    p.set_defaults(func=cli_index)
+    
+    p = commands.add_parser("search", help="Search archived posts (SQLite FTS5 query syntax)")
+    p.add_argument("output_dir")
+    p.add_argument("query")
+    p.add_argument("--limit", type=int, default=20)
+    p.set_defaults(func=cli_search)
+    
+    p = commands.add_parser("mirror", help="Build or update the offline mirror (mirror/index.html)")
+    p.add_argument("output_dir")
+    p.add_argument("--workers", type=int, default=None, help="Parallel rewriting processes (default: CPU count)")
+    p.set_defaults(func=cli_mirror)
+    
+    p = commands.add_parser("extract", help="Extract per-post records to dataset/posts.jsonl and a columnar file")
+    p.add_argument("output_dir")
+    p.add_argument("--workers", type=int, default=None, help="Parallel parsing processes (default: CPU count)")
+    p.set_defaults(func=cli_extract)
+    
+    p = commands.add_parser("verify", help="Check screenshots/HTML and requeue broken captures for the next run")
+    p.add_argument("output_dir")
+    p.add_argument("--workers", type=int, default=None, help="Parallel checking threads")
+    p.add_argument("--no-requeue", action="store_true", help="Only report problems, don't touch the resume state")
+    p.set_defaults(func=cli_verify)
+    
+    p = commands.add_parser("crawl", help="Crawl whole forums (default: the entire board); resumes where it stopped")
+    p.add_argument("output_dir")
+    p.add_argument("urls", nargs="*", help="Forum or board index pages to start from")
+    p.add_argument("--headless", action="store_true", help="Don't show the browser window")
+    p.add_argument("--package", action="store_true", help="Pack saved pages into archive shards while running")
+    p.add_argument("--index", action="store_true", help="Add saved posts to the search index while running")
+    p.add_argument("--mirror", action="store_true", help="Update the offline mirror when done")
+    p.add_argument("--diagnostics", action="store_true", help="Trace pages that load slowly or fail")
+    p.set_defaults(func=cli_crawl)
+    
+    p = commands.add_parser("coordinator", help="Queue a user's posts/topics (or URLs) in a shared work store for workers")
+    p.add_argument("output_dir", help="Folder for the coordinator's browser profile and log")
+    p.add_argument("--store", help="Work store SQLite file, ideally on a shared volume (default: meta/work.sqlite)")
+    p.add_argument("--user", help="TTG username whose posts and topics to queue")
+    p.add_argument("--url", action="append", help="Extra page to queue (repeatable)")
+    p.add_argument("--groups", nargs="+", choices=USER_GROUPS, default=list(USER_GROUPS), metavar="GROUP",
+                   help="Parts of the user's history to queue: " + ", ".join(USER_GROUPS) + " (default: all)")
+    p.add_argument("--posts-only", action="store_true", help="Workers capture just the user's post, not full topic pages")
+    p.add_argument("--headless", action="store_true", help="Don't show the browser window while finding pages")
+    p.add_argument("--serve", action="store_true", help="Serve the store over HTTP for workers without the shared volume")
+    p.add_argument("--host", default="127.0.0.1", help="Address to serve on (0.0.0.0 for other machines - trusted networks only)")
+    p.add_argument("--port", type=int, default=WORK_STORE_PORT)
+    p.set_defaults(func=cli_coordinator)
+    
+    p = commands.add_parser("worker", help="Archive pages claimed from a coordinator's work store")
+    p.add_argument("store", help="Work store SQLite file, or http://host:port/ of a coordinator started with --serve")
+    p.add_argument("output_dir")
+    p.add_argument("--id", help="Worker name in the store (default: hostname-pid)")
+    p.add_argument("--batch", type=int, default=WORK_BATCH_SIZE, help="Pages claimed at a time")
+    p.add_argument("--lease", type=float, default=WORK_LEASE_SEC, help="Seconds a claim lasts without renewal")
+    p.add_argument("--wait", action="store_true", help="Keep polling for new work instead of exiting when the pool is empty")
+    p.add_argument("--show-browser", action="store_true", help="Run the browser with a window")
+    p.add_argument("--diagnostics", action="store_true", help="Trace pages that load slowly or fail")
+    p.set_defaults(func=cli_worker)
+    
+    return parser
+
+def main(argv: list[str] = None):
+    args = build_arg_parser().parse_args(argv)
+    if args.command is None:
+        run_gui()
+    else:
+        args.func(args)
+
 if __name__ == "__main__":
     main()